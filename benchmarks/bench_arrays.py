@@ -0,0 +1,110 @@
+"""Compare writing every element of list ports to writing only what changed.
+
+Every node holds a list of floats port backed by a multi attribute. Each frame
+edits a few elements of every list, then the lists grow, shrink and get nan and
+infinite elements. With shadow
+values off, the OMState doesn't know what maya holds and sets every element
+again. The elements of a list are set by a single setAttr, except lists holding
+nan or infinity whose elements are set one by one, and counted apart. The maya
+attributes must match the ports after every step.
+
+    python benchmarks/bench_arrays.py 100 500 10
+"""
+from __future__ import annotations
+
+import math
+import random
+import sys
+import time
+from typing import Any, List
+
+from common import fake_maya
+
+from orodruin.core import Port, State
+from orodruin.core.port.port import PortDirection
+from orodruin_maya.core import OMState
+
+# Ports are created with an instance of their type, which typing.List can't give.
+FloatList = list[float] if sys.version_info >= (3, 9) else List[float]
+
+
+def count_set_attr() -> None:
+    """Count the values set by the fake modifiers, one per array element."""
+    set_attr = fake_maya._BaseModifier.set_attr  # pylint: disable = protected-access
+
+    def counted(self: Any, plug: Any, value: Any) -> None:
+        fake_maya.CALLS["set_attr"] += 1
+        set_attr(self, plug, value)
+
+    fake_maya._BaseModifier.set_attr = counted  # pylint: disable = protected-access
+
+
+def mismatches(om_state: OMState, ports: List[Port]) -> int:
+    return sum(
+        list(map(repr, om_state.get_om_port(port).maya_attribute().read()))
+        != list(map(repr, port.get()))
+        for port in ports
+    )
+
+
+def run(node_count: int, size: int, frames: int, shadow_values: bool) -> int:
+    random.seed(0)
+    fake_maya.reset()
+    state = State()
+    om_state = OMState(state, shadow_values=shadow_values)
+    ports = []
+    for index in range(node_count):
+        node = state.create_node("skinWeights", f"weights{index}")
+        port = state.create_port("weights", PortDirection.input, FloatList, node)
+        port.set([random.random() for _ in range(size)])
+        ports.append(port)
+    om_state.flush()
+
+    label = "changed elements" if shadow_values else "every element"
+    wrong = mismatches(om_state, ports)
+    steps = [("edit", frames), ("grow", 1), ("shrink", 1), ("nan", 1)]
+    for step, count in steps:
+        fake_maya.CALLS.clear()
+        start = time.perf_counter()
+        for _ in range(count):
+            for port in ports:
+                values = list(port.get())
+                if step == "edit":
+                    for _ in range(3):
+                        values[random.randrange(len(values))] = random.random()
+                elif step == "grow":
+                    values += [random.random() for _ in range(size // 2)]
+                elif step == "shrink":
+                    values = values[: size // 2]
+                else:
+                    values[1:3] = [math.nan, math.inf]
+                port.set(values)
+            om_state.flush()
+        elapsed = time.perf_counter() - start
+        wrong += mismatches(om_state, ports)
+        print(
+            f"{label:<17} {step:<7} {elapsed:.3f}s, "
+            f"{fake_maya.CALLS['setAttr']} setAttr, "
+            f"{fake_maya.CALLS['set_attr']} elements set one by one"
+        )
+    return wrong
+
+
+def main(node_count: int, size: int, frames: int) -> int:
+    count_set_attr()
+    wrong = sum(
+        run(node_count, size, frames, shadow_values) for shadow_values in (False, True)
+    )
+    if wrong:
+        print(f"{wrong} maya attributes differ from their port")
+    return 1 if wrong else 0
+
+
+if __name__ == "__main__":
+    sys.exit(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 100,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 500,
+            int(sys.argv[3]) if len(sys.argv) > 3 else 10,
+        )
+    )
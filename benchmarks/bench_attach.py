@@ -0,0 +1,42 @@
+"""Compare attaching an OMState to a tagged scene with rebuilding the scene.
+
+A chain rig is built once so its maya nodes get tagged, a new OMState then
+attaches to the scene and reuses them. The rebuild attaches to an empty
+scene, creating every maya node again as reopening a rig used to.
+
+    python benchmarks/bench_attach.py 2000
+"""
+from __future__ import annotations
+
+import sys
+import time
+
+from common import build_chain, fake_maya
+
+from orodruin.core import State
+from orodruin_maya.core import OMState
+
+
+def attach(state: State, label: str) -> None:
+    fake_maya.CALLS.clear()
+    start = time.perf_counter()
+    OMState.attach(state)
+    elapsed = time.perf_counter() - start
+    calls = ", ".join(f"{k}={v}" for k, v in sorted(fake_maya.CALLS.items()))
+    print(f"{label:<8} {elapsed:.3f}s, {len(fake_maya.SCENE.nodes)} nodes, {calls}")
+
+
+def main(node_count: int) -> None:
+    fake_maya.reset()
+    state = State()
+    om_state = OMState(state)
+    build_chain(state, node_count, ports_per_node=4)
+    om_state.flush()
+
+    attach(state, "attach")
+    fake_maya.SCENE.clear()
+    attach(state, "rebuild")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,130 @@
+"""Compare converting vector and matrix values in batches to one by one.
+
+Matrices are converted one at a time, as cmdx does when each is set on its
+own, then in one batch. Matrices stored as numpy arrays are batched with
+numpy, if installed. A rig of matrix and vector ports is then written and
+serialized through the OMState to check the values round trip.
+
+    python benchmarks/bench_codec.py 20000
+"""
+from __future__ import annotations
+
+import random
+import sys
+import time
+from typing import Any, Callable, List, Sequence
+
+from common import fake_maya
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from orodruin.core import SerializationType, State
+from orodruin.core.port.port import PortDirection
+from orodruin_maya.core import OMState, codec
+from orodruin_maya.core.serializer import MayaSerializer
+
+
+class Matrix4(tuple):
+    """Stand-in for the orodruin Matrix4, stored row by row."""
+
+    def __new__(cls, rows: Sequence[Sequence[float]] = ()) -> "Matrix4":
+        if not rows:
+            rows = [[float(row == column) for column in range(4)] for row in range(4)]
+        return super().__new__(cls, (tuple(row) for row in rows))
+
+
+class Vector3(tuple):
+    """Stand-in for the orodruin Vector3."""
+
+    def __new__(cls, values: Sequence[float] = (0.0, 0.0, 0.0)) -> "Vector3":
+        return super().__new__(cls, values)
+
+
+def random_matrix() -> Matrix4:
+    return Matrix4([[random.random() for _ in range(4)] for _ in range(4)])
+
+
+def convert(label: str, function: Callable[[], List[Any]]) -> List[Any]:
+    start = time.perf_counter()
+    result = function()
+    print(f"{label:<26} {time.perf_counter() - start:.3f}s")
+    return result
+
+
+def bench_conversion(count: int) -> int:
+    matrix_codec = codec.find_codec(Matrix4)
+    values: List[Any] = [random_matrix() for _ in range(count)]
+    print(f"{count} matrices")
+
+    inputs = [("tuples", values)]
+    if numpy is not None:
+        inputs.append(("numpy arrays", [numpy.array(value) for value in values]))
+    else:
+        print("numpy is not installed, numpy arrays skipped")
+
+    mismatches = 0
+    for label, batch in inputs:
+        reference = convert(
+            f"{label}, one by one",
+            lambda batch=batch: [matrix_codec.to_maya([value])[0] for value in batch],
+        )
+        result = convert(
+            f"{label}, batch", lambda batch=batch: matrix_codec.to_maya(batch)
+        )
+        mismatches += result != reference
+    return mismatches
+
+
+def bench_round_trip(count: int) -> int:
+    fake_maya.reset()
+    state = State()
+    om_state = OMState(state)
+    ports = []
+    for index in range(count):
+        node = state.create_node("deformer", f"deformer{index}")
+        ports.append(
+            state.create_port("bindMatrix", PortDirection.input, Matrix4, node)
+        )
+        ports.append(state.create_port("offset", PortDirection.input, Vector3, node))
+    om_state.flush()
+
+    for port in ports:
+        if port.type() is Matrix4:
+            port.set(random_matrix())
+        else:
+            port.set(Vector3((random.random(), random.random(), random.random())))
+
+    start = time.perf_counter()
+    om_state.flush()
+    written = time.perf_counter() - start
+
+    serializer = MayaSerializer(om_state)
+    start = time.perf_counter()
+    data = [
+        serializer.serialize_port(port, SerializationType.instance) for port in ports
+    ]
+    serialized = time.perf_counter() - start
+    print(
+        f"{len(ports)} ports written in {written:.3f}s, "
+        f"serialized in {serialized:.3f}s"
+    )
+
+    expected = codec.values_to_maya(Matrix4, [port.get() for port in ports[::2]])
+    expected += codec.values_to_maya(Vector3, [port.get() for port in ports[1::2]])
+    values = [port_data["value"] for port_data in data[::2] + data[1::2]]
+    return int(values != expected)
+
+
+def main(count: int) -> int:
+    random.seed(0)
+    mismatches = bench_conversion(count) + bench_round_trip(count // 10)
+    if mismatches:
+        print(f"{mismatches} conversions differ from the per-value path")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
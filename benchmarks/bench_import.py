@@ -0,0 +1,81 @@
+"""Compare the import cost of a headless OMState with one driving the editor.
+
+Each scenario runs in a fresh interpreter with ``-X importtime`` and reports the
+total import time, the number of modules loaded and the peak memory.
+
+    python benchmarks/bench_import.py
+"""
+from __future__ import annotations
+
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Tuple
+
+HERE = Path(__file__).resolve().parent
+ROOT = HERE.parent
+
+SETUP = "import fake_maya; fake_maya.install()\n"
+REPORT = (
+    "import resource, sys\n"
+    "print(len(sys.modules), resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+)
+
+SCENARIOS = {
+    "headless": "from orodruin_maya.core import OMState\n",
+    "editor": (
+        "from orodruin_maya.core import OMState\n"
+        "from orodruin_editor import GraphicsState\n"
+    ),
+}
+
+IMPORT_TIME_RE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def run(code: str) -> Tuple[int, int, Dict[str, int]]:
+    """Run code in a fresh interpreter, return its module count, peak rss and
+    the cumulative import time of each top level package in microseconds."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(HERE), str(ROOT / "scripts"), env.get("PYTHONPATH")])
+    )
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", SETUP + code + REPORT],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    packages: Dict[str, int] = defaultdict(int)
+    for match in IMPORT_TIME_RE.finditer(process.stderr):
+        _, cumulative, indent, name = match.groups()
+        if len(indent) == 1:
+            packages[name.split(".")[0]] += int(cumulative)
+
+    module_count, max_rss = process.stdout.split()
+    return int(module_count), int(max_rss), packages
+
+
+def main() -> None:
+    for label, code in SCENARIOS.items():
+        try:
+            module_count, max_rss, packages = run(code)
+        except subprocess.CalledProcessError as error:
+            print(f"{label}: failed\n{error.stderr.splitlines()[-1]}")
+            continue
+
+        total = sum(packages.values())
+        print(
+            f"{label}: {total / 1000:.1f}ms of imports, "
+            f"{module_count} modules, {max_rss} KB peak rss"
+        )
+        for name, cumulative in sorted(packages.items(), key=lambda item: -item[1])[:8]:
+            print(f"  {name:<24}{cumulative / 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Index a library and resolve the maya implementation of one of its nodes many times.
+
+The first index build scans the library, the second one loads it from disk.
+Lookups are then timed with and without the class cache, cached lookups must
+not touch the filesystem. An implementation added once the index is built must
+still be found, and lookups of a node type without implementation must not scan
+the library every time. An edited implementation is only executed again once
+the classes are reloaded.
+
+    python benchmarks/bench_library.py 500
+"""
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any
+
+from common import fake_maya  # pylint: disable = unused-import
+
+from orodruin.core.library import LibraryManager
+from orodruin_maya.core.library import (
+    clear_node_class_cache,
+    find_om_node_class,
+    reload_node_classes,
+    warm_up_library_index,
+)
+
+FILESYSTEM_CALLS: Counter = Counter()
+
+
+def count_stat() -> None:
+    """Count the calls to Path.stat, which every filesystem check goes through."""
+    stat = Path.stat
+
+    def counted(self: Path, *args: Any, **kwargs: Any) -> os.stat_result:
+        FILESYSTEM_CALLS["stat"] += 1
+        return stat(self, *args, **kwargs)
+
+    Path.stat = counted  # type: ignore
+
+
+IMPLEMENTATION = """
+from orodruin_maya.core import OMNode
+
+
+class {name}(OMNode):
+    def build(self):
+        self._input_node = self.create_node("transform", name=self._name)
+        self._output_node = self.create_node("multMatrix", name=self._name + "_mult")
+"""
+
+
+def main(instance_count: int) -> int:
+    count_stat()
+    with tempfile.TemporaryDirectory() as directory:
+        library_path = Path(directory) / "BenchLibrary"
+        (library_path / "maya").mkdir(parents=True)
+        (library_path / "maya" / "Component.py").write_text(
+            IMPLEMENTATION.format(name="Component")
+        )
+        for index in range(200):
+            (library_path / "maya" / f"Filler{index}.py").write_text(
+                IMPLEMENTATION.format(name=f"Filler{index}")
+            )
+        LibraryManager.register_library(library_path)
+
+        for label in ("scanned", "from disk"):
+            clear_node_class_cache()
+            start = time.perf_counter()
+            warm_up_library_index().result()
+            elapsed = time.perf_counter() - start
+            print(f"library index {label} in {elapsed:.4f}s")
+
+        for label, clear in (("uncached", True), ("cached", False)):
+            clear_node_class_cache()
+            find_om_node_class("BenchLibrary", "Component")
+            FILESYSTEM_CALLS.clear()
+            start = time.perf_counter()
+            for _ in range(instance_count):
+                if clear:
+                    clear_node_class_cache()
+                find_om_node_class("BenchLibrary", "Component")
+            elapsed = time.perf_counter() - start
+            print(
+                f"{label:>8}: {instance_count} lookups in {elapsed:.3f}s, "
+                f"{FILESYSTEM_CALLS['stat']} stat calls"
+            )
+        cached_stats = FILESYSTEM_CALLS["stat"]
+
+        (library_path / "maya" / "Late.py").write_text(
+            IMPLEMENTATION.format(name="Late")
+        )
+        found = find_om_node_class("BenchLibrary", "Late") is not None
+        print(f"implementation added after indexing found: {found}")
+
+        find_om_node_class("BenchLibrary", "Missing")
+        FILESYSTEM_CALLS.clear()
+        start = time.perf_counter()
+        for _ in range(instance_count):
+            find_om_node_class("BenchLibrary", "Missing")
+        elapsed = time.perf_counter() - start
+        missing_stats = FILESYSTEM_CALLS["stat"]
+        print(
+            f" missing: {instance_count} lookups in {elapsed:.3f}s, "
+            f"{missing_stats} stat calls"
+        )
+
+        component = find_om_node_class("BenchLibrary", "Component")
+        component_path = library_path / "maya" / "Component.py"
+        component_path.write_text(IMPLEMENTATION.format(name="Component") + "\n")
+        mtime = component_path.stat().st_mtime + 1
+        os.utime(component_path, (mtime, mtime))
+        unchanged = find_om_node_class("BenchLibrary", "Component") is component
+        reload_node_classes()
+        reloaded = find_om_node_class("BenchLibrary", "Component") is not component
+        print(f"edited implementation kept: {unchanged}, then reloaded: {reloaded}")
+    succeeded = found and unchanged and reloaded
+    return 0 if succeeded and not cached_stats and not missing_stats else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
@@ -0,0 +1,78 @@
+"""Drag attributes in maya and count how often their orodruin ports get set.
+
+Each frame sets every dragged attribute straight in maya several times, as the
+channel box does during a drag, then lets maya go idle. The ports should be
+set once per frame to the latest value, without the values being written back
+to maya.
+
+    python benchmarks/bench_maya_edits.py 1000 100 30
+"""
+from __future__ import annotations
+
+import sys
+import time
+from collections import Counter
+from functools import partial
+from typing import Any
+from uuid import UUID
+
+from common import build_chain, fake_maya
+
+from orodruin.core import State
+from orodruin_maya.core import OMState
+
+SETS_PER_FRAME = 8
+
+
+def main(node_count: int, dragged_count: int, frames: int) -> int:
+    fake_maya.reset()
+    state = State()
+    om_state = OMState(state)
+    _, ports = build_chain(state, node_count)
+    fake_maya.process_idle()
+
+    dragged = [
+        port for port in ports if om_state.get_om_port(port).maya_attribute().writable
+    ][:dragged_count]
+    set_counts: Counter = Counter()
+
+    def count_set(port_id: UUID, _: Any) -> None:
+        set_counts[port_id] += 1
+
+    for port in dragged:
+        port.value_changed.subscribe(partial(count_set, port.uuid()))
+
+    fake_maya.CALLS.clear()
+    start = time.perf_counter()
+    for frame in range(frames):
+        for step in range(SETS_PER_FRAME):
+            for port in dragged:
+                om_state.get_om_port(port).maya_attribute().write(frame + step / 10)
+        fake_maya.process_idle()
+    elapsed = time.perf_counter() - start
+
+    last_value = frames - 1 + (SETS_PER_FRAME - 1) / 10
+    wrong = [port for port in dragged if port.get() != last_value]
+    too_many = [count for count in set_counts.values() if count > frames]
+    print(
+        f"{len(dragged)} attributes dragged over {frames} frames in {elapsed:.3f}s, "
+        f"{sum(set_counts.values())} port sets, maya commands: "
+        f"{dict(sorted(fake_maya.CALLS.items()))}"
+    )
+    if wrong or too_many or fake_maya.CALLS["doIt"]:
+        print(
+            f"{len(wrong)} wrong values, {len(too_many)} ports set more than once "
+            f"per frame, {fake_maya.CALLS['doIt']} values written back"
+        )
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 100,
+            int(sys.argv[3]) if len(sys.argv) > 3 else 30,
+        )
+    )
@@ -0,0 +1,66 @@
+"""Report the memory cost of the OM registries per port.
+
+Creates N synthetic ports through OMState on the fake maya backend and measures
+the memory they allocate with tracemalloc, along with the size of one OMPort.
+
+    python benchmarks/bench_memory.py 100000
+"""
+from __future__ import annotations
+
+import gc
+import sys
+import tracemalloc
+
+from common import fake_maya
+
+from orodruin.core import State
+from orodruin.core.port.port import PortDirection
+from orodruin_maya.core import OMState
+
+PORTS_PER_NODE = 20
+
+
+def instance_size(instance: object) -> int:
+    """Return the shallow size of an instance, including its __dict__ if any."""
+    size = sys.getsizeof(instance)
+    if hasattr(instance, "__dict__"):
+        size += sys.getsizeof(instance.__dict__)
+    return size
+
+
+def main(port_count: int) -> None:
+    fake_maya.reset()
+    state = State()
+    om_state = OMState(state)
+
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.take_snapshot()
+
+    with om_state.batch():
+        for node_index in range(port_count // PORTS_PER_NODE):
+            node = state.create_node("synthetic", f"node{node_index}")
+            for port_index in range(PORTS_PER_NODE):
+                state.create_port(f"port{port_index}", PortDirection.input, float, node)
+
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    om_bytes = 0
+    total_bytes = 0
+    for stat in snapshot.compare_to(baseline, "filename"):
+        total_bytes += stat.size_diff
+        if "orodruin_maya" in stat.traceback[0].filename:
+            om_bytes += stat.size_diff
+
+    port = state.ports()[0]
+    om_port = om_state.get_om_port(port)
+    print(f"{port_count} ports")
+    print(f"  OMPort instance: {instance_size(om_port)} bytes")
+    print(f"  allocated by orodruin_maya: {om_bytes / port_count:.0f} bytes per port")
+    print(f"  allocated in total: {total_bytes / port_count:.0f} bytes per port")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
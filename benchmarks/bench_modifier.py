@@ -0,0 +1,86 @@
+"""Load a synthetic rig through OMState and count the maya commands it sends.
+
+Every edit of the burst is collected by a single OMModifier, so the number of
+maya commands stays flat whatever the size of the rig. In batch mode, where
+maya is never idle, a rig loaded and half deleted without an explicit batch
+must also be applied by a single modifier each time the OMState is flushed.
+
+    python benchmarks/bench_modifier.py 3000
+"""
+from __future__ import annotations
+
+import sys
+import time
+from contextlib import nullcontext
+from typing import Dict
+
+from common import build_chain, fake_maya
+
+from orodruin.core import State
+from orodruin_maya.core import OMState
+
+
+def main(node_count: int) -> int:
+    fake_maya.reset()
+    state = State()
+    om_state = OMState(state)
+
+    start = time.perf_counter()
+    with om_state.batch() as modifier:
+        build_chain(state, node_count)
+    load_time = time.perf_counter() - start
+    load_calls = dict(fake_maya.CALLS)
+    maya_nodes = len(fake_maya.SCENE.nodes)
+    maya_connections = len(fake_maya.SCENE.connections)
+
+    start = time.perf_counter()
+    modifier.undoIt()
+    undo_time = time.perf_counter() - start
+    assert not fake_maya.SCENE.nodes, "undoIt left nodes behind"
+
+    start = time.perf_counter()
+    modifier.doIt()
+    redo_time = time.perf_counter() - start
+    assert len(fake_maya.SCENE.nodes) == maya_nodes, "doIt did not redo every node"
+
+    print(f"{node_count} nodes loaded in {load_time:.3f}s")
+    print(f"  maya commands: {sum(load_calls.values())} {load_calls}")
+    print(f"  maya nodes: {maya_nodes}, connections: {maya_connections}")
+    print(f"  undo: {undo_time:.3f}s, redo: {redo_time:.3f}s")
+
+    in_batch = count_batch_mode_calls(node_count, explicit_batch=True)
+    without_batch = count_batch_mode_calls(node_count, explicit_batch=False)
+    print("batch mode doIt calls, in a batch / without:")
+    for operation, count in in_batch.items():
+        print(f"  {operation}: {count} / {without_batch[operation]}")
+    return 0 if without_batch == in_batch else 1
+
+
+def count_batch_mode_calls(node_count: int, explicit_batch: bool) -> Dict[str, int]:
+    """Load and delete nodes in batch mode, count the doIt calls of each."""
+    fake_maya.reset()
+    fake_maya.BATCH_MODE = True
+    try:
+        state = State()
+        om_state = OMState(state)
+        batch = om_state.batch if explicit_batch else nullcontext
+        calls = {}
+
+        with batch():
+            nodes, _ = build_chain(state, node_count)
+        om_state.flush()
+        calls["load"] = fake_maya.CALLS["doIt"]
+
+        fake_maya.CALLS.clear()
+        with batch():
+            for node in nodes[::2]:
+                state.delete_node(node)
+        om_state.flush()
+        calls["delete"] = fake_maya.CALLS["doIt"]
+        return calls
+    finally:
+        fake_maya.BATCH_MODE = False
+
+
+if __name__ == "__main__":
+    sys.exit(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000))
@@ -0,0 +1,76 @@
+"""Compare the cost of resolving OMPort maya attributes with and without the cache.
+
+The attribute of a port must also resolve right after the port is created,
+before the OMState is flushed, with or without lazy attributes.
+
+    python benchmarks/bench_plugs.py 200 100
+"""
+from __future__ import annotations
+
+import sys
+import timeit
+
+from common import fake_maya
+
+from orodruin.core import State
+from orodruin.core.port.port import PortDirection
+from orodruin_maya.core import OMState
+
+
+def main(port_count: int, repeat: int) -> int:
+    fake_maya.reset()
+    state = State()
+    om_state = OMState(state)
+    node = state.create_node("synthetic", "wide")
+    ports = [
+        state.create_port(f"port{index}", PortDirection.input, float, node)
+        for index in range(port_count)
+    ]
+    om_state.flush()
+    om_ports = [om_state.get_om_port(port) for port in ports]
+
+    def uncached() -> None:
+        for om_port in om_ports:
+            om_port.clear_maya_attribute()
+            om_port.maya_attribute()
+
+    def cached() -> None:
+        for om_port in om_ports:
+            om_port.maya_attribute()
+
+    for label, function in (("uncached", uncached), ("cached", cached)):
+        elapsed = timeit.timeit(function, number=repeat)
+        per_lookup = elapsed / (repeat * port_count) * 1e9
+        print(f"{label:>8}: {per_lookup:8.0f}ns per maya_attribute() call")
+
+    unresolved = [
+        lazy_attributes
+        for lazy_attributes in (False, True)
+        if not resolves_before_flush(lazy_attributes)
+    ]
+    for lazy_attributes in unresolved:
+        print(f"unresolved before the flush, lazy attributes: {lazy_attributes}")
+    return 1 if unresolved else 0
+
+
+def resolves_before_flush(lazy_attributes: bool) -> bool:
+    """Return True if a new port's attribute resolves while the edits are pending."""
+    fake_maya.reset()
+    state = State()
+    om_state = OMState(state, lazy_attributes=lazy_attributes)
+    node = state.create_node("synthetic", "new")
+    port = state.create_port("port", PortDirection.output, float, node)
+    try:
+        om_state.get_om_port(port).maya_attribute()
+    except ValueError:
+        return False
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 100,
+        )
+    )
@@ -0,0 +1,114 @@
+"""Build a chain with a deferred OMState and report how the work is sliced.
+
+Every idle callback is timed, the longest one is what maya would freeze for.
+Garbage collections are left out, they pause maya whatever the time budget.
+Values are set and ports deleted before their events are applied, the OMNodes
+must then know the ports of their node and maya hold the port values.
+
+    python benchmarks/bench_scheduler.py 1000 0.02
+"""
+from __future__ import annotations
+
+import gc
+import sys
+import time
+from typing import Dict, List
+
+from common import build_chain, fake_maya
+
+from orodruin.core import Node, SerializationType, State
+from orodruin_maya.core import OMState
+from orodruin_maya.core.serializer import MayaSerializer
+
+
+def main(node_count: int, budget: float) -> int:
+    fake_maya.reset()
+    state = State()
+    om_state = OMState(state, deferred=True)
+    scheduler = om_state.scheduler()
+    scheduler.set_budget(budget)
+
+    progress = []
+    scheduler.progress_changed.subscribe(progress.append)
+
+    start = time.perf_counter()
+    nodes, ports = build_chain(state, node_count, 4)
+    for index, port in enumerate(ports[1::3]):
+        port.set(float(index))
+    for port in ports[2::9]:
+        state.delete_port(port)
+    queued = time.perf_counter() - start
+
+    gc_pauses = GCPauses()
+    ticks = []
+    gc_ticks = []
+    while fake_maya.IDLE_QUEUE:
+        gc_pauses.reset()
+        tick_start = time.perf_counter()
+        fake_maya.process_idle(max_calls=1)
+        gc_ticks.append(time.perf_counter() - tick_start)
+        ticks.append(gc_ticks[-1] - gc_pauses.total)
+    gc_pauses.stop()
+    total = time.perf_counter() - start
+
+    print(
+        f"{node_count} nodes: events queued in {queued:.3f}s, "
+        f"applied in {len(ticks)} idle callbacks, "
+        f"longest {max(ticks, default=0.0) * 1000:.1f}ms, "
+        f"{max(gc_ticks, default=0.0) * 1000:.1f}ms with garbage collection, "
+        f"total {total:.3f}s"
+    )
+    over_budget = sum(tick > budget for tick in ticks)
+    print(f"idle callbacks over the {budget * 1000:.0f}ms budget: {over_budget}")
+    print(f"progress updates: {len(progress)}, last: {progress[-1:]}")
+    print(f"maya nodes: {len(fake_maya.SCENE.nodes)}")
+
+    wrong = check_ports(om_state, nodes)
+    if wrong:
+        print(f"{wrong} ports differ from their OM port")
+    return 1 if wrong else 0
+
+
+class GCPauses:
+    """Time the garbage collections, maya would pause for them whatever the budget."""
+
+    def __init__(self) -> None:
+        self.total = 0.0
+        self._start = 0.0
+        gc.callbacks.append(self._on_collect)
+
+    def reset(self) -> None:
+        self.total = 0.0
+
+    def stop(self) -> None:
+        gc.callbacks.remove(self._on_collect)
+
+    def _on_collect(self, phase: str, info: Dict[str, int]) -> None:
+        if phase == "start":
+            self._start = time.perf_counter()
+        else:
+            self.total += time.perf_counter() - self._start
+
+
+def check_ports(om_state: OMState, nodes: List[Node]) -> int:
+    """Count the ports unknown to their OMNode or whose value didn't reach maya."""
+    serializer = MayaSerializer(om_state)
+    wrong = 0
+    for node in nodes:
+        om_ports = om_state.get_om_node(node).om_ports()
+        wrong += [om_port.uuid() for om_port in om_ports] != [
+            port.uuid() for port in node.ports()
+        ]
+        for port in node.ports():
+            data = serializer.serialize_port(port, SerializationType.instance)
+            wrong += data["value"] != port.get()
+    return wrong
+
+
+if __name__ == "__main__":
+    sys.exit(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+            float(sys.argv[2]) if len(sys.argv) > 2 else 0.02,
+        )
+    )
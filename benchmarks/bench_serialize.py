@@ -0,0 +1,142 @@
+"""Compare serializing the ports with batched reads to reading them one by one.
+
+The reference reads the maya attribute of each port on its own, flushing the
+OMState every time, as MayaSerializer used to. The output of both must be
+byte-identical, before and after some attributes are edited in maya. Each save
+is timed as the best of a few runs, the batched one with a new serializer.
+The serializer of the OMState must not keep values a later edit made stale,
+whether the port is set or its attribute is set in maya, in batch mode too.
+
+    python benchmarks/bench_serialize.py 5000 8
+"""
+from __future__ import annotations
+
+import json
+import sys
+import time
+from functools import partial
+from typing import Any, Callable, Dict, List, Tuple
+
+from common import build_chain, fake_maya
+
+from orodruin.core import Port, SerializationType, State
+from orodruin_maya.core import OMState
+from orodruin_maya.core.serializer import MayaSerializer
+
+
+def serialize_port_one_by_one(
+    om_state: OMState, port: Port, serialization_type: SerializationType
+) -> Dict[str, Any]:
+    om_state.flush()
+    om_port = om_state.get_om_port(port)
+    if om_port.is_materialized():
+        value = om_port.maya_attribute().read()
+    else:
+        value = port.get()
+    if serialization_type is SerializationType.instance:
+        return {"value": value}
+    return {"default_value": value}
+
+
+def serialize(
+    label: str,
+    ports: List[Port],
+    make_serialize_port: Callable[[], Callable[[Port, SerializationType], Any]],
+    repeat: int = 5,
+) -> Tuple[str, float]:
+    """Serialize the ports, return the output and the best time of a few runs."""
+    timings = []
+    for _ in range(repeat):
+        serialize_port = make_serialize_port()
+        fake_maya.CALLS.clear()
+        start = time.perf_counter()
+        data = [
+            serialize_port(port, serialization_type)
+            for serialization_type in SerializationType
+            for port in ports
+        ]
+        timings.append(time.perf_counter() - start)
+    calls = ", ".join(f"{k}={v}" for k, v in sorted(fake_maya.CALLS.items()))
+    print(f"{label:<10} {min(timings):.3f}s, {calls}")
+    return json.dumps(data, sort_keys=True), min(timings)
+
+
+def main(node_count: int, ports_per_node: int) -> int:
+    mismatches = 0
+    for lazy_attributes in (False, True):
+        fake_maya.reset()
+        state = State()
+        om_state = OMState(state, lazy_attributes=lazy_attributes)
+        _, ports = build_chain(state, node_count, ports_per_node)
+        for index, port in enumerate(ports[::3]):
+            port.set(float(index))
+        om_state.flush()
+
+        print(f"lazy attributes: {lazy_attributes}, {len(ports)} ports")
+        for save in ("first save", "after maya edits"):
+            if save == "after maya edits":
+                edit_in_maya(om_state, ports[1::50])
+            reference, reference_time = serialize(
+                "one by one",
+                ports,
+                lambda: partial(serialize_port_one_by_one, om_state),
+            )
+            batched, batched_time = serialize(
+                "batched", ports, lambda: MayaSerializer(om_state).serialize_port
+            )
+            print(f"{save}: {reference_time / batched_time:.2f}x faster batched")
+            if batched != reference:
+                mismatches += 1
+                print(f"the batched output differs, {save}")
+
+    for batch_mode in (False, True):
+        stale = check_stale_values(batch_mode)
+        print(f"batch mode: {batch_mode}, stale values: {stale}")
+        mismatches += stale
+    return 1 if mismatches else 0
+
+
+def check_stale_values(batch_mode: bool) -> int:
+    """Serialize a port between edits, return how many saves were stale."""
+    fake_maya.reset()
+    fake_maya.BATCH_MODE = batch_mode
+    try:
+        state = State()
+        om_state = OMState(state, receive_maya_edits=False)
+        _, ports = build_chain(state, 1)
+        port = ports[0]
+        om_state.flush()
+        serialize_port = om_state.serializer().serialize_port
+
+        stale = 0
+        for value, edit in ((5.0, port.set), (7.0, maya_write(om_state, port))):
+            serialize_port(port, SerializationType.instance)
+            edit(value)
+            if serialize_port(port, SerializationType.instance) != {"value": value}:
+                stale += 1
+        return stale
+    finally:
+        fake_maya.BATCH_MODE = False
+
+
+def maya_write(om_state: OMState, port: Port) -> Callable[[float], None]:
+    """Return a function setting the attribute of the port straight in maya."""
+    return om_state.get_om_port(port).maya_attribute().write
+
+
+def edit_in_maya(om_state: OMState, ports: List[Port]) -> None:
+    """Set the unconnected attributes of the ports straight in maya."""
+    for index, port in enumerate(ports):
+        om_port = om_state.get_om_port(port)
+        maya_attribute = om_port.maya_attribute()
+        if maya_attribute.writable:
+            maya_attribute.write(float(-index))
+
+
+if __name__ == "__main__":
+    sys.exit(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 5000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 8,
+        )
+    )
@@ -0,0 +1,133 @@
+"""Compare the per-instance cost of library nodes with and without attribute templates.
+
+Instances of the same library node type get their attributes from a template
+recorded on the first instance instead of working out each port's layout.
+The time spent in the OMState handlers is reported apart from the wall time,
+which includes orodruin's own work, best of three runs. The garbage collector
+is disabled to keep its pauses out of the comparison.
+
+The first instance gets an extra port before the others are created, none of
+the other instances may get its attribute. Every instance has a compound port
+whose child attribute must be created under its parent's, unless a deferred
+OMState handles the child in a later idle tick, it's then added on its own.
+
+    python benchmarks/bench_templates.py 400 50
+"""
+from __future__ import annotations
+
+import gc
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Tuple
+
+from common import fake_maya
+
+from orodruin.core import State
+from orodruin.core.library import LibraryManager
+from orodruin.core.port.port import PortDirection
+from orodruin_maya.core import OMState
+
+PORT_TYPES = (float, bool, int, str)
+
+
+def create_instances(
+    state: State, library, instance_count: int, port_count: int
+) -> None:
+    for index in range(instance_count):
+        node = state.create_node("component", f"component{index}", library=library)
+        for port_index in range(port_count):
+            direction = PortDirection.input if port_index % 4 else PortDirection.output
+            port_type = PORT_TYPES[port_index % len(PORT_TYPES)]
+            state.create_port(f"port{port_index}", direction, port_type, node)
+        compound = state.create_port("compound", PortDirection.input, float, node)
+        state.create_port("child", PortDirection.input, float, node, compound)
+        if index == 0:
+            state.create_port("extra", PortDirection.input, float, node)
+
+
+def run(
+    library, instance_count: int, port_count: int, templates: bool, deferred: bool
+) -> Tuple[float, float, int, int]:
+    """Return the wall time, the time spent in the OMState handlers, the
+    number of maya nodes wrongly given the attribute of the extra port and the
+    number of child attributes created outside of their compound attribute."""
+    fake_maya.reset()
+    state = State()
+    om_state = OMState(state, deferred=deferred, attribute_templates=templates)
+    profiler = om_state.enable_profiling()
+
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        create_instances(state, library, instance_count, port_count)
+        fake_maya.process_idle()
+        elapsed = time.perf_counter() - start
+    finally:
+        gc.enable()
+
+    handlers = profiler.handler_stats()
+    handlers_time = sum(
+        handlers[name].total()
+        for name in ("create_om_node", "create_om_port", "apply_modifier")
+    )
+    orphans = sum(
+        maya_node.has_attr("extra")
+        for maya_node in fake_maya.SCENE.nodes.values()
+        if not maya_node.name().startswith("component0")
+    )
+    flat_children = sum(
+        maya_node.has_attr("child")
+        and maya_node._children.get("compound")  # pylint: disable = protected-access
+        != ["child"]
+        for maya_node in fake_maya.SCENE.nodes.values()
+    )
+    return elapsed, handlers_time, orphans, flat_children
+
+
+def main(instance_count: int, port_count: int) -> int:
+    library_path = Path(tempfile.mkdtemp()) / "benchmark_library"
+    (library_path / "maya").mkdir(parents=True)
+    LibraryManager.register_library(library_path)
+    library = next(
+        library
+        for library in LibraryManager.libraries()
+        if library.name() == library_path.name
+    )
+
+    # Warm up the caches so the first run isn't penalized.
+    run(library, 10, port_count, True, False)
+
+    total_errors = 0
+    for deferred in (False, True):
+        for templates in (False, True):
+            runs = [
+                run(library, instance_count, port_count, templates, deferred)
+                for _ in range(3)
+            ]
+            elapsed = min(elapsed for elapsed, _, _, _ in runs)
+            handlers_time = min(handlers_time for _, handlers_time, _, _ in runs)
+            orphans = max(orphans for _, _, orphans, _ in runs)
+            flat_children = max(flat_children for _, _, _, flat_children in runs)
+            total_errors += orphans + (0 if deferred else flat_children)
+            print(
+                f"{'deferred' if deferred else 'immediate'}, templates "
+                f"{'on' if templates else 'off'}: {instance_count} instances "
+                f"of {port_count} ports in {elapsed:.3f}s, OMState handlers: "
+                f"{handlers_time / instance_count * 1e6:.0f}us per instance"
+            )
+            if orphans:
+                print(f"{orphans} maya nodes got the attribute of the extra port")
+            if flat_children:
+                print(f"{flat_children} child attributes created out of their parent")
+    return 1 if total_errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 400,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 50,
+        )
+    )
@@ -0,0 +1,45 @@
+"""Scrub port values and count the maya writes and writability queries they cost.
+
+Writes are queued per port and only the last value of each port is written
+when the queue is flushed, writability is queried once per plug.
+
+    python benchmarks/bench_writes.py 1000 10
+"""
+from __future__ import annotations
+
+import sys
+import time
+
+from common import build_chain, fake_maya
+
+from orodruin.core import State
+from orodruin_maya.core import OMState
+
+
+def main(node_count: int, updates: int) -> None:
+    fake_maya.reset()
+    state = State()
+    om_state = OMState(state)
+    _, ports = build_chain(state, node_count)
+    fake_maya.process_idle()
+
+    for frame in range(2):
+        fake_maya.CALLS.clear()
+        start = time.perf_counter()
+        for update in range(updates):
+            for port in ports:
+                port.set(float(update))
+        fake_maya.process_idle()
+        elapsed = time.perf_counter() - start
+
+        print(
+            f"pass {frame}: {len(ports) * updates} value changes in {elapsed:.3f}s, "
+            f"maya commands: {dict(fake_maya.CALLS)}"
+        )
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 10,
+    )
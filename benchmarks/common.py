@@ -0,0 +1,44 @@
+"""Shared setup for the benchmarks: fake maya backend and synthetic rigs."""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from typing import List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "scripts"))
+
+import fake_maya  # pylint: disable = wrong-import-position
+
+fake_maya.install()
+
+from orodruin.core import Node, Port, State  # pylint: disable = wrong-import-order
+from orodruin.core.port.port import PortDirection
+
+
+def build_chain(
+    state: State,
+    node_count: int,
+    ports_per_node: int = 2,
+) -> Tuple[List[Node], List[Port]]:
+    """Create a chain of nodes whose first output feeds the next node's first input.
+
+    Returns the created nodes and their ports.
+    """
+    nodes = []
+    ports = []
+    previous_output = None
+    for index in range(node_count):
+        node = state.create_node("synthetic", f"node{index}")
+        inputs = [
+            state.create_port(f"input{port_index}", PortDirection.input, float, node)
+            for port_index in range(max(1, ports_per_node // 2))
+        ]
+        output = state.create_port("output", PortDirection.output, float, node)
+        if previous_output is not None:
+            state.connect(previous_output, inputs[0])
+        previous_output = output
+        nodes.append(node)
+        ports.extend(inputs)
+        ports.append(output)
+    return nodes, ports
@@ -0,0 +1,146 @@
+"""Check that flattening the groups gives the same results as the IN/OUT layout.
+
+The same rig of nested groups around leaf library nodes is built with and
+without flatten_groups, edited, and the evaluated value of every leaf
+attribute is compared between the two layouts. Maya node and connection
+counts and build times are reported for both.
+
+    python benchmarks/compare_flatten.py 4 3
+"""
+from __future__ import annotations
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from common import fake_maya
+
+from orodruin.core import Node, Port, State
+from orodruin.core.library import LibraryManager
+from orodruin.core.port.port import PortDirection
+from orodruin_maya.core import OMState
+
+LEAF_IMPLEMENTATION = '''
+from orodruin_maya.core import OMNode
+
+
+class leaf(OMNode):
+    """A single network node holding the attributes of the ports."""
+'''
+
+
+class Rig:
+    """Nested groups, each chaining its children and fanning out its gain."""
+
+    def __init__(self, state: State, library: Any, depth: int, breadth: int) -> None:
+        self.state = state
+        self.library = library
+        self.leaves: List[Node] = []
+        self.links: List[Any] = []
+        self.top_in, self.top_gain, _ = self.group("top", depth, breadth)
+
+    def ports(self, node: Node) -> Tuple[Port, Port, Port]:
+        create_port = self.state.create_port
+        return (
+            create_port("in", PortDirection.input, float, node),
+            create_port("gain", PortDirection.input, float, node),
+            create_port("out", PortDirection.output, float, node),
+        )
+
+    def group(self, name: str, depth: int, breadth: int) -> Tuple[Port, Port, Port]:
+        group_in, gain, group_out = self.ports(self.state.create_node("group", name))
+        upstream = group_in
+        for index in range(breadth):
+            child_name = f"{name}_{index}"
+            if depth:
+                child_in, child_gain, child_out = self.group(
+                    child_name, depth - 1, breadth
+                )
+            else:
+                node = self.state.create_node("leaf", child_name, library=self.library)
+                self.leaves.append(node)
+                child_in, child_gain, child_out = self.ports(node)
+                child_out.set(float(len(self.leaves)))
+
+            self.links.append(self.state.connect(upstream, child_in))
+            if index % 2:
+                child_gain.set(float(index))
+            else:
+                self.state.connect(gain, child_gain)
+            upstream = child_out
+        self.state.connect(upstream, group_out)
+        return group_in, gain, group_out
+
+
+def leaf_values(om_state: OMState, rig: Rig) -> Dict[Tuple[str, str], Any]:
+    """Return the evaluated value of the maya attribute of every leaf port."""
+    om_state.flush()
+    return {
+        (node.name(), port.name()): om_state.get_om_port(port).maya_attribute().read()
+        for node in rig.leaves
+        for port in node.ports()
+    }
+
+
+def run(library: Any, depth: int, breadth: int, flatten: bool) -> List[Any]:
+    """Build and edit the rig, return the leaf values after each step."""
+    fake_maya.reset()
+    state = State()
+    om_state = OMState(state, flatten_groups=flatten)
+
+    start = time.perf_counter()
+    rig = Rig(state, library, depth, breadth)
+    om_state.flush()
+    elapsed = time.perf_counter() - start
+    print(
+        f"flatten {'on ' if flatten else 'off'}: {len(fake_maya.SCENE.nodes)} maya "
+        f"nodes, {len(fake_maya.SCENE.connections)} connections, built in "
+        f"{elapsed:.3f}s"
+    )
+
+    steps = []
+    rig.top_in.set(1.5)
+    rig.top_gain.set(3.0)
+    steps.append(leaf_values(om_state, rig))
+
+    for link in rig.links[::3]:
+        state.delete_connection(link)
+    rig.top_gain.set(5.0)
+    steps.append(leaf_values(om_state, rig))
+    return steps
+
+
+def main(depth: int, breadth: int) -> int:
+    library_path = Path(tempfile.mkdtemp()) / "flatten_compare"
+    (library_path / "maya").mkdir(parents=True)
+    (library_path / "maya" / "leaf.py").write_text(LEAF_IMPLEMENTATION)
+    LibraryManager.register_library(library_path)
+    library = next(
+        library
+        for library in LibraryManager.libraries()
+        if library.name() == library_path.name
+    )
+
+    expected = run(library, depth, breadth, flatten=False)
+    flattened = run(library, depth, breadth, flatten=True)
+
+    mismatches = 0
+    for step, (reference, values) in enumerate(zip(expected, flattened)):
+        for key, value in reference.items():
+            if values[key] != value:
+                mismatches += 1
+                print(f"step {step} {key}: {value} with IN/OUT, {values[key]} flat")
+    leaf_count = len(expected[0])
+    print(f"{leaf_count} leaf attributes compared, {mismatches} mismatches")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 4,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 3,
+        )
+    )
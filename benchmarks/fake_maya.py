@@ -0,0 +1,904 @@
+"""In-memory stand-in for ``maya.cmds``, ``maya.utils``, ``cmdx`` and OpenMaya messages.
+
+Call `install` before importing ``orodruin_maya`` to drive the Maya bridge
+outside of Maya. The fake keeps a toy dependency graph of nodes, attributes,
+values and connections, and counts every Maya command it receives in `CALLS`
+so benchmarks can report how many round-trips an operation costs.
+
+Only the subset of the Maya and cmdx APIs used by ``orodruin_maya`` is provided.
+"""
+from __future__ import annotations
+
+import fnmatch
+import functools
+import itertools
+import re
+import sys
+import types
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+CALLS: Counter = Counter()
+"""Number of calls received by each Maya command since the last `reset`."""
+
+IDLE_QUEUE: List[Tuple[Callable[..., Any], Tuple[Any, ...]]] = []
+"""Callables waiting for Maya to be idle, see `process_idle`."""
+
+BATCH_MODE = False
+"""Value returned by ``cmds.about(batch=True)``."""
+
+PLUG_RE = re.compile(r"(?P<attribute>\w+)(?:\[(?P<index>\d+)\])?")
+
+SET_RANGE_RE = re.compile(
+    r'setAttr "(?P<plug>[^"\[]+)\[(?P<start>\d+):(?P<end>\d+)\]"(?P<values>.*)'
+)
+"""The only MEL command `MDGModifier.commandToExecute` understands."""
+
+STATIC_ATTRIBUTES: Dict[str, Dict[str, Any]] = {
+    "network": {},
+    "transform": {
+        "translate": (0.0, 0.0, 0.0),
+        "rotate": (0.0, 0.0, 0.0),
+        "scale": (1.0, 1.0, 1.0),
+        "worldMatrix": (1.0, 0.0, 0.0, 0.0) * 4,
+    },
+    "multMatrix": {
+        "matrixIn": [],
+        "matrixSum": (1.0, 0.0, 0.0, 0.0) * 4,
+    },
+}
+"""Built-in attributes and their default values for the known node types."""
+
+DAG_TYPES = {"transform", "joint", "locator"}
+
+
+def command(function: Callable[..., Any]) -> Callable[..., Any]:
+    """Count every call made to the decorated Maya command."""
+
+    @functools.wraps(function)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        CALLS[function.__name__] += 1
+        return function(*args, **kwargs)
+
+    return wrapper
+
+
+class Scene:
+    """The toy dependency graph shared by the fake modules."""
+
+    def __init__(self) -> None:
+        self.nodes: Dict[int, Node] = {}
+        self.connections: Dict[Tuple[int, str], Tuple[int, str]] = {}
+        self.selection: List[str] = []
+        self._hash_codes = itertools.count(1)
+        self._names: Dict[str, int] = {}
+        # Target plugs of the connections involving each node.
+        self._node_connections: Dict[int, Set[Tuple[int, str]]] = {}
+        # Attribute changed callbacks of each node, by callback id.
+        self.callbacks: Dict[int, Dict[int, Callable[..., Any]]] = {}
+        self._callback_ids = itertools.count(1)
+        self._callback_nodes: Dict[int, int] = {}
+
+    def add_callback(self, hash_code: int, callback: Callable[..., Any]) -> int:
+        callback_id = next(self._callback_ids)
+        self.callbacks.setdefault(hash_code, {})[callback_id] = callback
+        self._callback_nodes[callback_id] = hash_code
+        return callback_id
+
+    def remove_callback(self, callback_id: int) -> None:
+        hash_code = self._callback_nodes.pop(callback_id, None)
+        callbacks = self.callbacks.get(hash_code, {})
+        callbacks.pop(callback_id, None)
+        if not callbacks:
+            self.callbacks.pop(hash_code, None)
+
+    def notify(self, key: Tuple[int, str], message: int) -> None:
+        """Call the attribute changed callbacks of a plug's node."""
+        callbacks = self.callbacks.get(key[0])
+        node = self.nodes.get(key[0])
+        if not callbacks or node is None:
+            return
+        plug = node[key[1]]
+        for callback in list(callbacks.values()):
+            callback(message, plug, None, None)
+
+    def next_hash_code(self) -> int:
+        return next(self._hash_codes)
+
+    def unique_name(self, name: str) -> str:
+        if name not in self._names:
+            return name
+        base = name.rstrip("0123456789")
+        for index in itertools.count(1):
+            candidate = f"{base}{index}"
+            if candidate not in self._names:
+                return candidate
+        raise RuntimeError("unreachable")
+
+    def rename(self, node: "Node", name: str) -> None:
+        if self._names.get(node._name) == node.hashCode:
+            del self._names[node._name]
+        node._name = self.unique_name(name)
+        if node.hashCode in self.nodes:
+            self._names[node._name] = node.hashCode
+
+    def find(self, name: str) -> "Node":
+        hash_code = self._names.get(name)
+        if hash_code is None:
+            raise ValueError(f"No object matches name: {name}")
+        return self.nodes[hash_code]
+
+    def connect(self, target: Tuple[int, str], source: Tuple[int, str]) -> None:
+        self.disconnect(target)
+        self.connections[target] = source
+        self._node_connections.setdefault(target[0], set()).add(target)
+        self._node_connections.setdefault(source[0], set()).add(target)
+        self.notify(source, MNodeMessage.kConnectionMade)
+        self.notify(
+            target, MNodeMessage.kConnectionMade | MNodeMessage.kIncomingDirection
+        )
+
+    def disconnect(self, target: Tuple[int, str]) -> Optional[Tuple[int, str]]:
+        source = self.connections.get(target)
+        if source is not None:
+            self._keep_value(target, source)
+            del self.connections[target]
+            for hash_code in (target[0], source[0]):
+                self._node_connections.get(hash_code, set()).discard(target)
+            self.notify(source, MNodeMessage.kConnectionBroken)
+            self.notify(
+                target,
+                MNodeMessage.kConnectionBroken | MNodeMessage.kIncomingDirection,
+            )
+        return source
+
+    def _keep_value(self, target: Tuple[int, str], source: Tuple[int, str]) -> None:
+        """Keep the value of a plug losing its input, as Maya does."""
+        node = self.nodes.get(target[0])
+        source_node = self.nodes.get(source[0])
+        if node is None or source_node is None:
+            return
+        if node.has_attr(PLUG_RE.match(target[1])[1]):
+            node[target[1]]._set(source_node[source[1]]._get())
+
+    def node_connections(
+        self, hash_code: int
+    ) -> Dict[Tuple[int, str], Tuple[int, str]]:
+        """Return the connections involving a node, by target plug."""
+        return {
+            target: self.connections[target]
+            for target in self._node_connections.get(hash_code, ())
+        }
+
+    def plug(self, path: str) -> "Plug":
+        node_name, _, attribute = path.partition(".")
+        return self.find(node_name)[attribute]
+
+    def insert(self, node: "Node") -> None:
+        node._name = self.unique_name(node._name)
+        self.nodes[node.hashCode] = node
+        self._names[node._name] = node.hashCode
+
+    def remove(self, node: "Node") -> Dict[Tuple[int, str], Tuple[int, str]]:
+        """Remove a node and its connections, return the removed connections."""
+        connections = self.node_connections(node.hashCode)
+        for target in connections:
+            self.disconnect(target)
+        self._node_connections.pop(node.hashCode, None)
+        del self.nodes[node.hashCode]
+        del self._names[node._name]
+        return connections
+
+    def clear(self) -> None:
+        self.nodes.clear()
+        self.connections.clear()
+        self.selection.clear()
+        self._names.clear()
+        self._node_connections.clear()
+        self.callbacks.clear()
+        self._callback_nodes.clear()
+
+
+SCENE = Scene()
+
+
+class _Attribute:
+    Default: Any = None
+
+    def __init__(self, name: str, default: Any = None, array: bool = False) -> None:
+        self.name = name
+        self.array = array
+        if array:
+            self.default = []
+        else:
+            self.default = self.Default if default is None else default
+
+
+class String(_Attribute):
+    Default = ""
+
+
+class Matrix(_Attribute):
+    Default = (1.0, 0.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0) * 2
+
+
+class Double(_Attribute):
+    Default = 0.0
+
+
+class Double2(_Attribute):
+    Default = (0.0, 0.0)
+
+
+class Double3(_Attribute):
+    Default = (0.0, 0.0, 0.0)
+
+
+class Double4(_Attribute):
+    Default = (0.0, 0.0, 0.0, 1.0)
+
+
+class Boolean(_Attribute):
+    Default = False
+
+
+class Long(_Attribute):
+    Default = 0
+
+
+class Compound(_Attribute):
+    def __init__(self, name: str, children: Sequence[_Attribute] = ()) -> None:
+        super().__init__(name)
+        self.children = list(children)
+
+
+class Node:
+    """A fake ``cmdx.Node``."""
+
+    def __init__(self, node_type: str, name: Optional[str] = None) -> None:
+        self._type = node_type
+        self._name = name or f"{node_type}1"
+        self._hash_code = SCENE.next_hash_code()
+        self._values: Dict[str, Any] = dict(STATIC_ATTRIBUTES.get(node_type, {}))
+        self._dynamic: List[str] = []
+        self._children: Dict[str, List[str]] = {}
+
+    def __repr__(self) -> str:
+        return f"fake_maya.Node({self._name!r})"
+
+    def __hash__(self) -> int:
+        return self._hash_code
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Node) and other.hashCode == self.hashCode
+
+    def __getitem__(self, attribute: str) -> "Plug":
+        plug = None
+        for name, index in PLUG_RE.findall(attribute):
+            plug = Plug(self, name) if plug is None else plug.child(name)
+            if index:
+                plug = plug[int(index)]
+        if plug is None or not plug.exists:
+            raise ValueError(f"{self._name} has no attribute '{attribute}'")
+        return plug
+
+    @property
+    def hashCode(self) -> int:  # pylint: disable = invalid-name
+        return self._hash_code
+
+    @property
+    def exists(self) -> bool:
+        return SCENE.nodes.get(self._hash_code) is self
+
+    def name(self) -> str:
+        return self._name
+
+    def path(self) -> str:
+        return self._name
+
+    def type(self) -> str:
+        return self._type
+
+    def object(self) -> "Node":
+        """Return the node itself, standing in for its MObject."""
+        return self
+
+    def has_attr(self, attribute: str) -> bool:
+        return attribute in self._values
+
+    @command
+    def rename(self, name: str) -> None:
+        SCENE.rename(self, name)
+
+    def _add_attribute(self, attribute: _Attribute) -> None:
+        if attribute.name in self._values:
+            raise RuntimeError(
+                f"{self._name} already has an attribute {attribute.name}"
+            )
+        self._values[attribute.name] = attribute.default
+        self._dynamic.append(attribute.name)
+        if isinstance(attribute, Compound):
+            children = [child.name for child in attribute.children]
+            self._children[attribute.name] = children
+            for child in attribute.children:
+                self._add_attribute(child)
+
+    def _delete_attribute(self, name: str) -> None:
+        for child in self._children.pop(name, ()):
+            self._delete_attribute(child)
+        del self._values[name]
+        self._dynamic.remove(name)
+        for target, source in SCENE.node_connections(self.hashCode).items():
+            for key in (target, source):
+                if key[0] == self.hashCode and PLUG_RE.match(key[1])[1] == name:
+                    SCENE.disconnect(target)
+                    break
+
+
+class Plug:
+    """A fake ``cmdx.Plug``."""
+
+    def __init__(self, node: Node, name: str, index: Optional[int] = None) -> None:
+        self._node = node
+        self._name = name
+        self._index = index
+
+    def __repr__(self) -> str:
+        return f"fake_maya.Plug({self.path()!r})"
+
+    def __str__(self) -> str:
+        return self.path()
+
+    def __getitem__(self, index: int) -> "Plug":
+        return Plug(self._node, self._name, index)
+
+    def child(self, name: str) -> "Plug":
+        return Plug(self._node, name)
+
+    def _key(self) -> Tuple[int, str]:
+        return (self._node.hashCode, self.attribute())
+
+    @property
+    def exists(self) -> bool:
+        return self._name in self._node._values
+
+    @property
+    def writable(self) -> bool:
+        return self._key() not in SCENE.connections
+
+    def node(self) -> Node:
+        return self._node
+
+    def name(self, long: bool = False) -> str:  # pylint: disable = unused-argument
+        return self.attribute()
+
+    def partialName(
+        self, useLongNames: bool = False
+    ) -> str:  # pylint: disable = invalid-name, unused-argument
+        return self.attribute()
+
+    @property
+    def isElement(self) -> bool:  # pylint: disable = invalid-name
+        return self._index is not None
+
+    def array(self) -> "Plug":
+        return Plug(self._node, self._name)
+
+    def plug(self) -> "Plug":
+        """Return the plug itself, standing in for its MPlug."""
+        return self
+
+    def count(self) -> int:
+        return len(self._node._values[self._name])
+
+    def attribute(self) -> str:
+        if self._index is None:
+            return self._name
+        return f"{self._name}[{self._index}]"
+
+    def path(self) -> str:
+        return f"{self._node.path()}.{self.attribute()}"
+
+    def _get(self) -> Any:
+        source = SCENE.connections.get(self._key())
+        if source is not None:
+            # Connected plugs evaluate to their source's value, as in Maya.
+            return SCENE.nodes[source[0]][source[1]]._get()
+        value = self._node._values[self._name]
+        if self._index is None:
+            return value
+        return value[self._index] if self._index < len(value) else 0.0
+
+    def _set(self, value: Any) -> None:
+        if self._index is None:
+            self._node._values[self._name] = value
+        else:
+            values = list(self._node._values[self._name])
+            values.extend([0.0] * (self._index + 1 - len(values)))
+            values[self._index] = value
+            self._node._values[self._name] = values
+        SCENE.notify(self._key(), MNodeMessage.kAttributeSet)
+
+    @command
+    def read(self) -> Any:
+        return self._get()
+
+    @command
+    def write(self, value: Any) -> None:
+        self._set(value)
+
+
+@command
+def create_node(
+    node_type: str,
+    name: Optional[str] = None,
+    parent: Optional[Node] = None,  # pylint: disable = unused-argument
+) -> Node:
+    node = Node(node_type, name)
+    SCENE.insert(node)
+    return node
+
+
+@command
+def addAttr(  # pylint: disable = invalid-name
+    node: Node,
+    longName: str,
+    attributeType: type,
+    **kwargs: Any,  # pylint: disable = unused-argument
+) -> None:
+    node._add_attribute(attributeType(longName))
+
+
+class _BaseModifier:
+    """A fake ``cmdx`` modifier.
+
+    Operations are queued in order and executed by `doIt`.
+    Like ``MDGModifier``, `doIt` can be called several times and only runs
+    the operations queued since the previous call, while `undoIt` reverts
+    everything the modifier did so the next `doIt` redoes all of it.
+    """
+
+    def __init__(self) -> None:
+        self._operations: List[Tuple[Callable[[], Any], Callable[[], Any]]] = []
+        self._done = 0
+
+    def _queue(self, do: Callable[[], Any], undo: Callable[[], Any]) -> None:
+        self._operations.append((do, undo))
+
+    def create_node(
+        self,
+        node_type: str,
+        name: Optional[str] = None,
+        parent: Optional[Node] = None,  # pylint: disable = unused-argument
+    ) -> Node:
+        node = Node(node_type, name)
+        self._queue(lambda: SCENE.insert(node), lambda: SCENE.remove(node))
+        return node
+
+    def add_attr(self, node: Node, attribute: _Attribute) -> None:
+        self._queue(
+            lambda: node._add_attribute(attribute),
+            lambda: node._delete_attribute(attribute.name),
+        )
+
+    def connect(self, source: Plug, target: Plug) -> None:
+        previous: List[Optional[Tuple[int, str]]] = []
+
+        def do() -> None:
+            previous.append(SCENE.connections.get(target._key()))
+            SCENE.connect(target._key(), source._key())
+
+        def undo() -> None:
+            old = previous.pop()
+            if old is None:
+                SCENE.disconnect(target._key())
+            else:
+                SCENE.connect(target._key(), old)
+
+        self._queue(do, undo)
+
+    def disconnect(self, source: Plug, target: Plug) -> None:
+        def do() -> None:
+            if SCENE.connections.get(target._key()) == source._key():
+                SCENE.disconnect(target._key())
+
+        def undo() -> None:
+            SCENE.connect(target._key(), source._key())
+
+        self._queue(do, undo)
+
+    def delete_node(self, node: Node) -> None:
+        connections: List[Dict[Tuple[int, str], Tuple[int, str]]] = []
+
+        def do() -> None:
+            connections.append(SCENE.remove(node))
+
+        def undo() -> None:
+            SCENE.insert(node)
+            for target, source in connections.pop().items():
+                SCENE.connect(target, source)
+
+        self._queue(do, undo)
+
+    def rename_node(self, node: Node, name: str) -> None:
+        previous: List[str] = []
+
+        def do() -> None:
+            previous.append(node._name)
+            SCENE.rename(node, name)
+
+        def undo() -> None:
+            SCENE.rename(node, previous.pop())
+
+        self._queue(do, undo)
+
+    def delete_attr(self, plug: Plug) -> None:
+        """Delete a dynamic attribute, undoing restores it without its connections."""
+        node, name = plug._node, plug._name
+        previous: List[Any] = []
+
+        def do() -> None:
+            previous.append(node._values[name])
+            node._delete_attribute(name)
+
+        def undo() -> None:
+            node._values[name] = previous.pop()
+            node._dynamic.append(name)
+
+        self._queue(do, undo)
+
+    def set_attr(self, plug: Plug, value: Any) -> None:
+        previous: List[Any] = []
+
+        def do() -> None:
+            previous.append(plug._get())
+            plug._set(value)
+
+        def undo() -> None:
+            plug._set(previous.pop())
+
+        self._queue(do, undo)
+
+    def doIt(self) -> None:  # pylint: disable = invalid-name
+        CALLS["doIt"] += 1
+        for do, _ in self._operations[self._done :]:
+            do()
+        self._done = len(self._operations)
+
+    def undoIt(self) -> None:  # pylint: disable = invalid-name
+        CALLS["undoIt"] += 1
+        for _, undo in reversed(self._operations[: self._done]):
+            undo()
+        self._done = 0
+
+
+class DGModifier(_BaseModifier):
+    pass
+
+
+class DagModifier(_BaseModifier):
+    pass
+
+
+@command
+def connectAttr(
+    source: str, target: str, force: bool = False
+) -> None:  # pylint: disable = invalid-name
+    target_plug = SCENE.plug(target)
+    if target_plug._key() in SCENE.connections and not force:
+        raise RuntimeError(f"{target} already has an incoming connection")
+    SCENE.connect(target_plug._key(), SCENE.plug(source)._key())
+
+
+@command
+def disconnectAttr(source: str, target: str) -> None:  # pylint: disable = invalid-name
+    target_plug = SCENE.plug(target)
+    if SCENE.connections.get(target_plug._key()) != SCENE.plug(source)._key():
+        raise RuntimeError(f"{source} is not connected to {target}")
+    SCENE.disconnect(target_plug._key())
+
+
+@command
+def delete(*names: Any) -> None:
+    for name in names:
+        for single_name in [name] if isinstance(name, str) else name:
+            SCENE.remove(SCENE.find(single_name))
+
+
+@command
+def ls(  # pylint: disable = invalid-name
+    *patterns: str,
+    objectsOnly: bool = False,  # pylint: disable = invalid-name
+    **kwargs: Any,  # pylint: disable = unused-argument
+) -> List[str]:
+    """List the nodes, or plugs, matching ``node`` or ``node.attribute`` patterns."""
+    names = []
+    for pattern in patterns:
+        node_pattern, _, attribute = pattern.partition(".")
+        for node in SCENE.nodes.values():
+            if not fnmatch.fnmatchcase(node.name(), node_pattern):
+                continue
+            if not attribute:
+                names.append(node.path())
+            elif node.has_attr(attribute):
+                plug_path = f"{node.path()}.{attribute}"
+                names.append(node.path() if objectsOnly else plug_path)
+    return names
+
+
+@command
+def listConnections(  # pylint: disable = invalid-name
+    name: str,
+    source: bool = True,
+    destination: bool = True,
+    connections: bool = False,
+    plugs: bool = False,
+) -> Optional[List[str]]:
+    """List the connections of a node as Maya does, None if it has none."""
+    hash_code = SCENE.find(name).hashCode
+    result = []
+    for target, source_key in SCENE.node_connections(hash_code).items():
+        if source and target[0] == hash_code:
+            pairs = [(target, source_key)]
+        elif destination and source_key[0] == hash_code:
+            pairs = [(source_key, target)]
+        else:
+            continue
+        for own, other in pairs:
+            if connections:
+                result.append(_plug_path(own))
+            result.append(_plug_path(other) if plugs else SCENE.nodes[other[0]].path())
+    return result or None
+
+
+def _plug_path(key: Tuple[int, str]) -> str:
+    return f"{SCENE.nodes[key[0]].path()}.{key[1]}"
+
+
+def encode(path: str) -> Any:
+    """Return the node, or the plug, with the given path."""
+    if "." in path:
+        return SCENE.plug(path)
+    return SCENE.find(path)
+
+
+@command
+def select(
+    names: Any = None, **kwargs: Any
+) -> None:  # pylint: disable = unused-argument
+    SCENE.selection = list(names or [])
+
+
+@command
+def attributeQuery(  # pylint: disable = invalid-name
+    name: str,
+    node: str,
+    writable: bool = False,
+    exists: bool = False,
+) -> bool:
+    maya_node = SCENE.find(node)
+    if not maya_node.has_attr(name):
+        if exists:
+            return False
+        raise RuntimeError(f"{node} has no attribute {name}")
+    if writable:
+        return maya_node[name].writable
+    return True
+
+
+@command
+def about(batch: bool = False) -> bool:  # pylint: disable = unused-argument
+    return BATCH_MODE
+
+
+@command
+def nodeType(  # pylint: disable = invalid-name
+    name: str,
+    isTypeName: bool = False,
+    inherited: bool = False,  # pylint: disable = unused-argument
+) -> Any:
+    node_type = name if isTypeName else SCENE.find(name).type()
+    if node_type in DAG_TYPES:
+        return ["containerBase", "entity", "dagNode", node_type]
+    return [node_type]
+
+
+class MNodeMessage:
+    """A fake ``OpenMaya.MNodeMessage``, only attribute changed messages are sent."""
+
+    kConnectionMade = 1 << 0
+    kConnectionBroken = 1 << 1
+    kAttributeEval = 1 << 2
+    kAttributeSet = 1 << 3
+    kIncomingDirection = 1 << 11
+
+    @staticmethod
+    @command
+    def addAttributeChangedCallback(  # pylint: disable = invalid-name
+        node: Node, callback: Callable[..., Any]
+    ) -> int:
+        return SCENE.add_callback(node.hashCode, callback)
+
+
+class MDGModifier:
+    """A fake ``OpenMaya.MDGModifier``, only editing multi attribute elements."""
+
+    def __init__(self) -> None:
+        self._modifier = _BaseModifier()
+
+    def removeMultiInstance(
+        self, plug: Plug, breakConnections: bool
+    ) -> None:  # pylint: disable = invalid-name
+        node, name, index = plug._node, plug._name, plug._index
+        previous: List[Any] = []
+
+        def do() -> None:
+            values = list(node._values[name])
+            previous.append(values[index])
+            if breakConnections:
+                SCENE.disconnect(plug._key())
+            node._values[name] = values[:index] + values[index + 1 :]
+
+        def undo() -> None:
+            values = list(node._values[name])
+            values.insert(index, previous.pop())
+            node._values[name] = values
+
+        self._modifier._queue(do, undo)
+
+    def commandToExecute(self, command: str) -> None:  # pylint: disable = invalid-name
+        """Queue a ``setAttr`` of consecutive multi attribute elements."""
+        match = SET_RANGE_RE.fullmatch(command)
+        if match is None:
+            raise ValueError(f"Unsupported command: {command}")
+        plug = SCENE.plug(match["plug"])
+        start, end = int(match["start"]), int(match["end"])
+        values = [float(value) for value in match["values"].split()]
+        if len(values) != end - start + 1:
+            raise ValueError(f"Wrong value count: {command}")
+        node, name = plug._node, plug._name
+        previous: List[Any] = []
+
+        def do() -> None:
+            CALLS["setAttr"] += 1
+            previous.append(node._values[name])
+            for index, value in enumerate(values, start):
+                plug[index]._set(value)
+
+        def undo() -> None:
+            node._values[name] = previous.pop()
+
+        self._modifier._queue(do, undo)
+
+    def doIt(self) -> None:  # pylint: disable = invalid-name
+        self._modifier.doIt()
+
+    def undoIt(self) -> None:  # pylint: disable = invalid-name
+        self._modifier.undoIt()
+
+
+class MMessage:
+    """A fake ``OpenMaya.MMessage``."""
+
+    @staticmethod
+    @command
+    def removeCallback(callback_id: int) -> None:  # pylint: disable = invalid-name
+        SCENE.remove_callback(callback_id)
+
+    @staticmethod
+    @command
+    def removeCallbacks(
+        callback_ids: List[int],
+    ) -> None:  # pylint: disable = invalid-name
+        for callback_id in callback_ids:
+            SCENE.remove_callback(callback_id)
+
+
+def executeDeferred(
+    function: Callable[..., Any], *args: Any
+) -> None:  # pylint: disable = invalid-name
+    """Queue a callable until `process_idle` is called, like Maya's idle queue."""
+    CALLS["executeDeferred"] += 1
+    if BATCH_MODE:
+        function(*args)
+    else:
+        IDLE_QUEUE.append((function, args))
+
+
+def process_idle(max_calls: Optional[int] = None) -> int:
+    """Run the callables queued on the idle queue, return how many ran.
+
+    Callables queued while processing run too, up to `max_calls` if given.
+    """
+    count = 0
+    while IDLE_QUEUE and (max_calls is None or count < max_calls):
+        function, args = IDLE_QUEUE.pop(0)
+        function(*args)
+        count += 1
+    return count
+
+
+def reset() -> None:
+    """Clear the scene, the idle queue and the command counters."""
+    SCENE.clear()
+    IDLE_QUEUE.clear()
+    CALLS.clear()
+
+
+def _module(name: str, members: Dict[str, Any]) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.__dict__.update(members)
+    return module
+
+
+def install() -> None:
+    """Register the fake ``maya`` and ``cmdx`` modules in ``sys.modules``."""
+    this = sys.modules[__name__]
+
+    cmds = _module(
+        "maya.cmds",
+        {
+            name: getattr(this, name)
+            for name in (
+                "about",
+                "attributeQuery",
+                "connectAttr",
+                "delete",
+                "disconnectAttr",
+                "listConnections",
+                "ls",
+                "nodeType",
+                "select",
+            )
+        },
+    )
+    utils = _module("maya.utils", {"executeDeferred": executeDeferred})
+    open_maya = _module(
+        "maya.api.OpenMaya",
+        {
+            "MDGModifier": MDGModifier,
+            "MMessage": MMessage,
+            "MNodeMessage": MNodeMessage,
+            "MPlug": Plug,
+        },
+    )
+    api = _module("maya.api", {"OpenMaya": open_maya})
+    api.__path__ = []  # type: ignore
+    maya = _module("maya", {"api": api, "cmds": cmds, "utils": utils})
+    maya.__path__ = []  # type: ignore
+
+    cmdx = _module(
+        "cmdx",
+        {
+            name: getattr(this, name)
+            for name in (
+                "Boolean",
+                "Compound",
+                "DGModifier",
+                "DagModifier",
+                "Double",
+                "Double2",
+                "Double3",
+                "Double4",
+                "Long",
+                "Matrix",
+                "Node",
+                "Plug",
+                "String",
+                "addAttr",
+                "create_node",
+                "encode",
+            )
+        },
+    )
+
+    sys.modules.update(
+        {
+            "maya": maya,
+            "maya.api": api,
+            "maya.api.OpenMaya": open_maya,
+            "maya.cmds": cmds,
+            "maya.utils": utils,
+            "cmdx": cmdx,
+        }
+    )
@@ -0,0 +1,100 @@
+"""Build and tear down rigs repeatedly and check nothing accumulates.
+
+After each round the OMState registries must be empty, no signal subscription
+may be left and the deleted OM objects must be freed, a subscription left on a
+signal would keep its OM object alive.
+Traced memory must stay flat from the second round on, the first round warms
+up the caches.
+
+    python benchmarks/leak_check.py 10000 5
+"""
+from __future__ import annotations
+
+import gc
+import sys
+import tracemalloc
+import weakref
+from typing import List, Tuple
+
+from common import build_chain, fake_maya
+
+from orodruin.core import State
+from orodruin_maya.core import OMState
+
+MEMORY_TOLERANCE = 1.05
+"""How much traced memory may grow between rounds, as a ratio."""
+
+
+def run_round(
+    state: State, om_state: OMState, node_count: int
+) -> Tuple[List[weakref.ref], int]:
+    """Build and delete a chain.
+
+    Return weak references to some of its OM objects and how many subscriptions
+    they held before being deleted.
+    """
+    nodes, ports = build_chain(state, node_count)
+    fake_maya.process_idle()
+    subscriptions = om_state.subscription_count()
+
+    om_objects = [
+        weakref.ref(om_state.get_om_node(nodes[0])),
+        weakref.ref(om_state.get_om_node(nodes[-1])),
+        weakref.ref(om_state.get_om_port(ports[0])),
+        weakref.ref(om_state.get_om_port(ports[-1])),
+    ]
+
+    with om_state.batch():
+        for node in nodes:
+            state.delete_node(node)
+    return om_objects, subscriptions
+
+
+def main(node_count: int, rounds: int) -> int:
+    fake_maya.reset()
+    state = State()
+    om_state = OMState(state)
+
+    failures = []
+    memory = []
+    tracemalloc.start()
+    for round_index in range(rounds):
+        om_objects, held = run_round(state, om_state, node_count)
+        gc.collect()
+        memory.append(tracemalloc.get_traced_memory()[0])
+
+        subscriptions = om_state.subscription_count()
+        alive = sum(ref() is not None for ref in om_objects)
+        print(
+            f"round {round_index}: {memory[-1] / 1024:.0f} KiB traced, "
+            f"{held} subscriptions held then {subscriptions} left, "
+            f"{alive} OM objects alive, "
+            f"{len(fake_maya.SCENE.nodes)} maya nodes"
+        )
+
+        if subscriptions:
+            failures.append(f"round {round_index}: {subscriptions} subscriptions left")
+        if alive:
+            failures.append(f"round {round_index}: {alive} deleted OM objects alive")
+        if fake_maya.SCENE.nodes:
+            failures.append(f"round {round_index}: maya nodes left")
+    tracemalloc.stop()
+
+    if rounds > 2 and memory[-1] > memory[1] * MEMORY_TOLERANCE:
+        failures.append(
+            f"traced memory grew from {memory[1] / 1024:.0f} KiB "
+            f"to {memory[-1] / 1024:.0f} KiB"
+        )
+
+    for failure in failures:
+        print(f"LEAK {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(
+        main(
+            int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+            int(sys.argv[2]) if len(sys.argv) > 2 else 5,
+        )
+    )
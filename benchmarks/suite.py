@@ -0,0 +1,214 @@
+"""Benchmark the maya bridge on synthetic rigs and compare runs to a baseline.
+
+A real orodruin State is driven through OMState on the fake maya backend.
+Each operation is run for every rig size and reports its wall time, the maya
+commands it issued and its peak memory.
+
+    python benchmarks/suite.py                  # run and print the results
+    python benchmarks/suite.py --save           # run and save them as the baseline
+    python benchmarks/suite.py --check          # run, exit with 1 on regressions
+
+Maya command counts are deterministic and must not grow, wall time and peak
+memory may grow up to the given tolerance, as a ratio of the baseline.
+Timings shorter than MIN_SECONDS are too noisy to be compared.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from common import fake_maya
+
+from orodruin.core import Port, SerializationType, State
+from orodruin.core.port.port import PortDirection
+from orodruin_maya.core import OMState
+from orodruin_maya.core.serializer import MayaSerializer
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+SIZES = (100, 1000, 10000)
+PORTS_PER_NODE = 4
+MIN_SECONDS = 0.05
+
+Results = Dict[str, Dict[str, Dict[str, Any]]]
+"""Measures per rig size and operation."""
+
+
+class Rig:
+    """A synthetic rig built one operation at a time."""
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.state = State()
+        self.om_state = OMState(self.state)
+        self.nodes: List[Any] = []
+        self.ports: List[List[Port]] = []
+
+    def create_nodes(self) -> None:
+        for index in range(self.size):
+            self.nodes.append(self.state.create_node("synthetic", f"node{index}"))
+
+    def create_ports(self) -> None:
+        for node in self.nodes:
+            inputs = [
+                self.state.create_port(
+                    f"input{index}", PortDirection.input, float, node
+                )
+                for index in range(PORTS_PER_NODE - 1)
+            ]
+            output = self.state.create_port("output", PortDirection.output, float, node)
+            self.ports.append([*inputs, output])
+
+    def connect(self) -> None:
+        for upstream, downstream in zip(self.ports, self.ports[1:]):
+            self.state.connect(upstream[-1], downstream[0])
+
+    def set_values(self) -> None:
+        for node_ports in self.ports:
+            for value, port in enumerate(node_ports[1:]):
+                port.set(float(value))
+
+    def serialize(self) -> None:
+        serializer = MayaSerializer(self.om_state)
+        for node_ports in self.ports:
+            for port in node_ports:
+                serializer.serialize_port(port, SerializationType.instance)
+
+    def delete(self) -> None:
+        for node in self.nodes:
+            self.state.delete_node(node)
+
+
+OPERATIONS: Dict[str, Callable[[Rig], None]] = {
+    "create_nodes": Rig.create_nodes,
+    "create_ports": Rig.create_ports,
+    "connect": Rig.connect,
+    "set_values": Rig.set_values,
+    "serialize": Rig.serialize,
+    "delete": Rig.delete,
+}
+
+
+def run_rig(size: int, trace_memory: bool) -> Dict[str, Dict[str, Any]]:
+    """Run every operation on a rig of the given size, in order."""
+    fake_maya.reset()
+    rig = Rig(size)
+    results: Dict[str, Dict[str, Any]] = {}
+
+    for name, operation in OPERATIONS.items():
+        gc.collect()
+        fake_maya.CALLS.clear()
+        if trace_memory:
+            tracemalloc.start()
+
+        start = time.perf_counter()
+        operation(rig)
+        fake_maya.process_idle()
+        elapsed = time.perf_counter() - start
+
+        result: Dict[str, Any] = {
+            "seconds": elapsed,
+            "calls": dict(sorted(fake_maya.CALLS.items())),
+        }
+        if trace_memory:
+            result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        results[name] = result
+
+    return results
+
+
+def run_suite(sizes: List[int]) -> Results:
+    """Run the operations for every size.
+
+    Memory is traced in a second pass so its overhead stays out of the timings.
+    """
+    results: Results = {}
+    for size in sizes:
+        timed = run_rig(size, trace_memory=False)
+        traced = run_rig(size, trace_memory=True)
+        for name, result in timed.items():
+            result["peak_bytes"] = traced[name]["peak_bytes"]
+        results[str(size)] = timed
+    return results
+
+
+def print_results(results: Results) -> None:
+    print(f"{'size':>6} {'operation':<13} {'seconds':>9} {'peak KiB':>10}  maya calls")
+    for size, operations in results.items():
+        for name, result in operations.items():
+            calls = ", ".join(f"{k}={v}" for k, v in result["calls"].items())
+            print(
+                f"{size:>6} {name:<13} {result['seconds']:>9.4f} "
+                f"{result['peak_bytes'] / 1024:>10.0f}  {calls or '-'}"
+            )
+
+
+def compare(results: Results, baseline: Results, tolerance: float) -> List[str]:
+    """Return a description of every regression from the baseline."""
+    regressions = []
+    for size, operations in results.items():
+        for name, result in operations.items():
+            reference = baseline.get(size, {}).get(name)
+            if reference is None:
+                continue
+            label = f"{size} {name}"
+
+            for command, count in result["calls"].items():
+                expected = reference["calls"].get(command, 0)
+                if count > expected:
+                    regressions.append(
+                        f"{label}: {command} {expected} -> {count} calls"
+                    )
+
+            for measure in ("seconds", "peak_bytes"):
+                limit = reference[measure] * tolerance
+                if measure == "seconds":
+                    limit = max(limit, MIN_SECONDS)
+                if result[measure] > limit:
+                    regressions.append(
+                        f"{label}: {measure} {reference[measure]:.4g} -> "
+                        f"{result[measure]:.4g}, over x{tolerance}"
+                    )
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="save as the baseline")
+    parser.add_argument("--check", action="store_true", help="compare to the baseline")
+    parser.add_argument("--tolerance", type=float, default=1.5)
+    args = parser.parse_args()
+
+    results = run_suite(args.sizes)
+    print_results(results)
+
+    if args.save:
+        args.baseline.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print(f"Saved the baseline to {args.baseline}")
+
+    if args.check:
+        if not args.baseline.exists():
+            print(f"No baseline at {args.baseline}, run with --save first.")
+            return 1
+        regressions = compare(
+            results, json.loads(args.baseline.read_text()), args.tolerance
+        )
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print("No regression from the baseline.")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,18 @@
-from .core import OMGraph, OMGroupNode, OMNode, OMPort, OMState
-from .utils import reload_orodruin
+import importlib
+from typing import TYPE_CHECKING, Any, List
+
+if TYPE_CHECKING:
+    from .core import OMGraph, OMGroupNode, OMNode, OMPort, OMState
+    from .utils import reload_orodruin
+
+_LAZY_ATTRIBUTES = {
+    "OMGraph": ".core",
+    "OMGroupNode": ".core",
+    "OMNode": ".core",
+    "OMPort": ".core",
+    "OMState": ".core",
+    "reload_orodruin": ".utils",
+}
 
 __all__ = [
     "OMGraph",
@@ -9,3 +22,18 @@ __all__ = [
     "OMState",
     "reload_orodruin",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    """Import the public names on first access to keep the package cheap to import."""
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted(set(globals()) | set(__all__))
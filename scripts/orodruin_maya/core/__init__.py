@@ -1,6 +1,19 @@
 from .graph import OMGraph
+from .modifier import OMModifier
 from .node import OMGroupNode, OMNode
 from .port import OMPort
+from .profiler import OMProfiler
+from .resync import ResyncPlan
+from .scheduler import OMScheduler
 from .state import OMState
 
-__all__ = ["OMGraph", "OMGroupNode", "OMNode", "OMPort"]
+__all__ = [
+    "OMGraph",
+    "OMGroupNode",
+    "OMModifier",
+    "OMNode",
+    "OMPort",
+    "OMProfiler",
+    "OMScheduler",
+    "ResyncPlan",
+]
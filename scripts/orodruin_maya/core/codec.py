@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import itertools
+import logging
+import sys
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import attr
+from orodruin.core.port.port import PortType
+
+logger = logging.getLogger(__name__)
+
+_chain = itertools.chain.from_iterable
+
+
+@attr.s(frozen=True, slots=True)
+class ValueCodec:
+    """Convert batches of vector or matrix values between orodruin and maya.
+
+    Values are converted to flat tuples of floats, which maya sets on
+    compound numeric and matrix attributes, and which serialize to plain data.
+    Matrices may be given row by row or flat.
+
+    A batch is flattened in a single pass over all of its floats. Batches of
+    numpy arrays are stacked with numpy instead; numpy is slower than python
+    on batches of python sequences. It is never imported here, values can only
+    be numpy arrays once something else has imported it.
+    """
+
+    size: int = attr.ib()
+
+    def to_maya(self, values: Sequence[Any]) -> List[Tuple[float, ...]]:
+        """Return the maya data of a batch of orodruin values."""
+        return self._flatten(values)
+
+    def from_maya(self, values: Sequence[Any]) -> List[Tuple[float, ...]]:
+        """Return the plain data of a batch of values read from maya."""
+        return self._flatten(values)
+
+    def _flatten(self, values: Sequence[Any]) -> List[Tuple[float, ...]]:
+        if not values:
+            return []
+        numpy = sys.modules.get("numpy")
+        if numpy is not None and isinstance(values[0], numpy.ndarray):
+            try:
+                array = numpy.stack(values).astype(numpy.float64, copy=False)
+                return list(map(tuple, array.reshape(-1, self.size).tolist()))
+            except ValueError:
+                logger.debug("Converting %s arrays one by one.", len(values))
+                return [self._flatten_value(value) for value in values]
+
+        items = _chain(values)
+        if len(values[0]) != self.size:
+            items = _chain(items)
+        try:
+            floats = list(map(float, items))
+        except TypeError:
+            floats = []
+        if len(floats) != len(values) * self.size:
+            # Rows and flat values are mixed in the batch.
+            return [self._flatten_value(value) for value in values]
+        return list(zip(*[iter(floats)] * self.size))
+
+    def _flatten_value(self, value: Any) -> Tuple[float, ...]:
+        items = tuple(value)
+        if len(items) != self.size:
+            items = tuple(_chain(items))
+        return tuple(map(float, items))
+
+
+_CODECS: Dict[str, ValueCodec] = {
+    "Matrix4": ValueCodec(16),
+    "Vector2": ValueCodec(2),
+    "Vector3": ValueCodec(3),
+    "Quaternion": ValueCodec(4),
+}
+
+
+def find_codec(port_type: PortType) -> Optional[ValueCodec]:
+    """Return the codec of a port type, None if its values need no conversion."""
+    return _CODECS.get(getattr(port_type, "__name__", ""))
+
+
+def values_to_maya(port_type: PortType, values: Sequence[Any]) -> Sequence[Any]:
+    """Return the maya data of a batch of values of the given port type."""
+    codec = find_codec(port_type)
+    return values if codec is None else codec.to_maya(values)
+
+
+def values_from_maya(port_type: PortType, values: Sequence[Any]) -> Sequence[Any]:
+    """Return the plain data of a batch of maya values of the given port type."""
+    codec = find_codec(port_type)
+    return values if codec is None else codec.from_maya(values)
+
+
+__all__ = [
+    "ValueCodec",
+    "find_codec",
+    "values_from_maya",
+    "values_to_maya",
+]
@@ -1,20 +1,19 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Union
+from typing import TYPE_CHECKING, List, Tuple, Union
 from uuid import UUID
 
 import attr
-from maya import cmds
 from orodruin.core.connection import Connection, ConnectionLike
-from orodruin.core.port.port import PortDirection
 
 if TYPE_CHECKING:
 
+    from .modifier import PlugGetter
     from .port import OMPort, OMPortLike
     from .state import OMState
 
 
-@attr.s()
+@attr.s(slots=True)
 class OMConnection:
     """Orodruin Maya Connection handling the events from the Orodruin Connection."""
 
@@ -41,43 +40,71 @@ class OMConnection:
         """Return the UUID of the connection"""
         return self._uuid
 
+    def source_id(self) -> UUID:
+        return self._source_id
+
+    def target_id(self) -> UUID:
+        return self._target_id
+
     def source(self) -> OMPort:
         return self._om_state.get_om_port(self._source_id)
 
     def target(self) -> OMPort:
         return self._om_state.get_om_port(self._target_id)
 
-    def build(self) -> None:
-        """Create the maya connection"""
-        source_maya_attr = self._maya_attribute_from_port(self._source_id)
-        target_maya_attr = self._maya_attribute_from_port(self._target_id)
+    def maya_pairs(self) -> List[Tuple[OMPort, OMPort]]:
+        """Return the source and target ports whose maya attributes get connected.
 
-        cmds.connectAttr(source_maya_attr, target_maya_attr, force=True)
+        Ports of virtual nodes are resolved to the ports they are connected to,
+        there is no pair when no port with an attribute drives the source.
+        """
+        source = self._om_state.resolve_source(self._source_id)
+        if source.is_virtual():
+            return []
+        return [
+            (source, target)
+            for target in self._om_state.resolve_targets(self._target_id)
+        ]
 
-    def delete(self) -> None:
-        """Delete the maya connection."""
-        source_maya_attr = self._maya_attribute_from_port(self._source_id)
-        target_maya_attr = self._maya_attribute_from_port(self._target_id)
-        cmds.disconnectAttr(source_maya_attr, target_maya_attr)
+    def build(self) -> None:
+        """Create the maya connection.
+
+        When the source resolves to a virtual port, its value is written to the
+        targets instead.
+        """
+        source = self._om_state.resolve_source(self._source_id)
+        targets = self._om_state.resolve_targets(self._target_id)
+        if source.is_virtual():
+            self._om_state.write_virtual_value(source.uuid(), targets)
+            return
+
+        source_maya_attr = self._maya_attribute_from_port(source)
+        with self._om_state.batch(deferred=True) as modifier:
+            for target in targets:
+                target_maya_attr = self._maya_attribute_from_port(target)
+                modifier.connect(source_maya_attr, target_maya_attr)
+                target.clear_writable()
 
-    def _maya_attribute_from_port(self, om_port: OMPortLike) -> str:
-        """Return the maya attribute name from an OMPort"""
+    def delete(self) -> None:
+        """Delete the maya connection.
+
+        The disconnection is skipped if the node of either port gets deleted
+        along with the connection.
+        """
+        with self._om_state.batch(deferred=True) as modifier:
+            for source, target in self.maya_pairs():
+                modifier.disconnect(
+                    self._maya_attribute_from_port(source),
+                    self._maya_attribute_from_port(target),
+                    (source.maya_node(), target.maya_node()),
+                )
+                target.clear_writable()
+
+    def _maya_attribute_from_port(self, om_port: OMPortLike) -> PlugGetter:
+        """Return a callable resolving the maya attribute of an OMPort"""
         om_port = self._om_state.get_om_port(om_port)
-
-        port = self._om_state.state().get_port(om_port.uuid())
-        node = port.node()
-        om_node = self._om_state.get_om_node(node)
-        maya_node = (
-            om_node.input_node()
-            if port.direction() is PortDirection.input
-            else om_node.output_node()
-        )
-        maya_attr = om_node.maya_attribute_map().get(
-            port.name(),
-            port.name(),
-        )
-
-        return f"{maya_node.path()}.{maya_attr}"
+        om_port.materialize()
+        return om_port.maya_attribute_getter()
 
 
 OMConnectionLike = Union[OMConnection, ConnectionLike]
@@ -14,7 +14,7 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
-@attr.s
+@attr.s(slots=True)
 class OMGraph:
     """Orodruin Maya Graph handling the events from the Orodruin Graph."""
 
@@ -0,0 +1,245 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import tempfile
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from importlib.util import module_from_spec, spec_from_file_location
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Type
+
+import attr
+from orodruin.core.library import LibraryManager
+
+if TYPE_CHECKING:
+    from .node import OMNode
+
+logger = logging.getLogger(__name__)
+
+TARGET_NAME = "maya"
+INDEX_CACHE_DIR = Path(tempfile.gettempdir()) / "orodruin_maya"
+MISS_TTL = 5.0
+"""Seconds during which a node type found missing isn't looked for again."""
+
+LibraryIndex = Dict[Tuple[str, str], Path]
+
+
+@attr.s(frozen=True)
+class _CachedClass:
+    path: Path = attr.ib()
+    mtime: float = attr.ib()
+    om_node_class: Optional[Type[OMNode]] = attr.ib()
+
+
+_NODE_CLASSES: Dict[Tuple[str, str], _CachedClass] = {}
+
+_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="orodruin_maya")
+_INDEX: Optional[Future] = None
+_INDEXED_LIBRARIES: Tuple[str, ...] = ()
+_MISSES: Dict[Tuple[str, str], Tuple[float, str]] = {}
+"""When a node type was last found missing, and the stamp of its library's folder."""
+
+
+def warm_up_library_index() -> Future:
+    """Start indexing the maya implementations of every registered library.
+
+    The index is built in the background and saved to disk under a hash of the
+    libraries' maya folders, later sessions load it instead of scanning them.
+    """
+    global _INDEX, _INDEXED_LIBRARIES  # pylint: disable = global-statement
+
+    targets = _library_targets()
+    library_names = tuple(name for name, _ in targets)
+
+    if _INDEX is None or library_names != _INDEXED_LIBRARIES:
+        _INDEX = _EXECUTOR.submit(_load_library_index, targets)
+        _INDEXED_LIBRARIES = library_names
+
+    return _INDEX
+
+
+def library_index() -> LibraryIndex:
+    """Return the index of the maya implementations, waiting for it if needed."""
+    library_names = tuple(library.name() for library in LibraryManager.libraries())
+    if _INDEX is None or library_names != _INDEXED_LIBRARIES:
+        warm_up_library_index()
+    return _INDEX.result()
+
+
+def find_om_node_class(library_name: str, node_type: str) -> Optional[Type[OMNode]]:
+    """Return the OMNode class implementing a library node type in maya.
+
+    Implementations are looked up in the library index, their classes are cached
+    per library and node type without touching the filesystem again, see
+    `reload_node_classes` to pick up edited implementations. Node types missing
+    from the index are looked for in their library's maya folder again, see
+    `_find_unindexed`.
+    """
+    key = (library_name, node_type)
+    cached = _NODE_CLASSES.get(key)
+    if cached is not None:
+        return cached.om_node_class
+
+    python_node_path = library_index().get(key) or _find_unindexed(key)
+    if not python_node_path:
+        return None
+
+    try:
+        mtime = python_node_path.stat().st_mtime
+    except FileNotFoundError:
+        _NODE_CLASSES.pop(key, None)
+        return None
+
+    om_node_class = _load_om_node_class(python_node_path)
+    _NODE_CLASSES[key] = _CachedClass(python_node_path, mtime, om_node_class)
+
+    return om_node_class
+
+
+def reload_node_classes() -> None:
+    """Forget the cached OMNode classes whose implementation file was modified.
+
+    Their file is executed again on next use. Node types found missing are
+    looked for again too.
+    """
+    for key, cached in list(_NODE_CLASSES.items()):
+        try:
+            modified = cached.path.stat().st_mtime != cached.mtime
+        except FileNotFoundError:
+            modified = True
+        if modified:
+            logger.debug("Reloading the maya implementation of %s.", cached.path)
+            del _NODE_CLASSES[key]
+    _MISSES.clear()
+
+
+def clear_node_class_cache() -> None:
+    """Forget the library index and every cached OMNode class.
+
+    They get built again on next use, picking up added or removed implementations.
+    """
+    global _INDEX  # pylint: disable = global-statement
+    _NODE_CLASSES.clear()
+    _MISSES.clear()
+    _INDEX = None
+
+
+def _find_unindexed(key: Tuple[str, str]) -> Optional[Path]:
+    """Scan a library's maya folder for an implementation missing from the index.
+
+    The index is built once per session, implementations added since are only
+    found this way and then added to it. A node type found missing isn't looked
+    for again during `MISS_TTL`, then only if files were added to the folder.
+    """
+    now = time.monotonic()
+    miss = _MISSES.get(key)
+    if miss is not None and now - miss[0] < MISS_TTL:
+        return None
+
+    library_name, node_type = key
+    target = next(
+        (target for target in _library_targets() if target[0] == library_name), None
+    )
+    if target is None:
+        return None
+
+    folder_stamp = _folders_stamp([target])
+    if miss is None or miss[1] != folder_stamp:
+        python_node_path = _scan_target(*target).get(key)
+    else:
+        python_node_path = None
+    if python_node_path is None:
+        _MISSES[key] = (now, folder_stamp)
+        return None
+
+    _MISSES.pop(key, None)
+    library_index()[key] = python_node_path
+    logger.debug("Indexed the maya implementation of %s.", node_type)
+    return python_node_path
+
+
+def _library_targets() -> List[Tuple[str, Path]]:
+    """Return the name and maya folder of every registered library."""
+    return [
+        (library.name(), Path(library.path()) / TARGET_NAME)
+        for library in LibraryManager.libraries()
+    ]
+
+
+def _load_om_node_class(python_node_path: Path) -> Optional[Type[OMNode]]:
+    """Execute an implementation file and return the class named after it."""
+    spec = spec_from_file_location(python_node_path.stem, python_node_path)
+    mod = module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return getattr(mod, python_node_path.stem)
+
+
+def _load_library_index(targets: List[Tuple[str, Path]]) -> LibraryIndex:
+    """Load the index of the given maya folders from disk, or scan them."""
+    index_path = INDEX_CACHE_DIR / f"library_index_{_folders_stamp(targets)}.json"
+
+    if index_path.exists():
+        try:
+            data = json.loads(index_path.read_text())
+            logger.debug("Loaded the library index from %s.", index_path)
+            return {
+                (library_name, node_type): Path(path)
+                for library_name, node_type, path in data
+            }
+        except (OSError, ValueError):
+            logger.warning("Invalid library index %s, rebuilding it.", index_path)
+
+    index: LibraryIndex = {}
+    with ThreadPoolExecutor() as pool:
+        for scanned in pool.map(lambda target: _scan_target(*target), targets):
+            for key, path in scanned.items():
+                index.setdefault(key, path)
+
+    try:
+        INDEX_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        data = [[*key, str(path)] for key, path in index.items()]
+        index_path.write_text(json.dumps(data))
+    except OSError:
+        logger.warning("Could not save the library index to %s.", index_path)
+
+    logger.debug("Indexed %s maya implementations.", len(index))
+    return index
+
+
+def _scan_target(library_name: str, target_path: Path) -> LibraryIndex:
+    """Return the maya implementations found in a library's maya folder."""
+    if not target_path.is_dir():
+        return {}
+    return {
+        (library_name, path.stem): path
+        for path in sorted(target_path.glob("*.py"))
+        if not path.stem.startswith("__")
+    }
+
+
+def _folders_stamp(targets: List[Tuple[str, Path]]) -> str:
+    """Return a stamp of the maya folders paths and modification times.
+
+    The stamp changes when files are added to, removed from or renamed in the
+    folders, not when the content of their files does.
+    """
+    digest = hashlib.sha1()
+    for library_name, target_path in targets:
+        try:
+            mtime = target_path.stat().st_mtime_ns
+        except OSError:
+            mtime = 0
+        digest.update(f"{library_name}|{target_path}|{mtime};".encode())
+    return digest.hexdigest()
+
+
+__all__ = [
+    "LibraryIndex",
+    "clear_node_class_cache",
+    "find_om_node_class",
+    "library_index",
+    "reload_node_classes",
+    "warm_up_library_index",
+]
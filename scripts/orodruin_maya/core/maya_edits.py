@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Any, Dict
+from uuid import UUID
+
+import attr
+from maya import cmds, utils
+from maya.api import OpenMaya as om
+
+from .port import leaf_attribute_name
+from .profiler import profiled
+
+if TYPE_CHECKING:
+    from .state import OMState
+
+logger = logging.getLogger(__name__)
+
+_DIRTYING_MESSAGES = (
+    om.MNodeMessage.kAttributeSet
+    | om.MNodeMessage.kConnectionMade
+    | om.MNodeMessage.kConnectionBroken
+)
+"""Attribute changed messages after which the kept value of a port is stale."""
+
+
+@attr.s
+class MayaEditReceiver:
+    """Handle the attribute changed callbacks of the maya nodes of an OMState.
+
+    The kept value of a port whose attribute is edited in maya is forgotten.
+    When receiving edits, the edited attributes also set their orodruin port
+    once maya is idle, see `receive_maya_edits`.
+    """
+
+    _om_state: OMState = attr.ib()
+    _receive: bool = attr.ib(default=True)
+
+    _edits: Dict[UUID, None] = attr.ib(init=False, factory=dict)
+    _scheduled: bool = attr.ib(init=False, default=False)
+    _interactive: bool = attr.ib(init=False, factory=lambda: not cmds.about(batch=True))
+
+    def on_attribute_changed(
+        self,
+        hash_code: int,
+        message: int,
+        plug: om.MPlug,
+        other_plug: om.MPlug,  # pylint: disable = unused-argument
+        client_data: Any = None,  # pylint: disable = unused-argument
+    ) -> None:
+        """Forget the kept value of a port whose attribute is edited in maya,
+        and queue the edit to be received by its orodruin port.
+        """
+        if not message & _DIRTYING_MESSAGES:
+            return
+        om_port = self._om_state.om_port_from_attribute(
+            hash_code, leaf_attribute_name(plug.partialName(useLongNames=True))
+        )
+        if om_port is None and plug.isElement:
+            # An element of the multi attribute of an array port.
+            om_port = self._om_state.om_port_from_attribute(
+                hash_code, plug.array().partialName(useLongNames=True)
+            )
+        if om_port is None:
+            return
+        if not message & om.MNodeMessage.kAttributeSet:
+            om_port.clear_writable()
+            return
+
+        om_port.mark_dirty()
+        if self._receive and not self._om_state.is_applying():
+            # The edit is newer than any value queued for the attribute.
+            self._om_state.discard_write(om_port.uuid())
+            self._edits[om_port.uuid()] = None
+            if not self._interactive:
+                self.receive_maya_edits()
+            elif not self._scheduled:
+                self._scheduled = True
+                utils.executeDeferred(self.receive_maya_edits)
+
+    def discard(self, port_id: UUID) -> None:
+        """Drop the edit of a port not received yet, e.g. once a value is queued."""
+        self._edits.pop(port_id, None)
+
+    @profiled
+    def receive_maya_edits(self) -> None:
+        """Set the orodruin ports whose attribute was edited in maya.
+
+        Edits are collected until maya is idle, so dragging a value in the
+        channel box sets each port once per idle tick, to its latest value.
+        """
+        self._scheduled = False
+        edits, self._edits = self._edits, {}
+        self._om_state.serializer().clear()
+        state = self._om_state.state()
+        om_ports = self._om_state.om_ports()
+        for port_id in edits:
+            om_port = om_ports.get(port_id)
+            if om_port is not None and om_port.maya_node().exists:
+                om_port.receive_maya_value(state.get_port(port_id))
+
+
+__all__ = ["MayaEditReceiver"]
@@ -0,0 +1,338 @@
+from __future__ import annotations
+
+import logging
+import math
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+
+import attr
+import cmdx
+from maya import cmds
+from maya.api import OpenMaya as om
+
+if TYPE_CHECKING:
+    from .profiler import OMProfiler
+
+logger = logging.getLogger(__name__)
+
+PlugGetter = Callable[[], Optional[cmdx.Plug]]
+"""A callable resolving a maya plug once the attributes it needs exist."""
+
+_DAG_NODE_TYPES: Dict[str, bool] = {}
+
+
+def is_dag_node_type(node_type: str) -> bool:
+    """Return True if the maya node type is a DAG node type."""
+    if node_type not in _DAG_NODE_TYPES:
+        inherited = cmds.nodeType(node_type, isTypeName=True, inherited=True) or []
+        _DAG_NODE_TYPES[node_type] = "dagNode" in inherited
+    return _DAG_NODE_TYPES[node_type]
+
+
+@attr.s
+class OMModifier:
+    """Collect the maya edits of a burst of orodruin events and apply them at once.
+
+    Nodes are created straight away in the underlying cmdx modifiers so they can be
+    referenced before the modifier is applied.
+    Attributes, connections, deletions and values are queued and resolved,
+    in that order, when `doIt` is called. Arrays are written along with the
+    values, see `set_array`.
+    Every edit is counted on the given profiler, if any.
+    """
+
+    _profiler: Optional[OMProfiler] = attr.ib(default=None)
+
+    _dg_modifier: cmdx.DGModifier = attr.ib(init=False, factory=cmdx.DGModifier)
+    _dag_modifier: cmdx.DagModifier = attr.ib(init=False, factory=cmdx.DagModifier)
+
+    _attributes: List[Tuple[cmdx.Node, Dict[str, Any]]] = attr.ib(
+        init=False, factory=list
+    )
+    _pending_attributes: Set[Tuple[int, str]] = attr.ib(init=False, factory=set)
+    _edited_hash_codes: Set[int] = attr.ib(init=False, factory=set)
+    _edits: List[Callable[[cmdx.DagModifier], None]] = attr.ib(init=False, factory=list)
+    _deleted_nodes: List[cmdx.Node] = attr.ib(init=False, factory=list)
+    _deleted_hash_codes: Set[int] = attr.ib(init=False, factory=set)
+    _values: List[Tuple[PlugGetter, Any]] = attr.ib(init=False, factory=list)
+    _arrays: List[Tuple[PlugGetter, Sequence[Any], Optional[Sequence[Any]]]] = attr.ib(
+        init=False, factory=list
+    )
+    _array_modifier: om.MDGModifier = attr.ib(init=False, factory=om.MDGModifier)
+
+    _created_nodes: int = attr.ib(init=False, default=0)
+    _applied: bool = attr.ib(init=False, default=False)
+
+    def __len__(self) -> int:
+        return (
+            self._created_nodes
+            + len(self._attributes)
+            + len(self._edits)
+            + len(self._deleted_nodes)
+            + len(self._values)
+            + len(self._arrays)
+        )
+
+    def create_node(
+        self,
+        node_type: str,
+        name: Optional[str] = None,
+        parent: Optional[cmdx.Node] = None,
+    ) -> cmdx.Node:
+        """Create a maya node, it will be added to the scene by `doIt`."""
+        self._count("create_node")
+        self._created_nodes += 1
+        if parent is not None or is_dag_node_type(node_type):
+            node = self._dag_modifier.create_node(node_type, name=name, parent=parent)
+        else:
+            node = self._dg_modifier.create_node(node_type, name=name)
+        self._edited_hash_codes.add(node.hashCode)
+        return node
+
+    def edits_node(self, node: cmdx.Node) -> bool:
+        """Return True if the node is created or gets attributes by this modifier."""
+        return node.hashCode in self._edited_hash_codes
+
+    def has_attr(self, node: cmdx.Node, attribute: str) -> bool:
+        """Return True if the node has or will have the given attribute."""
+        return (node.hashCode, attribute) in self._pending_attributes or (
+            node.has_attr(attribute)
+        )
+
+    def add_attr(self, node: cmdx.Node, kwargs: Dict[str, Any]) -> None:
+        """Queue the creation of an attribute described by addAttr kwargs.
+
+        A child attribute is created along with its parent compound attribute
+        when both are added by this modifier, see `add_attributes`.
+        """
+        self._count("add_attr")
+        self._pending_attributes.add((node.hashCode, kwargs["longName"]))
+        self._edited_hash_codes.add(node.hashCode)
+        self._attributes.append((node, kwargs))
+
+    def add_attributes(self, node: cmdx.Node, kwargs: List[Dict[str, Any]]) -> None:
+        """Queue the creation of several attributes described by addAttr kwargs.
+
+        Maya only creates the children of a compound attribute along with it,
+        the kwargs whose parent is added by this modifier are created as its
+        children. The other child attributes are added on their own, as maya
+        can't add children to an existing compound attribute.
+        """
+        self._count("add_attributes")
+        self._edited_hash_codes.add(node.hashCode)
+        for attribute_kwargs in kwargs:
+            self._pending_attributes.add((node.hashCode, attribute_kwargs["longName"]))
+            self._attributes.append((node, attribute_kwargs))
+
+    def rename_node(self, node: cmdx.Node, name: str) -> None:
+        """Queue the renaming of a maya node."""
+        self._count("rename_node")
+        self._edits.append(lambda modifier: modifier.rename_node(node, name))
+
+    def connect(self, source: PlugGetter, target: PlugGetter) -> None:
+        """Queue a connection between two plugs, replacing the target's input."""
+        self._count("connect")
+        self._edits.append(lambda modifier: modifier.connect(source(), target()))
+
+    def disconnect(
+        self,
+        source: PlugGetter,
+        target: PlugGetter,
+        nodes: Sequence[cmdx.Node] = (),
+    ) -> None:
+        """Queue the removal of a connection between two plugs.
+
+        The disconnection is skipped if one of the given nodes, usually the
+        nodes of the plugs, gets deleted by this modifier, deleting the node
+        is enough to break the connection.
+        """
+        self._count("disconnect")
+        hash_codes = [node.hashCode for node in nodes]
+
+        def edit(modifier: cmdx.DagModifier) -> None:
+            if self._deleted_hash_codes.isdisjoint(hash_codes):
+                modifier.disconnect(source(), target())
+
+        self._edits.append(edit)
+
+    def delete_attr(self, node: cmdx.Node, attribute: str) -> None:
+        """Queue the deletion of a dynamic attribute, skipped if it's already gone."""
+        self._count("delete_attr")
+
+        def edit(modifier: cmdx.DagModifier) -> None:
+            if node.exists and node.has_attr(attribute):
+                modifier.delete_attr(node[attribute])
+
+        self._edits.append(edit)
+
+    def set_attr(self, plug: PlugGetter, value: Any) -> None:
+        """Queue a value change, skipped if the plug resolves to None.
+
+        Values are resolved last, once every connection and deletion is applied.
+        """
+        self._count("set_attr")
+        self._values.append((plug, value))
+
+    def set_array(
+        self,
+        plug: PlugGetter,
+        values: Sequence[Any],
+        previous: Optional[Sequence[Any]] = None,
+    ) -> None:
+        """Queue the values of a multi attribute, skipped if the plug resolves to None.
+
+        Only the elements from the first to the last one differing from the
+        previous values, if known, are set, with a single undoable ``setAttr``.
+        Elements past the end of the values are removed, so the array is
+        resized in place.
+        """
+        self._count("set_array")
+        self._arrays.append((plug, values, previous))
+
+    def delete_node(self, node: cmdx.Node) -> None:
+        """Queue the deletion of a maya node."""
+        self.delete_nodes([node])
+
+    def delete_nodes(self, nodes: Iterable[cmdx.Node]) -> None:
+        """Queue the deletion of several maya nodes, they are deleted at once."""
+        self._count("delete_nodes")
+        for node in nodes:
+            if node.hashCode not in self._deleted_hash_codes:
+                self._deleted_hash_codes.add(node.hashCode)
+                self._deleted_nodes.append(node)
+
+    def doIt(self) -> None:  # pylint: disable = invalid-name
+        """Apply every queued edit, or redo them after `undoIt`."""
+        self._count("doIt")
+        if self._applied:
+            self._dg_modifier.doIt()
+            self._dag_modifier.doIt()
+            if self._arrays:
+                self._array_modifier.doIt()
+            return
+
+        self._dg_modifier.doIt()
+        self._dag_modifier.doIt()
+
+        if self._attributes:
+            for node, attribute in _build_attributes(self._attributes):
+                self._dag_modifier.add_attr(node, attribute)
+            self._dag_modifier.doIt()
+
+        for edit in self._edits:
+            edit(self._dag_modifier)
+        for node in self._deleted_nodes:
+            if node.exists:
+                self._dag_modifier.delete_node(node)
+        if self._edits or self._deleted_nodes:
+            self._dag_modifier.doIt()
+
+        if self._values or self._arrays:
+            for plug, value in self._values:
+                maya_plug = plug()
+                if maya_plug is not None:
+                    self._dag_modifier.set_attr(maya_plug, value)
+            for plug, values, previous in self._arrays:
+                maya_plug = plug()
+                if maya_plug is not None:
+                    self._queue_array(maya_plug, values, previous)
+            self._dag_modifier.doIt()
+            if self._arrays:
+                self._array_modifier.doIt()
+
+        self._applied = True
+        logger.debug("Applied a modifier of %s edits.", len(self))
+
+    def undoIt(self) -> None:  # pylint: disable = invalid-name
+        """Revert everything this modifier applied."""
+        if self._arrays:
+            self._array_modifier.undoIt()
+        self._dag_modifier.undoIt()
+        self._dg_modifier.undoIt()
+
+    def _queue_array(
+        self,
+        maya_plug: cmdx.Plug,
+        values: Sequence[Any],
+        previous: Optional[Sequence[Any]],
+    ) -> None:
+        previous = previous or ()
+        changed = [
+            index
+            for index, value in enumerate(values)
+            if index >= len(previous) or previous[index] != value
+        ]
+        if changed:
+            start, end = changed[0], changed[-1] + 1
+            if all(math.isfinite(value) for value in values[start:end]):
+                self._array_modifier.commandToExecute(
+                    _set_range_command(maya_plug, start, values[start:end])
+                )
+            else:
+                # MEL has no literal for nan and infinity.
+                for index in range(start, end):
+                    self._dag_modifier.set_attr(maya_plug[index], values[index])
+        for index in reversed(range(len(values), maya_plug.count())):
+            self._array_modifier.removeMultiInstance(maya_plug[index].plug(), True)
+
+    def _count(self, command: str) -> None:
+        if self._profiler is not None:
+            self._profiler.count_command(command)
+
+
+def _set_range_command(maya_plug: cmdx.Plug, start: int, values: Sequence[Any]) -> str:
+    """Return the MEL command setting consecutive elements of a multi attribute."""
+    end = start + len(values) - 1
+    floats = " ".join(repr(float(value)) for value in values)
+    return f'setAttr "{maya_plug.path()}[{start}:{end}]" {floats}'
+
+
+def _build_attributes(
+    attributes: List[Tuple[cmdx.Node, Dict[str, Any]]]
+) -> List[Tuple[cmdx.Node, Any]]:
+    """Build the cmdx attributes to add, the children nested in their parent."""
+    children: Dict[Tuple[int, str], List[Dict[str, Any]]] = {}
+    for node, kwargs in attributes:
+        if "parent" in kwargs:
+            children.setdefault((node.hashCode, kwargs["parent"]), []).append(kwargs)
+    added = {(node.hashCode, kwargs["longName"]) for node, kwargs in attributes}
+
+    def build(node: cmdx.Node, kwargs: Dict[str, Any]) -> Any:
+        attribute_children = children.get((node.hashCode, kwargs["longName"]))
+        if not attribute_children:
+            return _attribute_from_kwargs(kwargs)
+        return cmdx.Compound(
+            kwargs["longName"],
+            children=[build(node, child) for child in attribute_children],
+        )
+
+    built = []
+    for node, kwargs in attributes:
+        if (node.hashCode, kwargs.get("parent")) in added:
+            continue
+        if "parent" in kwargs:
+            logger.warning(
+                "%s can't be added under the existing %s, it's added on its own.",
+                kwargs["longName"],
+                kwargs["parent"],
+            )
+        built.append((node, build(node, kwargs)))
+    return built
+
+
+def _attribute_from_kwargs(kwargs: Dict[str, Any]) -> Any:
+    """Build a cmdx attribute from `cmdx.addAttr` style kwargs."""
+    return kwargs["attributeType"](kwargs["longName"], array=kwargs.get("array", False))
+
+
+__all__ = ["OMModifier", "PlugGetter", "is_dag_node_type"]
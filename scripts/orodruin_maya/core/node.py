@@ -1,25 +1,45 @@
 from __future__ import annotations
 
+import json
 import logging
-from typing import TYPE_CHECKING, Dict, List, Optional, Union
+from functools import partial
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Sequence, Union
 from uuid import UUID
 
 import attr
 import cmdx
-from maya import cmds
 from orodruin.core.connection import Connection
 from orodruin.core.node import Node, NodeLike
 from orodruin.core.port.port import Port
 
+from .subscriptions import MayaCallbacks, Subscriptions
+from .tags import NODE_TAG, PORTS_TAG, format_node_tag, node_role, tag_attribute_kwargs
+
 if TYPE_CHECKING:
+    from .modifier import OMModifier, PlugGetter
+    from .port import OMPort
     from .state import OMState
+    from .template import AttributeSpec, AttributeTemplate
 
 logger = logging.getLogger(__name__)
 
 
-@attr.s
+@attr.s(slots=True)
 class OMNode:
-    """Orodruin Maya Node handling the events from the Orodruin Node."""
+    """Orodruin Maya Node handling the events from the Orodruin Node.
+
+    The first build of a clonable class is recorded as a prototype the next
+    instances are cloned from, see `OMPrototype`. Cloning is opt-in: subclasses
+    overriding `build` are only cloned if they set CLONABLE to True themselves,
+    once their build queues all its edits on the OMState modifier and keeps no
+    state on the instance, see `is_clonable`.
+
+    Virtual nodes have no maya node, connections to their ports are resolved
+    to the ports of the nodes within, see `OMState.resolve_source`.
+    """
+
+    CLONABLE = True
+    VIRTUAL = False
 
     _om_state: OMState = attr.ib()
     _uuid: UUID = attr.ib()
@@ -30,17 +50,25 @@ class OMNode:
     _nodes: List[cmdx.Node] = attr.ib(init=False, factory=list)
 
     _om_ports: List[UUID] = attr.ib(init=False, factory=list)
+    _subscriptions: Subscriptions = attr.ib(init=False, factory=Subscriptions)
+    _port_subscriptions: Dict[UUID, Subscriptions] = attr.ib(init=False, factory=dict)
+    _attribute_template: Optional[AttributeTemplate] = attr.ib(init=False, default=None)
+    _templated_specs: List[AttributeSpec] = attr.ib(init=False, factory=list)
+    _maya_callbacks: MayaCallbacks = attr.ib(init=False, factory=MayaCallbacks)
 
     @classmethod
     def from_node(cls, om_state: OMState, node: Node) -> OMNode:
         """Instantiate an OMNode from an orodruin node."""
         om_node = cls(om_state, node.uuid(), node.name())
-        node.port_registered.subscribe(om_node.register_port)
-        node.name_changed.subscribe(om_node.set_name)
+        om_node._subscriptions.subscribe(node.port_registered, om_node.register_port)
+        om_node._subscriptions.subscribe(node.name_changed, om_node.set_name)
+        # A deferred OMState creates the OMNode after the ports registered so far.
+        for port in node.ports():
+            om_node.register_port(port)
         return om_node
 
     def __attrs_post_init__(self) -> None:
-        self.build()
+        self._om_state.build_om_node(self)
 
     def om_state(self) -> OMState:
         return self._om_state
@@ -52,8 +80,10 @@ class OMNode:
         return self._name
 
     def set_name(self, name: str) -> None:
-        self._input_node.rename(name)
+        with self._om_state.batch(deferred=True) as modifier:
+            modifier.rename_node(self._input_node, name)
         self._name = name
+        self.clear_plug_cache()
 
     def input_node(self) -> cmdx.Node:
         """This Component's input maya node"""
@@ -63,12 +93,114 @@ class OMNode:
         """This Component's output maya node"""
         return self._output_node
 
+    def io_nodes(self) -> List[cmdx.Node]:
+        """Return the input and output maya nodes, once if they're the same node."""
+        if self._input_node.hashCode == self._output_node.hashCode:
+            return [self._input_node]
+        return [self._input_node, self._output_node]
+
+    def set_io_nodes(self, input_node: cmdx.Node, output_node: cmdx.Node) -> None:
+        """Set the maya nodes holding the attributes of the input and output ports."""
+        self._input_node = input_node
+        self._output_node = output_node
+
+    def maya_nodes(self) -> List[cmdx.Node]:
+        """Return the maya nodes owned by the OMNode, in creation order."""
+        return list(self._nodes)
+
+    def adopt(
+        self,
+        maya_nodes: Sequence[cmdx.Node],
+        input_node: cmdx.Node,
+        output_node: cmdx.Node,
+    ) -> None:
+        """Take over maya nodes an earlier build left in the scene instead of building.
+
+        The nodes must be the ones the OMNode class builds, in creation order.
+        """
+        self._nodes = list(maya_nodes)
+        for maya_node in self._nodes:
+            self._om_state.register_maya_node(maya_node, self._uuid)
+        self.set_io_nodes(input_node, output_node)
+
+    def tag_maya_nodes(self) -> None:
+        """Tag the maya nodes with the UUID of the node so they can be adopted.
+
+        The input and output nodes also get the tag of their port attributes,
+        written by `queue_port_tags`.
+        """
+        class_name = type(self).__name__
+        with self._om_state.batch(deferred=True) as modifier:
+            for index, maya_node in enumerate(self._nodes):
+                role = node_role(maya_node, self._input_node, self._output_node)
+                kwargs = [tag_attribute_kwargs(NODE_TAG)]
+                if role:
+                    kwargs.append(tag_attribute_kwargs(PORTS_TAG))
+                modifier.add_attributes(maya_node, kwargs)
+                tag = format_node_tag(self._uuid, index, role, class_name)
+                modifier.set_attr(_tag_getter(maya_node, NODE_TAG), tag)
+
+    def port_tags(self) -> Dict[int, Dict[str, str]]:
+        """Return the port UUIDs of the attributes created for the ports.
+
+        The UUIDs are mapped by attribute name and by maya node hash code.
+        """
+        tags: Dict[int, Dict[str, str]] = {
+            maya_node.hashCode: {} for maya_node in self.io_nodes()
+        }
+        attribute_map = self.maya_attribute_map()
+        for om_port in self.om_ports():
+            if om_port.is_materialized() and om_port.name() not in attribute_map:
+                tags[om_port.maya_node().hashCode][om_port.name()] = str(om_port.uuid())
+        return tags
+
+    def queue_port_tags(self, modifier: OMModifier) -> None:
+        """Queue the writing of the port tags of the input and output nodes."""
+        port_tags = self.port_tags()
+        for maya_node in self.io_nodes():
+            modifier.set_attr(
+                _tag_getter(maya_node, PORTS_TAG),
+                json.dumps(port_tags[maya_node.hashCode], sort_keys=True),
+            )
+
     def register_port(self, port: Port) -> None:
-        """Unregister a port from the OMGraph."""
-        port.upstream_connection_created.subscribe(self.on_connection_received)
-        port.upstream_connection_deleted.subscribe(self.on_connection_removed)
-        om_port = self._om_state.get_om_port(port)
-        self._om_ports.append(om_port.uuid())
+        """Register a port of the node and handle its connection events.
+
+        Ports already registered are skipped.
+        """
+        if port.uuid() in self._port_subscriptions:
+            return
+        subscriptions = Subscriptions()
+        subscriptions.subscribe(
+            port.upstream_connection_created, self.on_connection_received
+        )
+        subscriptions.subscribe(
+            port.upstream_connection_deleted, self.on_connection_removed
+        )
+        self._port_subscriptions[port.uuid()] = subscriptions
+        # The OMPort may not exist yet when the OMState is deferred.
+        self._om_ports.append(port.uuid())
+
+    def unregister_port(self, port_id: UUID) -> None:
+        """Forget a port that has been deleted and stop handling its events."""
+        subscriptions = self._port_subscriptions.pop(port_id, None)
+        if subscriptions is not None:
+            subscriptions.release()
+        if port_id in self._om_ports:
+            self._om_ports.remove(port_id)
+
+    def subscription_count(self) -> int:
+        """Return how many signals of the orodruin node and its ports are handled."""
+        return len(self._subscriptions) + sum(
+            len(subscriptions) for subscriptions in self._port_subscriptions.values()
+        )
+
+    def unsubscribe(self) -> None:
+        """Stop handling the events of the orodruin node and its ports."""
+        self._subscriptions.release()
+        for subscriptions in self._port_subscriptions.values():
+            subscriptions.release()
+        self._port_subscriptions.clear()
 
     @staticmethod
     def maya_attribute_map() -> Dict[str, str]:
@@ -76,15 +208,103 @@ class OMNode:
         return {}
 
     def build(self):
-        """Build the OMNode."""
+        """Build the OMNode.
+
+        The maya nodes are only added to the scene once the OMState modifier
+        is applied, further edits to them should be queued on `modifier`.
+        """
         self._input_node = self.create_node("network", name=self._name)
         self._output_node = self._input_node
 
     def delete(self):
         """Delete all the nodes owned by the OMNode"""
+        self.unwatch_maya_nodes()
+        self.clear_plug_cache()
+        with self._om_state.batch(deferred=True) as modifier:
+            modifier.delete_nodes(self._nodes)
         for node in self._nodes:
-            if node.exists:
-                cmds.delete(node.path())
+            self._om_state.unregister_maya_node(node)
+
+    def rebuild(self, name: str) -> None:
+        """Build the maya nodes again under the given name, once `delete` is done.
+
+        The attributes of the ports must be restored afterwards, see
+        `OMPort.restore_maya_attribute`.
+        """
+        self._name = name
+        self._nodes = []
+        self.clear_plug_cache()
+        self._om_state.build_om_node(self)
+        self._om_state.invalidate_port_tags(self._uuid)
+
+    def watch_maya_nodes(self, callback: Callable[..., Any]) -> None:
+        """Call the callback whenever an attribute of the input or output node
+        changes, with the node hash code followed by the maya callback arguments.
+        """
+        self.unwatch_maya_nodes()
+        for maya_node in self.io_nodes():
+            self._maya_callbacks.add_attribute_changed(
+                maya_node, partial(callback, maya_node.hashCode)
+            )
+
+    def unwatch_maya_nodes(self) -> None:
+        """Remove the callbacks added by `watch_maya_nodes`."""
+        self._maya_callbacks.release()
+
+    def om_ports(self) -> List[OMPort]:
+        """Return the OMPorts of this node in creation order.
+
+        Ports a deferred OMState hasn't created yet are skipped.
+        """
+        om_ports = []
+        for port_id in self._om_ports:
+            try:
+                om_ports.append(self._om_state.get_om_port(port_id))
+            except KeyError:
+                continue
+        return om_ports
+
+    def set_attribute_template(self, template: AttributeTemplate) -> None:
+        """Create the attributes of the ports of this node from a template."""
+        self._attribute_template = template
+
+    def claim_templated_attribute(self, om_port: OMPort) -> bool:
+        """Have the attribute of a port created from the node's template.
+
+        The claimed attributes are created at once when the modifier is applied,
+        see `queue_templated_attributes`. Return False if the template doesn't
+        have the port, it doesn't describe the node type anymore and isn't used
+        for the next instances.
+        """
+        template = self._attribute_template
+        if template is None:
+            return False
+        spec = template.find_spec(om_port.name(), om_port.direction(), om_port.type())
+        if spec is None:
+            self._om_state.discard_attribute_template(template)
+            return False
+        if not self._templated_specs:
+            self._om_state.invalidate_templated_attributes(self._uuid)
+        self._templated_specs.append(spec)
+        return True
+
+    def queue_templated_attributes(self, modifier: OMModifier) -> None:
+        """Queue the creation of the attributes claimed from the template."""
+        specs, self._templated_specs = self._templated_specs, []
+        if specs and self._attribute_template is not None:
+            self._attribute_template.apply(modifier, self, specs)
+
+    def clear_plug_cache(self) -> None:
+        """Clear the maya attributes resolved by the ports of this node.
+
+        Must be called whenever the maya nodes of the OMNode are rebuilt.
+        """
+        for om_port in self.om_ports():
+            om_port.clear_maya_attribute()
+
+    def modifier(self) -> OMModifier:
+        """Return the modifier collecting the maya edits of the OMState."""
+        return self._om_state.modifier()
 
     def create_node(
         self,
@@ -93,8 +313,10 @@ class OMNode:
         parent: Optional[cmdx.Node] = None,
     ) -> cmdx.Node:
         """Create a maya node and register it."""
-        node = cmdx.create_node(node_type, name, parent)
+        with self._om_state.batch(deferred=True) as modifier:
+            node = modifier.create_node(node_type, name, parent)
         self._nodes.append(node)
+        self._om_state.register_maya_node(node, self._uuid)
         return node
 
     def on_connection_received(self, port: Port) -> None:
@@ -104,18 +326,51 @@ class OMNode:
         """Called whenever a port of this node gets disconnected."""
 
 
+def _tag_getter(maya_node: cmdx.Node, tag: str) -> PlugGetter:
+    return lambda: maya_node[tag]
+
+
 class OMGroupNode(OMNode):
     """Class for all Group Nodes."""
 
+    __slots__ = ()
+
+    CLONABLE = True
+
     def build(self):
         self._input_node = self.create_node("network", name=self._name + "_IN")
         self._output_node = self.create_node("network", name=self._name + "_OUT")
 
     def set_name(self, name: str) -> None:
-        self._input_node.rename(name + "_IN")
-        self._output_node.rename(name + "_OUT")
+        with self._om_state.batch(deferred=True) as modifier:
+            modifier.rename_node(self._input_node, name + "_IN")
+            modifier.rename_node(self._output_node, name + "_OUT")
+        self._name = name
+        self.clear_plug_cache()
+
+
+class OMFlatGroupNode(OMGroupNode):
+    """Group node existing only in orodruin, used when the OMState flattens groups.
+
+    It builds no maya node, the connections going through its ports are made
+    between the ports they resolve to.
+    """
+
+    __slots__ = ()
+
+    CLONABLE = False
+    VIRTUAL = True
+
+    def build(self):
+        pass
+
+    def io_nodes(self) -> List[cmdx.Node]:
+        return []
+
+    def set_name(self, name: str) -> None:
+        self._name = name
 
 
 OMNodeLike = Union[OMNode, NodeLike]
 
-__all__ = ["OMNode", "OMNodeLike", "OMGroupNode"]
+__all__ = ["OMFlatGroupNode", "OMNode", "OMNodeLike", "OMGroupNode"]
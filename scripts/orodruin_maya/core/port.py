@@ -3,7 +3,8 @@ from __future__ import annotations
 import logging
 import re
 from enum import Enum
-from typing import TYPE_CHECKING, Dict, Optional, Union
+from functools import partial
+from typing import TYPE_CHECKING, Any, Dict, Optional, Union
 from uuid import UUID
 
 import attr
@@ -13,15 +14,76 @@ from orodruin.core import Port
 from orodruin.core.port.port import PortDirection, PortLike, PortType
 from orodruin_maya.core.node import OMNode
 
+from .profiler import profiled
+from .subscriptions import Subscriptions
+
 if TYPE_CHECKING:
+    from .modifier import PlugGetter
     from .state import OMState
 
 logger = logging.getLogger(__name__)
 
 
+_TYPE_DEFAULTS: Dict[PortType, Any] = {}
+_NO_DEFAULT = object()
+_NO_VALUE = object()
+
+_SHADOWED_TYPES = (bool, int, float, str)
+"""Port types whose values read back from maya as they were written."""
+
+_FLOAT_ARRAY_KWARGS = {"attributeType": cmdx.Double, "array": True}
+"""The addAttr kwargs of the multi attribute backing a list of floats port."""
+
 ATTRIBUTE_RE = re.compile(r"(?P<attribute>\w+)(?:\[(?P<index>\d+)\])?")
 
 
+def find_plug(node: cmdx.Node, attribute_name: str) -> cmdx.Plug:
+    """Return the plug of a maya node from a possibly nested attribute name."""
+    attribute_parent = node
+
+    for attribute, index in ATTRIBUTE_RE.findall(attribute_name):
+        attribute_parent = attribute_parent[attribute]
+        if index:
+            attribute_parent = attribute_parent[int(index)]
+
+    return attribute_parent
+
+
+def leaf_attribute_name(attribute_name: str) -> str:
+    """Return the last attribute of a nested attribute name, as maya names plugs."""
+    return attribute_name.rsplit(".", 1)[-1]
+
+
+def is_float_list(port_type: PortType) -> bool:
+    """Return True if the port type is a list of floats, e.g. ``List[float]``."""
+    return getattr(port_type, "__origin__", None) is list and (
+        getattr(port_type, "__args__", None) == (float,)
+    )
+
+
+def type_default(port_type: PortType) -> Any:
+    """Return the value a maya attribute of the given port type is created with."""
+    if port_type not in _TYPE_DEFAULTS:
+        try:
+            _TYPE_DEFAULTS[port_type] = port_type()
+        except Exception:  # pylint: disable = broad-except
+            _TYPE_DEFAULTS[port_type] = _NO_DEFAULT
+    return _TYPE_DEFAULTS[port_type]
+
+
+def is_writable(node: cmdx.Node, maya_attribute: cmdx.Plug) -> bool:
+    """Return True if the given plug of a maya node can be written to."""
+    return bool(
+        cmds.attributeQuery(
+            maya_attribute.name(),
+            node=node.path(),
+            writable=True,
+            exists=True,
+        )
+        and maya_attribute.writable
+    )
+
+
 class PortKwargs(Enum):
     """A Mapping between the port type and maya addAttr kwargs."""
 
@@ -36,9 +98,19 @@ class PortKwargs(Enum):
     str = {"attributeType": cmdx.String}
 
 
-@attr.s
+@attr.s(slots=True)
 class OMPort:
-    """Orodruin Maya Port handling the events from the Orodruin Port."""
+    """Orodruin Maya Port handling the events from the Orodruin Port.
+
+    When the OMState has lazy attributes, the maya attribute is only created
+    once the port gets connected, gets a value other than its type's default or
+    its maya attribute is requested, see `materialize`.
+
+    The last value read from or written to an unconnected maya attribute is
+    kept until the attribute is edited in maya, see `read_maya_value`.
+    Edits made in maya are sent back to the orodruin port, see
+    `receive_maya_value`.
+    """
 
     _om_state: OMState = attr.ib()
     _om_node_id: UUID = attr.ib()
@@ -47,9 +119,16 @@ class OMPort:
     _name: str = attr.ib()
     _type: PortType = attr.ib()
     _direction: PortDirection = attr.ib()
-    _node_id: UUID = attr.ib()
     _parent_id: Optional[UUID] = attr.ib(default=None)
 
+    _maya_attribute_name: Optional[str] = attr.ib(init=False, default=None)
+    _maya_attribute: Optional[cmdx.Plug] = attr.ib(init=False, default=None)
+    _writable: Optional[bool] = attr.ib(init=False, default=None)
+    _materialized: bool = attr.ib(init=False, default=False)
+    _shadow_value: Any = attr.ib(init=False, default=_NO_VALUE)
+    _receiving: bool = attr.ib(init=False, default=False)
+    _subscriptions: Subscriptions = attr.ib(init=False, factory=Subscriptions)
+
     @classmethod
     def from_port(cls, om_state: OMState, port: Port) -> OMPort:
 
@@ -66,16 +145,18 @@ class OMPort:
             port.name(),
             port.type(),
             port.direction(),
-            port.node().uuid(),
             parent_port_id,
         )
 
-        port.value_changed.subscribe(om_port._set_maya_attribute)
+        om_port._subscriptions.subscribe(
+            port.value_changed, om_port._set_maya_attribute
+        )
 
         return om_port
 
     def __attrs_post_init__(self):
-        self._create_maya_attribute()
+        if not self._om_state.lazy_attributes():
+            self.materialize()
 
     def om_state(self) -> OMState:
         return self._om_state
@@ -97,60 +178,248 @@ class OMPort:
             return self._om_state.get_om_port(self._parent_id)
         return None
 
+    def subscription_count(self) -> int:
+        """Return how many signals of the orodruin port are handled."""
+        return len(self._subscriptions)
+
+    def unsubscribe(self) -> None:
+        """Stop handling the events of the orodruin port, e.g. once it is deleted."""
+        self._subscriptions.release()
+
     def om_node(self) -> OMNode:
         return self._om_state.get_om_node(self._om_node_id)
 
-    def _maya_node(self) -> cmdx.Node:
+    def is_array(self) -> bool:
+        """Return True if the port is a list of floats backed by a multi attribute."""
+        return is_float_list(self._type)
+
+    def is_virtual(self) -> bool:
+        """Return True if the port belongs to a virtual node and has no attribute."""
+        return self.om_node().VIRTUAL
+
+    def is_materialized(self) -> bool:
+        """Return True if the maya attribute of this port has been created."""
+        return self._materialized
+
+    def materialize(self) -> None:
+        """Create the maya attribute of this port, and of its parent, if needed.
+
+        Ports of virtual nodes never get an attribute.
+        """
+        if self._materialized or self.is_virtual():
+            return
+        parent_port = self.parent()
+        if parent_port:
+            parent_port.materialize()
+
+        self._materialized = True
+        self._create_maya_attribute()
+        self._om_state.register_maya_attribute(
+            self.maya_node(), self.maya_attribute_name(), self._uuid
+        )
+        self._om_state.invalidate_port_tags(self._om_node_id)
+
+    def maya_node(self) -> cmdx.Node:
+        """Return the maya node holding the attribute of this port."""
         return (
             self.om_node().input_node()
             if self._direction is PortDirection.input
             else self.om_node().output_node()
         )
 
+    def maya_attribute_name(self) -> str:
+        """Return the name of the maya attribute this port maps to."""
+        if self._maya_attribute_name is None:
+            self._maya_attribute_name = (
+                self.om_node().maya_attribute_map().get(self._name, self._name)
+            )
+        return self._maya_attribute_name
+
     def maya_attribute(self) -> cmdx.Plug:
-        maya_attribute_name = (
-            self.om_node().maya_attribute_map().get(self._name, self._name)
+        """Return the maya attribute of this port.
+
+        The plug is only resolved once, until `clear_maya_attribute` is called.
+        A lazy attribute is created, and the OMState flushed if the attribute
+        is still waiting for the modifier, to resolve it.
+        """
+        if not self._materialized:
+            self.materialize()
+        if self._maya_attribute is None:
+            if self._om_state.has_pending_attributes(
+                self.maya_node(), self._om_node_id
+            ):
+                self._om_state.flush()
+            self._maya_attribute = find_plug(
+                self.maya_node(), self.maya_attribute_name()
+            )
+        return self._maya_attribute
+
+    def maya_attribute_getter(self) -> PlugGetter:
+        """Return a callable resolving the maya attribute once it exists.
+
+        The callable doesn't rely on the OMState, so it still works after the
+        port or its node have been deleted.
+        """
+        maya_attribute = self._maya_attribute
+        if maya_attribute is not None:
+            return lambda: maya_attribute
+        return partial(find_plug, self.maya_node(), self.maya_attribute_name())
+
+    def clear_maya_attribute(self) -> None:
+        """Forget the resolved maya attribute, e.g. when its node is renamed."""
+        self._maya_attribute_name = None
+        self._maya_attribute = None
+        self._writable = None
+        self._shadow_value = _NO_VALUE
+
+    def restore_maya_attribute(self) -> None:
+        """Create the attribute of a materialized port again, e.g. once its node
+        has been rebuilt or the attribute deleted outside of the OMState.
+        """
+        self.clear_maya_attribute()
+        self._create_maya_attribute()
+        self._om_state.register_maya_attribute(
+            self.maya_node(), self.maya_attribute_name(), self._uuid
         )
+        self._om_state.invalidate_port_tags(self._om_node_id)
 
-        attribute_parent = self._maya_node()
-
-        for attribute, index in ATTRIBUTE_RE.findall(maya_attribute_name):
-            attribute_parent = attribute_parent[attribute]
-            if index:
-                attribute_parent = attribute_parent[int(index)]
+    def _create_maya_attribute(self) -> None:
+        attribute_map = self.om_node().maya_attribute_map()
+        if self._name in attribute_map:
+            return
 
-        return attribute_parent
+        if self.om_node().claim_templated_attribute(self):
+            return
 
-    def _create_maya_attribute(self) -> None:
-        attribute_needs_created = self.name() not in self.om_node().maya_attribute_map()
-        if attribute_needs_created:
-            maya_attribute = (
-                self.om_node().maya_attribute_map().get(self.name(), self.name())
-            )
+        maya_node = self.maya_node()
+        with self._om_state.batch(deferred=True) as modifier:
+            if not modifier.has_attr(maya_node, self._name):
+                modifier.add_attr(maya_node, self.add_attr_kwargs(attribute_map))
 
-            if not self._maya_node().has_attr(maya_attribute):
-                kwargs = self.add_attr_kwargs(self.om_node().maya_attribute_map())
+    def writable_maya_attribute(self) -> Optional[cmdx.Plug]:
+        """Return the maya attribute if it can be written to.
 
-                cmdx.addAttr(self._maya_node(), **kwargs)
+        Writability is only queried once, until `clear_writable` is called.
+        """
+        maya_node = self.maya_node()
+        if not maya_node.exists:
+            return None
 
-    def _set_maya_attribute(self, value: PortType) -> None:
         maya_attribute = self.maya_attribute()
+        if self._writable is None:
+            self._writable = is_writable(maya_node, maya_attribute)
+
+        return maya_attribute if self._writable else None
+
+    def clear_writable(self) -> None:
+        """Forget the cached writability, e.g. when the port gets connected."""
+        self._writable = None
+        self._shadow_value = _NO_VALUE
+
+    def read_maya_value(self) -> Any:
+        """Return the value of the maya attribute.
+
+        Maya is only queried if the attribute may have changed since its value
+        was last read or written, see `mark_dirty`. Values of connected
+        attributes are evaluated by maya and never kept.
+        """
+        if self._shadow_value is not _NO_VALUE:
+            return self._shadow_value
+        value = self.maya_attribute().read()
         if (
-            cmds.attributeQuery(
-                maya_attribute.name(),
-                node=self._maya_node().path(),
-                writable=True,
-                exists=True,
-            )
-            and maya_attribute.writable
+            self._om_state.shadow_values()
+            and self.writable_maya_attribute() is not None
         ):
-            maya_attribute.write(value)
+            self._shadow_value = value
+        return value
+
+    def peek_maya_value(self) -> Any:
+        """Return the kept value of the maya attribute, or read it without keeping it.
+
+        Unlike `read_maya_value`, the writability of the attribute is never
+        queried, reading many attributes only costs a read each.
+        """
+        if self._shadow_value is not _NO_VALUE:
+            return self._shadow_value
+        return self.maya_attribute().read()
+
+    def known_value(self) -> Optional[Any]:
+        """Return the kept value of the maya attribute, None if it isn't known."""
+        if self._shadow_value is _NO_VALUE:
+            return None
+        return self._shadow_value
+
+    def record_written(self, value: Any) -> None:
+        """Keep a value the OMState wrote to the maya attribute.
+
+        Only values of types maya reads back unchanged are kept, arrays are
+        read back as tuples of floats.
+        """
+        if not self._writable or not self._om_state.shadow_values():
+            self._shadow_value = _NO_VALUE
+        elif self.is_array():
+            self._shadow_value = tuple(map(float, value))
+        elif self._type in _SHADOWED_TYPES:
+            self._shadow_value = self._type(value)
+        else:
+            self._shadow_value = _NO_VALUE
+
+    def mark_dirty(self) -> None:
+        """Forget the kept value, e.g. when the attribute is set in maya."""
+        self._shadow_value = _NO_VALUE
+        self._om_state.serializer().forget(self._uuid)
+
+    def receive_maya_value(self, port: Port) -> None:
+        """Set the orodruin port to the value of the maya attribute.
+
+        The value isn't written back to maya. Only array ports and ports of
+        types maya reads back unchanged are set.
+        """
+        if self.is_array():
+            value = list(self.read_maya_value())
+        elif self._type in _SHADOWED_TYPES:
+            value = self._type(self.read_maya_value())
+        else:
+            logger.debug("Can't receive %s values from maya.", self._type)
+            return
+        if port.get() == value:
+            return
+        self._receiving = True
+        try:
+            port.set(value)
+        finally:
+            self._receiving = False
+
+    def sync_value(self, port: Port) -> None:
+        """Write the value of the orodruin port if it isn't its type's default,
+        e.g. a value set before a deferred OMState created this OMPort.
+        """
+        value = port.get()
+        if value != type_default(self._type):
+            self._set_maya_attribute(value)
+
+    @profiled
+    def _set_maya_attribute(self, value: PortType) -> None:
+        if self._receiving:
+            return
+        if self.is_virtual():
+            self._om_state.set_virtual_value(self._uuid, value)
+            return
+        if not self._materialized:
+            if value == type_default(self._type):
+                return
+            self.materialize()
+        with self._om_state.batch(deferred=True):
+            self._om_state.queue_write(self._uuid, value)
 
     def add_attr_kwargs(
         self, attribute_map: Optional[Dict[str, str]] = None
-    ) -> Dict[str, str]:
+    ) -> Dict[str, Any]:
         """Return the kwargs needed to create the maya attribute for this Port"""
-        kwargs = PortKwargs[self._type.__name__].value
+        if is_float_list(self._type):
+            kwargs = dict(_FLOAT_ARRAY_KWARGS)
+        else:
+            kwargs = dict(PortKwargs[self._type.__name__].value)
         kwargs["longName"] = self._name
 
         parent_port = self.parent()
@@ -168,4 +437,12 @@ class OMPort:
 
 OMPortLike = Union[OMPort, PortLike]
 
-__all__ = ["OMPort", "OMPortLike"]
+__all__ = [
+    "OMPort",
+    "OMPortLike",
+    "find_plug",
+    "is_float_list",
+    "is_writable",
+    "leaf_attribute_name",
+    "type_default",
+]
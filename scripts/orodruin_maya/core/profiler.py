@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Tuple, TypeVar
+
+import attr
+from orodruin.core import Connection, Node, Port
+
+if TYPE_CHECKING:
+    from .state import OMState
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 90, 99)
+
+MethodFunc = TypeVar("MethodFunc", bound=Callable[..., Any])
+
+
+def node_type_of(obj: Any) -> str:
+    """Return the library node type an orodruin object belongs to, if any."""
+    if isinstance(obj, Connection):
+        obj = obj.target()
+    if isinstance(obj, Port):
+        obj = obj.node()
+    if not isinstance(obj, Node):
+        return ""
+    library = obj.library()
+    if library:
+        return f"{library.name()}.{obj.type()}"
+    return obj.type()
+
+
+def profiled(method: MethodFunc) -> MethodFunc:
+    """Decorate a method of OMState or of an OM class to time it when profiling.
+
+    Calls are recorded under the method name and the node type of their
+    first argument.
+    """
+    handler = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self: Any, *args: Any) -> Any:
+        om_state: OMState = getattr(self, "_om_state", self)
+        profiler = om_state.profiler()
+        if profiler is None:
+            return method(self, *args)
+        with profiler.measure(handler, node_type_of(args[0]) if args else ""):
+            return method(self, *args)
+
+    return wrapper  # type: ignore
+
+
+@attr.s(slots=True)
+class HandlerStats:
+    """Durations and maya commands recorded for a handler."""
+
+    _durations: List[float] = attr.ib(factory=list)
+    _commands: Counter = attr.ib(factory=Counter)
+
+    def count(self) -> int:
+        return len(self._durations)
+
+    def total(self) -> float:
+        """Return the cumulative time spent in the handler, in seconds."""
+        return sum(self._durations)
+
+    def percentile(self, percent: float) -> float:
+        """Return the duration under which the given percent of the calls ran."""
+        if not self._durations:
+            return 0.0
+        durations = sorted(self._durations)
+        index = max(0, -(-len(durations) * percent // 100) - 1)
+        return durations[int(index)]
+
+    def commands(self) -> Dict[str, int]:
+        """Return the number of maya commands queued by the handler, by command."""
+        return dict(self._commands)
+
+    def record(self, duration: float, commands: Counter) -> None:
+        self._durations.append(duration)
+        self._commands.update(commands)
+
+    def merge(self, other: HandlerStats) -> None:
+        self._durations.extend(other._durations)
+        self._commands.update(other._commands)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"count": self.count(), "total": self.total()}
+        for percent in PERCENTILES:
+            data[f"p{percent}"] = self.percentile(percent)
+        data["commands"] = dict(sorted(self._commands.items()))
+        return data
+
+
+@attr.s
+class OMProfiler:
+    """Record the calls of the OMState handlers and of the OM classes.
+
+    Each call is timed and the maya commands it queues on the modifier are
+    counted, per handler and per library node type.
+    Durations are inclusive, a handler calling another one includes its time,
+    but each command is only counted for the innermost handler.
+    """
+
+    _stats: Dict[Tuple[str, str], HandlerStats] = attr.ib(init=False, factory=dict)
+    _frames: List[Counter] = attr.ib(init=False, factory=list)
+
+    @contextmanager
+    def measure(self, handler: str, node_type: str = "") -> Iterator[None]:
+        """Record the duration and commands of the code run within the context."""
+        commands: Counter = Counter()
+        self._frames.append(commands)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self._frames.pop()
+            stats = self._stats.get((handler, node_type))
+            if stats is None:
+                stats = self._stats[(handler, node_type)] = HandlerStats()
+            stats.record(duration, commands)
+
+    def count_command(self, command: str) -> None:
+        """Count a maya command for the handler being measured."""
+        if self._frames:
+            self._frames[-1][command] += 1
+
+    def stats(self) -> Dict[Tuple[str, str], HandlerStats]:
+        """Return the recorded stats by handler and node type."""
+        return dict(self._stats)
+
+    def handler_stats(self) -> Dict[str, HandlerStats]:
+        """Return the recorded stats by handler, whatever the node type."""
+        merged: Dict[str, HandlerStats] = {}
+        for (handler, _), stats in self._stats.items():
+            merged.setdefault(handler, HandlerStats()).merge(stats)
+        return merged
+
+    def reset(self) -> None:
+        self._stats.clear()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the recorded stats as JSON compatible data."""
+        data: Dict[str, Any] = {}
+        for handler, stats in sorted(self.handler_stats().items()):
+            data[handler] = stats.to_dict()
+            data[handler]["node_types"] = {
+                node_type: node_stats.to_dict()
+                for (name, node_type), node_stats in sorted(self._stats.items())
+                if name == handler and node_type
+            }
+        return data
+
+    def dump(self, path: Path) -> None:
+        """Write the recorded stats to a JSON file."""
+        Path(path).write_text(json.dumps(self.to_dict(), indent=2))
+        logger.info("Dumped the OMState profile to %s.", path)
+
+
+__all__ = [
+    "HandlerStats",
+    "OMProfiler",
+    "node_type_of",
+    "profiled",
+]
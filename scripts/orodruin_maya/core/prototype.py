@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import functools
+import logging
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Type
+
+import attr
+import cmdx
+
+from .node import OMNode
+from .port import find_plug
+
+if TYPE_CHECKING:
+    from .modifier import OMModifier, PlugGetter
+
+logger = logging.getLogger(__name__)
+
+PlugRef = Tuple[int, str]
+"""The index of a maya node created by a build and the name of one of its plugs."""
+
+
+def is_clonable(om_node_class: Type[OMNode]) -> bool:
+    """Return True if instances of an OMNode class can be cloned from a prototype.
+
+    Cloning is opt-in: the class, or the base class it inherits `build` from,
+    must set CLONABLE itself. A class overriding `build` without setting it may
+    keep state or edit maya in ways a prototype can't restore, so it is always
+    built, as are classes adding their own attrs fields.
+    """
+    declaring_class = next(
+        cls for cls in om_node_class.__mro__ if "CLONABLE" in vars(cls)
+    )
+    if not declaring_class.CLONABLE or om_node_class.build is not (
+        declaring_class.build
+    ):
+        return False
+    try:
+        fields = [field.name for field in attr.fields(om_node_class)]
+    except attr.exceptions.NotAnAttrsClassError:
+        return False
+    return fields == [field.name for field in attr.fields(OMNode)]
+
+
+@attr.s(frozen=True, slots=True)
+class NodeRecipe:
+    """How to create one of the maya nodes of a prototype."""
+
+    node_type: str = attr.ib()
+    name: Optional[str] = attr.ib()
+    name_suffix: Optional[str] = attr.ib()
+    parent: Optional[int] = attr.ib()
+
+    def instance_name(self, om_node_name: str) -> Optional[str]:
+        if self.name_suffix is not None:
+            return om_node_name + self.name_suffix
+        return self.name
+
+
+@attr.s(frozen=True, slots=True)
+class OMPrototype:
+    """The maya subnetwork built for an OMNode class, recorded to be cloned.
+
+    Nodes are created in the recorded order, node names starting with the
+    recorded instance name are renamed after each new instance.
+    """
+
+    nodes: Tuple[NodeRecipe, ...] = attr.ib()
+    attributes: Tuple[Tuple[int, Tuple[Tuple[str, Any], ...]], ...] = attr.ib()
+    connections: Tuple[Tuple[PlugRef, PlugRef], ...] = attr.ib()
+    values: Tuple[Tuple[PlugRef, Any], ...] = attr.ib()
+    input_node: int = attr.ib()
+    output_node: int = attr.ib()
+
+    def instantiate(self, om_node: OMNode) -> None:
+        """Build an OMNode by cloning the prototype instead of calling `build`."""
+        with om_node.om_state().batch(deferred=True) as modifier:
+            maya_nodes: List[cmdx.Node] = []
+            for recipe in self.nodes:
+                parent = (
+                    maya_nodes[recipe.parent] if recipe.parent is not None else None
+                )
+                maya_nodes.append(
+                    om_node.create_node(
+                        recipe.node_type, recipe.instance_name(om_node.name()), parent
+                    )
+                )
+
+            for index, kwargs in self.attributes:
+                modifier.add_attr(maya_nodes[index], dict(kwargs))
+            for source, target in self.connections:
+                modifier.connect(
+                    _plug_getter(maya_nodes, source), _plug_getter(maya_nodes, target)
+                )
+            for plug, value in self.values:
+                modifier.set_attr(_plug_getter(maya_nodes, plug), value)
+
+        om_node.set_io_nodes(maya_nodes[self.input_node], maya_nodes[self.output_node])
+
+
+def _plug_getter(maya_nodes: List[cmdx.Node], plug: PlugRef) -> PlugGetter:
+    index, attribute_name = plug
+    return functools.partial(find_plug, maya_nodes[index], attribute_name)
+
+
+@attr.s(slots=True)
+class PrototypeRecorder:
+    """Stand in for the OMState modifier while an OMNode builds to record it.
+
+    Edits are forwarded to the modifier, any edit the recorder can't express
+    relatively to the nodes created by the build invalidates the prototype.
+    """
+
+    _modifier: OMModifier = attr.ib()
+    _om_node: OMNode = attr.ib()
+
+    _nodes: List[NodeRecipe] = attr.ib(init=False, factory=list)
+    _maya_nodes: Dict[int, int] = attr.ib(init=False, factory=dict)
+    _attributes: List[Tuple[int, Tuple[Tuple[str, Any], ...]]] = attr.ib(
+        init=False, factory=list
+    )
+    _connections: List[Tuple[PlugRef, PlugRef]] = attr.ib(init=False, factory=list)
+    _values: List[Tuple[PlugRef, Any]] = attr.ib(init=False, factory=list)
+    _invalid_reason: Optional[str] = attr.ib(init=False, default=None)
+
+    def __getattr__(self, name: str) -> Any:
+        self._invalidate(f"{name} is not recorded")
+        return getattr(self._modifier, name)
+
+    def __len__(self) -> int:
+        return len(self._modifier)
+
+    def create_node(
+        self,
+        node_type: str,
+        name: Optional[str] = None,
+        parent: Optional[cmdx.Node] = None,
+    ) -> cmdx.Node:
+        maya_node = self._modifier.create_node(node_type, name, parent)
+
+        parent_index = None
+        if parent is not None:
+            parent_index = self._node_index(parent)
+
+        name_suffix = None
+        om_node_name = self._om_node.name()
+        if name is not None and name.startswith(om_node_name):
+            name_suffix = name[len(om_node_name) :]
+
+        self._maya_nodes[maya_node.hashCode] = len(self._nodes)
+        self._nodes.append(NodeRecipe(node_type, name, name_suffix, parent_index))
+        return maya_node
+
+    def has_attr(self, node: cmdx.Node, attribute: str) -> bool:
+        return self._modifier.has_attr(node, attribute)
+
+    def add_attr(self, node: cmdx.Node, kwargs: Dict[str, Any]) -> None:
+        self._modifier.add_attr(node, kwargs)
+        index = self._node_index(node)
+        if index is not None:
+            self._attributes.append((index, tuple(kwargs.items())))
+
+    def add_attributes(self, node: cmdx.Node, kwargs: List[Dict[str, Any]]) -> None:
+        for attribute_kwargs in kwargs:
+            self.add_attr(node, attribute_kwargs)
+
+    def connect(self, source: PlugGetter, target: PlugGetter) -> None:
+        self._modifier.connect(source, target)
+        source_ref = self._plug_ref(source)
+        target_ref = self._plug_ref(target)
+        if source_ref is not None and target_ref is not None:
+            self._connections.append((source_ref, target_ref))
+
+    def set_attr(self, plug: PlugGetter, value: Any) -> None:
+        self._modifier.set_attr(plug, value)
+        plug_ref = self._plug_ref(plug)
+        if plug_ref is not None:
+            self._values.append((plug_ref, value))
+
+    def prototype(self) -> Optional[OMPrototype]:
+        """Return the recorded prototype, None if the build can't be cloned."""
+        input_index = self._node_index(self._om_node.input_node())
+        output_index = self._node_index(self._om_node.output_node())
+        if self._invalid_reason is not None:
+            logger.debug(
+                "%s can't be cloned: %s.",
+                type(self._om_node).__name__,
+                self._invalid_reason,
+            )
+            return None
+
+        return OMPrototype(
+            tuple(self._nodes),
+            tuple(self._attributes),
+            tuple(self._connections),
+            tuple(self._values),
+            input_index,
+            output_index,
+        )
+
+    def _node_index(self, maya_node: cmdx.Node) -> Optional[int]:
+        index = self._maya_nodes.get(maya_node.hashCode)
+        if index is None:
+            self._invalidate(f"{maya_node} was not created by the build")
+        return index
+
+    def _plug_ref(self, plug: PlugGetter) -> Optional[PlugRef]:
+        """Return a reference to a plug found by `find_plug` on a recorded node."""
+        if isinstance(plug, functools.partial) and plug.func is find_plug:
+            maya_node, attribute_name = plug.args
+            index = self._node_index(maya_node)
+            if index is not None:
+                return index, attribute_name
+            return None
+        self._invalidate("a plug is not resolved with find_plug")
+        return None
+
+    def _invalidate(self, reason: str) -> None:
+        if self._invalid_reason is None:
+            self._invalid_reason = reason
+
+
+__all__ = [
+    "NodeRecipe",
+    "OMPrototype",
+    "PlugRef",
+    "PrototypeRecorder",
+    "is_clonable",
+]
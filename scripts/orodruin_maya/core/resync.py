@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+import attr
+import cmdx
+from maya import cmds
+from orodruin.core import Connection, Graph, Node, Port
+
+from .port import leaf_attribute_name, type_default
+
+if TYPE_CHECKING:
+    from .node import OMNode
+    from .port import OMPort
+    from .state import OMState
+
+logger = logging.getLogger(__name__)
+
+
+@attr.s(slots=True)
+class ResyncPlan:
+    """The edits bringing the OMState and the maya scene back in sync with the state.
+
+    Orodruin objects missing an OM object are created, OM objects whose
+    orodruin object is gone are deleted, by UUID. The other edits repair the
+    maya scene of existing OM objects, see `OMState.resync`.
+    """
+
+    create_graphs: List[Graph] = attr.ib(factory=list)
+    delete_graphs: List[UUID] = attr.ib(factory=list)
+
+    create_nodes: List[Node] = attr.ib(factory=list)
+    delete_nodes: List[UUID] = attr.ib(factory=list)
+    rename_nodes: List[Tuple[UUID, str]] = attr.ib(factory=list)
+    rebuild_nodes: List[UUID] = attr.ib(factory=list)
+    """Nodes having lost some of their maya nodes."""
+
+    create_ports: List[Port] = attr.ib(factory=list)
+    delete_ports: List[UUID] = attr.ib(factory=list)
+    restore_attributes: List[UUID] = attr.ib(factory=list)
+    """Ports whose maya attribute is missing."""
+
+    create_connections: List[Connection] = attr.ib(factory=list)
+    delete_connections: List[UUID] = attr.ib(factory=list)
+    restore_connections: List[UUID] = attr.ib(factory=list)
+    """Connections missing from the maya scene."""
+    remove_connections: List[Tuple[UUID, UUID]] = attr.ib(factory=list)
+    """Maya connections between the attributes of two ports the state doesn't
+    connect, by source and target port UUID."""
+
+    update_values: List[Tuple[UUID, Any]] = attr.ib(factory=list)
+    """Ports whose maya attribute doesn't hold the port value."""
+
+    def __len__(self) -> int:
+        return sum(self.summary().values())
+
+    def summary(self) -> Dict[str, int]:
+        """Return the number of edits of each kind."""
+        return {
+            field.name: len(getattr(self, field.name))
+            for field in attr.fields(type(self))
+        }
+
+
+def plan_resync(om_state: OMState) -> ResyncPlan:
+    """Compute the edits bringing an OMState and its maya scene back in sync."""
+    state = om_state.state()
+    om_graphs = om_state.om_graphs()
+    om_nodes = om_state.om_nodes()
+    om_ports = om_state.om_ports()
+    om_connections = om_state.om_connections()
+    plan = ResyncPlan()
+
+    graphs = {graph.uuid(): graph for graph in state.graphs()}
+    plan.create_graphs = [
+        graph for graph_id, graph in graphs.items() if graph_id not in om_graphs
+    ]
+    plan.delete_graphs = [graph_id for graph_id in om_graphs if graph_id not in graphs]
+
+    nodes = {node.uuid(): node for node in state.nodes()}
+    plan.create_nodes = [
+        node for node_id, node in nodes.items() if node_id not in om_nodes
+    ]
+    synced_nodes = []
+    for node_id, om_node in om_nodes.items():
+        node = nodes.get(node_id)
+        if node is None:
+            plan.delete_nodes.append(node_id)
+        elif not all(maya_node.exists for maya_node in om_node.maya_nodes()):
+            plan.rebuild_nodes.append((node_id, node.name()))
+        else:
+            synced_nodes.append(om_node)
+            if node.name() != om_node.name():
+                plan.rename_nodes.append((node_id, node.name()))
+    rebuilt = {node_id for node_id, _ in plan.rebuild_nodes}
+
+    connections = {connection.uuid(): connection for connection in state.connections()}
+    connected = {connection.target().uuid() for connection in connections.values()}
+
+    ports = {port.uuid(): port for port in state.ports()}
+    for port_id, port in ports.items():
+        if port_id not in om_ports:
+            plan.create_ports.append(port)
+            value = port.get()
+            if value != type_default(port.type()):
+                plan.update_values.append((port_id, value))
+    for port_id, om_port in om_ports.items():
+        port = ports.get(port_id)
+        if port is None:
+            plan.delete_ports.append(port_id)
+            continue
+        if not om_port.is_materialized():
+            continue
+
+        value = port.get()
+        attribute_name = leaf_attribute_name(om_port.maya_attribute_name())
+        if om_port.om_node().uuid() in rebuilt or not (
+            om_port.maya_node().has_attr(attribute_name)
+        ):
+            plan.restore_attributes.append(port_id)
+            if value != type_default(port.type()):
+                plan.update_values.append((port_id, value))
+        elif port_id not in connected:
+            maya_attribute = om_port.writable_maya_attribute()
+            if maya_attribute is not None and maya_attribute.read() != value:
+                plan.update_values.append((port_id, value))
+
+    maya_connections = maya_port_connections(om_state, synced_nodes)
+    plan.create_connections = [
+        connection
+        for connection_id, connection in connections.items()
+        if connection_id not in om_connections
+    ]
+    synced_pairs = set()
+    released = set()
+    for connection_id, om_connection in om_connections.items():
+        connection = connections.get(connection_id)
+        if connection is None:
+            plan.delete_connections.append(connection_id)
+            released.update(target.uuid() for _, target in om_connection.maya_pairs())
+            continue
+        pairs = [
+            (source.uuid(), target.uuid())
+            for source, target in om_connection.maya_pairs()
+        ]
+        synced_pairs.update(pairs)
+        if any(pair not in maya_connections for pair in pairs):
+            plan.restore_connections.append(connection_id)
+    for pair, (source, target) in maya_connections.items():
+        if pair not in synced_pairs and (
+            source.uuid() not in ports
+            or target.uuid() not in ports
+            or source.om_node() is not target.om_node()
+        ):
+            plan.remove_connections.append(pair)
+            released.add(target.uuid())
+
+    # Maya keeps the last value of a disconnected attribute, the ports
+    # losing their input get their own value back.
+    updated = {port_id for port_id, _ in plan.update_values}
+    for port_id in released - connected - updated:
+        port = ports.get(port_id)
+        if port is not None and om_ports[port_id].is_materialized():
+            plan.update_values.append((port_id, port.get()))
+
+    return plan
+
+
+def apply_resync(om_state: OMState, plan: ResyncPlan) -> None:
+    """Apply a resync plan to an OMState, deletions are applied before anything
+    is created.
+
+    Deleting first keeps the maya nodes of the rebuilt nodes from getting
+    the names of their leftovers.
+    """
+    om_graphs = om_state.om_graphs()
+    om_nodes = om_state.om_nodes()
+    om_ports = om_state.om_ports()
+    om_connections = om_state.om_connections()
+    with om_state.batch() as modifier:
+        for source_id, target_id in plan.remove_connections:
+            modifier.disconnect(
+                om_ports[source_id].maya_attribute_getter(),
+                om_ports[target_id].maya_attribute_getter(),
+            )
+        for connection_id in plan.delete_connections:
+            om_state.unregister_om_connection(connection_id)
+        for port_id in plan.delete_ports:
+            om_state.delete_om_port(om_ports[port_id])
+        for node_id in plan.delete_nodes:
+            om_state.delete_om_node(om_nodes[node_id])
+        for graph_id in plan.delete_graphs:
+            om_state.delete_om_graph(om_graphs[graph_id])
+        for node_id, _ in plan.rebuild_nodes:
+            om_node = om_nodes[node_id]
+            for om_port in om_node.om_ports():
+                om_state.unregister_maya_attribute(
+                    om_port.maya_node(), om_port.maya_attribute_name()
+                )
+            om_node.delete()
+
+    with om_state.batch():
+        for graph in plan.create_graphs:
+            om_state.create_om_graph(graph)
+        for node in plan.create_nodes:
+            om_state.create_om_node(node)
+        for node_id, name in plan.rename_nodes:
+            om_nodes[node_id].set_name(name)
+        for node_id, name in plan.rebuild_nodes:
+            om_nodes[node_id].rebuild(name)
+        for port in plan.create_ports:
+            om_nodes[port.node().uuid()].register_port(port)
+            om_state.create_om_port(port)
+        for port_id in plan.restore_attributes:
+            om_ports[port_id].restore_maya_attribute()
+        for connection in plan.create_connections:
+            om_state.create_om_connection(connection)
+        for connection_id in plan.restore_connections:
+            om_connections[connection_id].build()
+        for port_id, value in plan.update_values:
+            om_port = om_ports[port_id]
+            if om_port.is_virtual():
+                om_state.set_virtual_value(port_id, value)
+                continue
+            om_port.materialize()
+            om_state.queue_write(port_id, value)
+
+
+def maya_port_connections(
+    om_state: OMState, om_nodes: List[OMNode]
+) -> Dict[Tuple[UUID, UUID], Tuple[OMPort, OMPort]]:
+    """Return the maya connections between port attributes received by nodes.
+
+    Connections are mapped by source and target port UUIDs.
+    """
+    connections: Dict[Tuple[UUID, UUID], Tuple[OMPort, OMPort]] = {}
+    for om_node in om_nodes:
+        for maya_node in om_node.io_nodes():
+            plugs = cmds.listConnections(
+                maya_node.path(),
+                source=True,
+                destination=False,
+                connections=True,
+                plugs=True,
+            )
+            plugs = plugs or []
+            for target_path, source_path in zip(plugs[::2], plugs[1::2]):
+                source = _om_port_from_path(om_state, source_path)
+                target = _om_port_from_path(om_state, target_path)
+                if source is not None and target is not None:
+                    connections[(source.uuid(), target.uuid())] = (source, target)
+    return connections
+
+
+def _om_port_from_path(om_state: OMState, plug_path: str) -> Optional[OMPort]:
+    node_path, _, attribute_name = plug_path.partition(".")
+    return om_state.om_port_from_attribute(
+        cmdx.encode(node_path).hashCode, leaf_attribute_name(attribute_name)
+    )
+
+
+__all__ = ["ResyncPlan", "apply_resync", "maya_port_connections", "plan_resync"]
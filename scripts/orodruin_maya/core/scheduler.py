@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any, Callable, Deque, Optional, Tuple
+
+import attr
+from maya import utils
+from orodruin.core.signal import Signal
+
+if TYPE_CHECKING:
+    from .state import OMState
+
+logger = logging.getLogger(__name__)
+
+WorkItem = Tuple[Callable[..., Any], Tuple[Any, ...]]
+
+
+@attr.s
+class OMScheduler:
+    """Apply the work queued by a deferred OMState a time slice at a time.
+
+    The handlers of a deferred OMState queue their work here instead of running
+    within orodruin's event emission. Each tick runs on maya's idle queue and
+    applies work items, then the maya edits they queued, within its time budget
+    so maya stays responsive while a large graph is built. Every tick measures
+    how long a maya edit takes to apply, the next ones stop applying work items
+    once the edits queued so far would use the rest of the budget.
+
+    The idle queue defaults to `maya.utils.executeDeferred`.
+    """
+
+    _om_state: OMState = attr.ib()
+    _budget: float = attr.ib(default=0.02)
+    _idle_queue: Optional[Callable[[Callable[[], None]], None]] = attr.ib(default=None)
+
+    progress_changed: Signal[Tuple[int, int]] = attr.ib(init=False, factory=Signal)
+
+    _queue: Deque[WorkItem] = attr.ib(init=False, factory=deque)
+    _done: int = attr.ib(init=False, default=0)
+    _total: int = attr.ib(init=False, default=0)
+    _tick_scheduled: bool = attr.ib(init=False, default=False)
+    _applying: bool = attr.ib(init=False, default=False)
+    _edit_cost: Optional[float] = attr.ib(init=False, default=None)
+
+    def budget(self) -> float:
+        """Return the time in seconds a tick can spend applying work items."""
+        return self._budget
+
+    def set_budget(self, budget: float) -> None:
+        self._budget = budget
+
+    def progress(self) -> Tuple[int, int]:
+        """Return how many work items were applied and queued since the last drain."""
+        return self._done, self._total
+
+    def pending(self) -> int:
+        """Return the number of work items waiting to be applied."""
+        return len(self._queue)
+
+    def queue(self, function: Callable[..., Any], *args: Any) -> None:
+        """Queue a work item, it will be applied by one of the next ticks."""
+        self._queue.append((function, args))
+        self._total += 1
+        self._schedule_tick()
+
+    def tick(self) -> None:
+        """Apply work items and their edits until the time budget is spent.
+
+        The edits are applied in slices, each taking at most half of the time
+        left by estimate, so a wrong estimate only costs part of the budget.
+        """
+        self._tick_scheduled = False
+        deadline = time.perf_counter() + self._budget
+        while True:
+            self._apply(deadline)
+            self._apply_edits()
+            remaining = deadline - time.perf_counter()
+            if not self._queue or remaining < self._budget / 4:
+                break
+
+        if self._queue:
+            self._schedule_tick()
+
+    def flush(self) -> None:
+        """Apply every queued work item right away, whatever the time budget."""
+        while self._queue and not self._applying:
+            self._apply(None)
+
+    def _apply(self, deadline: Optional[float]) -> None:
+        """Apply work items until the deadline, leaving time for their edits.
+
+        Before the first edits are measured, only a tenth of the time left is
+        spent so the first slice doesn't run over the budget.
+        """
+        if self._applying or not self._queue:
+            return
+
+        edit_cost = self._edit_cost
+        if deadline is not None and edit_cost is None:
+            now = time.perf_counter()
+            deadline = now + (deadline - now) / 10
+            edit_cost = 0.0
+
+        self._applying = True
+        try:
+            with self._om_state.batch(deferred=True):
+                while self._queue:
+                    function, args = self._queue.popleft()
+                    function(*args)
+                    self._done += 1
+                    if deadline is None:
+                        continue
+                    edits_time = self._om_state.pending_edits() * edit_cost
+                    if edits_time >= self._budget / 8 or (
+                        time.perf_counter() + 2 * edits_time >= deadline
+                    ):
+                        break
+        finally:
+            self._applying = False
+
+        self.progress_changed.emit(self.progress())
+        logger.debug("Applied %s/%s deferred work items.", self._done, self._total)
+
+        if not self._queue:
+            self._done = 0
+            self._total = 0
+
+    def _apply_edits(self) -> None:
+        """Apply the edits of the work items and measure how long an edit takes."""
+        edits = self._om_state.pending_edits()
+        start = time.perf_counter()
+        self._om_state.apply_modifier()
+        if edits:
+            edit_cost = (time.perf_counter() - start) / edits
+            # Costlier edits are accounted for straight away, cheaper ones slowly.
+            if self._edit_cost is not None:
+                edit_cost = max(edit_cost, self._edit_cost * 0.9)
+            self._edit_cost = edit_cost
+
+    def _schedule_tick(self) -> None:
+        if not self._tick_scheduled and not self._applying:
+            self._tick_scheduled = True
+            idle_queue = self._idle_queue or utils.executeDeferred
+            idle_queue(self.tick)
+
+
+__all__ = ["OMScheduler"]
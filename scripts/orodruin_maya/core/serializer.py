@@ -1,22 +1,52 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, Any, Dict
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Tuple
 
 import attr
+from maya import cmds, utils
 from orodruin.core import SerializationType, Serializer
 
+from .codec import values_from_maya
+
 if TYPE_CHECKING:
+    from uuid import UUID
+
     from orodruin.core import Connection, Graph, Node, Port
+    from orodruin.core.port.port import PortType
+    from orodruin_maya.core.node import OMNode
     from orodruin_maya.core.state import OMState
 
+_NOT_READ = object()
+
 
 @attr.s
 class MayaSerializer(Serializer):
+    """Serialize the port values from their maya attributes.
+
+    The attributes of a node are read in one batch, the first time one of its
+    ports is serialized, or for every node of a graph when the graph itself is.
+    Each serialized graph reads the values again, after flushing the pending
+    edits. The values are kept until maya is idle, the OMState applies a
+    modifier, or the port is written or edited in maya.
+    Ports keeping the last known value of their attribute aren't read again
+    unless it was edited in maya, see `OMPort.peek_maya_value`. Vector and
+    matrix values are serialized as tuples of floats, see `ValueCodec`.
+    """
+
     _om_state: OMState = attr.ib()
 
+    _values: Dict[UUID, Any] = attr.ib(init=False, factory=dict)
+    _clear_scheduled: bool = attr.ib(init=False, default=False)
+    _interactive: bool = attr.ib(init=False, factory=lambda: not cmds.about(batch=True))
+
     def serialize_graph(
         self, graph: Graph, serialization_type: SerializationType
     ) -> Dict[str, Any]:
+        # Values read by a previous save may be stale, e.g. from maya edits
+        # not received in batch mode.
+        self._om_state.flush()
+        self.clear()
+        self.read_nodes(self._om_state.get_om_node(node) for node in graph.nodes())
         return {}
 
     def serialize_node(
@@ -27,16 +57,19 @@ class MayaSerializer(Serializer):
     def serialize_port(
         self, port: Port, serialization_type: SerializationType
     ) -> Dict[str, Any]:
-        if serialization_type is SerializationType.instance:
-            om_port = self._om_state.get_om_port(port)
-            value = om_port.maya_attribute().read()
-            data = {"value": value}
-        else:
+        value = self._values.get(port.uuid(), _NOT_READ)
+        if value is _NOT_READ:
             om_port = self._om_state.get_om_port(port)
-            value = om_port.maya_attribute().read()
-            data = {"default_value": value}
+            if om_port.is_materialized():
+                self.read_nodes([om_port.om_node()])
+                value = self._values[port.uuid()]
+            else:
+                # Lazy attributes that were never created still hold the port value.
+                value = port.get()
 
-        return data
+        if serialization_type is SerializationType.instance:
+            return {"value": value}
+        return {"default_value": value}
 
     def serialize_connection(
         self,
@@ -45,3 +78,40 @@ class MayaSerializer(Serializer):
         serialization_type: SerializationType,
     ) -> Dict[str, Any]:
         return {}
+
+    def read_nodes(self, om_nodes: Iterable[OMNode]) -> None:
+        """Read the values of every materialized port of the nodes."""
+        om_nodes = list(om_nodes)
+        if not om_nodes:
+            return
+        self._om_state.flush()
+
+        # Values are converted to plain data in one batch per port type.
+        typed_reads: Dict[PortType, Tuple[List[UUID], List[Any]]] = {}
+        for om_node in om_nodes:
+            for om_port in om_node.om_ports():
+                if om_port.is_materialized():
+                    port_type = om_port.type()
+                    if port_type not in typed_reads:
+                        typed_reads[port_type] = ([], [])
+                    port_ids, values = typed_reads[port_type]
+                    port_ids.append(om_port.uuid())
+                    values.append(om_port.peek_maya_value())
+        for port_type, (port_ids, values) in typed_reads.items():
+            self._values.update(zip(port_ids, values_from_maya(port_type, values)))
+
+        if self._interactive and not self._clear_scheduled:
+            self._clear_scheduled = True
+            utils.executeDeferred(self.clear)
+
+    def forget(self, port_id: UUID) -> None:
+        """Forget the value read for a port, e.g. once a new value is queued."""
+        self._values.pop(port_id, None)
+
+    def clear(self) -> None:
+        """Forget the values read so far, e.g. once the maya scene is edited."""
+        self._clear_scheduled = False
+        self._values.clear()
+
+
+__all__ = ["MayaSerializer"]
@@ -1,38 +1,158 @@
 from __future__ import annotations
 
+import functools
 import logging
-from importlib.util import module_from_spec, source_from_cache, spec_from_file_location
-from typing import Dict, List
+from contextlib import contextmanager, nullcontext
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ContextManager,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypeVar,
+)
 from uuid import UUID
 
 import attr
-from maya import cmds
+import cmdx
+from maya import cmds, utils
 from orodruin.core import Connection, Graph, Node, Port, State
-from orodruin.core.library import LibraryManager
-from orodruin_editor import GraphicsState
+from orodruin.core.port.port import PortType
 
+from .codec import values_to_maya
 from .connection import OMConnection, OMConnectionLike
 from .graph import OMGraph, OMGraphLike
-from .node import OMGroupNode, OMNode, OMNodeLike
-from .port import OMPort, OMPortLike
+from .library import find_om_node_class, warm_up_library_index
+from .maya_edits import MayaEditReceiver
+from .modifier import OMModifier
+from .node import OMFlatGroupNode, OMGroupNode, OMNode, OMNodeLike
+from .port import OMPort, OMPortLike, leaf_attribute_name, type_default
+from .profiler import OMProfiler, node_type_of, profiled
+from .prototype import OMPrototype, PrototypeRecorder, is_clonable
+from .resync import ResyncPlan, apply_resync, maya_port_connections, plan_resync
+from .scheduler import OMScheduler
 from .serializer import MayaSerializer
+from .tags import SceneTags, TaggedNodes
+from .template import AttributeTemplate, TemplateKey
+
+if TYPE_CHECKING:
+    from orodruin_editor import GraphicsState
 
 logger = logging.getLogger(__name__)
 
+HandlerFunc = TypeVar("HandlerFunc", bound=Callable[..., Any])
+
+
+def batched(method: HandlerFunc) -> HandlerFunc:
+    """Decorate an OMState event handler so its maya edits join the current burst.
+
+    Deferred OMStates queue the handler on their scheduler instead.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self: OMState, *args: Any) -> Any:
+        if self._scheduler is not None:
+            self._scheduler.queue(method, self, *args)
+            return None
+        with self.batch(deferred=True):
+            return method(self, *args)
+
+    return wrapper  # type: ignore
+
 
 @attr.s
 class OMState:
-    """Orodruin Maya State class handling the events from the Orodruin State"""
+    """Orodruin Maya State class handling the events from the Orodruin State
+
+    The editor state is optional, without it the OMState runs headless
+    and the maya selection isn't synced with the editor's.
+
+    A deferred OMState doesn't handle the events as they are emitted but queues
+    them on an OMScheduler applying them while maya is idle, see `scheduler`.
+
+    The handlers can be timed with an OMProfiler, see `enable_profiling`.
+
+    With lazy attributes, maya attributes are only created for the ports that
+    need one, see `OMPort.materialize`.
+    Otherwise the attribute layout of a library node type is recorded from its
+    first instance and reused by the next ones, see `AttributeTemplate`.
+    OMNodes are cloned from a prototype of their class unless prototypes
+    is False, see `build_om_node`.
+
+    The maya nodes are tagged with the UUIDs of their orodruin node and ports
+    unless tag_scene is False, so a new OMState can `attach` to them.
+
+    With flatten_groups, group nodes build no maya node and the connections
+    going through their ports are made straight between the ports they
+    resolve to, see `resolve_source`.
+
+    With shadow_values, the maya nodes are watched for attribute changes so
+    the ports can keep their last known value, see `OMPort.read_maya_value`.
+    With receive_maya_edits, attributes edited in maya set their orodruin port
+    once maya is idle, see `MayaEditReceiver`.
+
+    In batch mode maya is never idle: the maya edits are collected until
+    `flush` is called or an explicit `batch` exits, mayapy scripts should wrap
+    their edits in `batch`.
+    """
 
     _state: State = attr.ib()
-    _editor_state: GraphicsState = attr.ib()
+    _editor_state: Optional[GraphicsState] = attr.ib(default=None)
+    _deferred: bool = attr.ib(default=False)
+    _lazy_attributes: bool = attr.ib(default=False)
+    _attribute_templates: bool = attr.ib(default=True)
+    _prototypes: bool = attr.ib(default=True)
+    _tag_scene: bool = attr.ib(default=True)
+    _flatten_groups: bool = attr.ib(default=False)
+    _shadow_values: bool = attr.ib(default=True)
+    _receive_maya_edits: bool = attr.ib(default=True)
 
     _om_graphs: Dict[UUID, OMGraph] = attr.ib(init=False, factory=dict)
     _om_nodes: Dict[UUID, OMNode] = attr.ib(init=False, factory=dict)
     _om_ports: Dict[UUID, OMPort] = attr.ib(init=False, factory=dict)
     _om_connections: Dict[UUID, OMConnection] = attr.ib(init=False, factory=dict)
 
+    _maya_node_index: Dict[int, UUID] = attr.ib(init=False, factory=dict)
+    _maya_attribute_index: Dict[Tuple[int, str], UUID] = attr.ib(
+        init=False, factory=dict
+    )
+
+    _templates: Dict[TemplateKey, AttributeTemplate] = attr.ib(init=False, factory=dict)
+    _template_sources: Dict[TemplateKey, UUID] = attr.ib(init=False, factory=dict)
+    _node_prototypes: Dict[Type[OMNode], Optional[OMPrototype]] = attr.ib(
+        init=False, factory=dict
+    )
+    _recorder: Optional[PrototypeRecorder] = attr.ib(init=False, default=None)
+    _adopted: Dict[UUID, TaggedNodes] = attr.ib(init=False, factory=dict)
+
+    _virtual_upstream: Dict[UUID, UUID] = attr.ib(init=False, factory=dict)
+    _virtual_downstream: Dict[UUID, Set[UUID]] = attr.ib(init=False, factory=dict)
+    _virtual_values: Dict[UUID, Any] = attr.ib(init=False, factory=dict)
+    _dirty_tags: Set[UUID] = attr.ib(init=False, factory=set)
+    _templated_nodes: Set[UUID] = attr.ib(init=False, factory=set)
+    _unwatched: Set[UUID] = attr.ib(init=False, factory=set)
+
+    _serializer: MayaSerializer = attr.ib(init=False)
+    _maya_edit_receiver: MayaEditReceiver = attr.ib(init=False)
+    _scheduler: Optional[OMScheduler] = attr.ib(init=False, default=None)
+    _profiler: Optional[OMProfiler] = attr.ib(init=False, default=None)
+    _modifier: Optional[OMModifier] = attr.ib(init=False, default=None)
+    _pending_writes: Dict[UUID, Any] = attr.ib(init=False, factory=dict)
+    _batch_depth: int = attr.ib(init=False, default=0)
+    _flush_scheduled: bool = attr.ib(init=False, default=False)
+    _applying: bool = attr.ib(init=False, default=False)
+    _interactive: bool = attr.ib(init=False, factory=lambda: not cmds.about(batch=True))
+
     def __attrs_post_init__(self) -> None:
+        if self._deferred:
+            self._scheduler = OMScheduler(self)
+
         self._state.graph_created.subscribe(self.create_om_graph)
         self._state.graph_deleted.subscribe(self.delete_om_graph)
         self._state.node_created.subscribe(self.create_om_node)
@@ -41,13 +161,411 @@ class OMState:
         self._state.port_deleted.subscribe(self.delete_om_port)
         self._state.connection_created.subscribe(self.create_om_connection)
         self._state.connection_deleted.subscribe(self.delete_om_connection)
-        self._editor_state.selection_changed.subscribe(self.select_nodes)
-
-        self._state.register_serializer(MayaSerializer(self))
+        if self._editor_state is not None:
+            self._editor_state.selection_changed.subscribe(self.select_nodes)
+
+        self._serializer = MayaSerializer(self)
+        self._state.register_serializer(self._serializer)
+        self._maya_edit_receiver = MayaEditReceiver(self, self._receive_maya_edits)
+
+        warm_up_library_index()
+
+    @classmethod
+    def attach(
+        cls,
+        state: State,
+        editor_state: Optional[GraphicsState] = None,
+        **options: Any,
+    ) -> OMState:
+        """Create an OMState reusing the maya nodes a previous OMState tagged.
+
+        The scene is reconciled with the state in a single pass: tagged nodes,
+        attributes and connections matching the state are reused, the missing
+        ones are created and the ones the state doesn't have anymore are
+        deleted. Tagged nodes built by another OMNode class are rebuilt.
+        Options are the same as the OMState's.
+        """
+        deferred = options.pop("deferred", False)
+        scene_tags = SceneTags.scan()
+        node_ids = {node.uuid() for node in state.nodes()}
+
+        om_state = cls(state, editor_state, **options)
+        orphan_nodes = scene_tags.orphan_nodes(node_ids)
+        if orphan_nodes:
+            with om_state.batch() as modifier:
+                modifier.delete_nodes(orphan_nodes)
+
+        om_state._adopted = scene_tags.adoptable(node_ids)
+        try:
+            with om_state.batch():
+                om_state._reconcile(scene_tags)
+        finally:
+            om_state._adopted = {}
+
+        if deferred:
+            om_state._scheduler = OMScheduler(om_state)
+        return om_state
+
+    def _reconcile(self, scene_tags: SceneTags) -> None:
+        """Create the OM objects of every orodruin object, adopting tagged nodes.
+
+        Tagged attributes are reused by the ports, see `OMPort.materialize`,
+        the values of the ports missing an attribute are written.
+        """
+        adoptable = list(self._adopted)
+        for graph in self._state.graphs():
+            self.create_om_graph(graph)
+        for node in self._state.nodes():
+            self.create_om_node(node)
+
+        modifier = self.modifier()
+        rebuilt, self._adopted = self._adopted, {}
+        for tagged in rebuilt.values():
+            modifier.delete_nodes(tagged.maya_nodes())
+        adopted = [
+            self._om_nodes[node_id] for node_id in adoptable if node_id not in rebuilt
+        ]
+
+        for port in self._state.ports():
+            self.create_om_port(port)
+            om_port = self._om_ports[port.uuid()]
+            if om_port.is_virtual():
+                self._virtual_values[port.uuid()] = port.get()
+                continue
+            if scene_tags.has_port_attribute(port.uuid()):
+                om_port.materialize()
+                continue
+            value = port.get()
+            if value != type_default(port.type()):
+                om_port.materialize()
+                self.queue_write(port.uuid(), value)
+
+        self._reconcile_connections(adopted)
+
+        for om_node in adopted:
+            port_tags = om_node.port_tags()
+            scene_port_tags = {}
+            for maya_node in om_node.io_nodes():
+                attribute_tags = scene_tags.port_tags(maya_node)
+                scene_port_tags[maya_node.hashCode] = attribute_tags
+                for attribute in attribute_tags:
+                    if attribute not in port_tags[maya_node.hashCode]:
+                        modifier.delete_attr(maya_node, attribute)
+            if port_tags == scene_port_tags:
+                self._dirty_tags.discard(om_node.uuid())
+
+    def _reconcile_connections(self, adopted: List[OMNode]) -> None:
+        """Create the orodruin connections missing from the adopted maya nodes.
+
+        Maya connections between the ports of two different OMNodes that the
+        state doesn't have anymore are removed first.
+        """
+        existing = maya_port_connections(self, adopted)
+        om_connections = [
+            self._register_om_connection(connection)
+            for connection in self._state.connections()
+        ]
+        maya_pairs = [
+            (
+                om_connection,
+                [
+                    (source.uuid(), target.uuid())
+                    for source, target in om_connection.maya_pairs()
+                ],
+            )
+            for om_connection in om_connections
+        ]
+        kept = {pair for _, pairs in maya_pairs for pair in pairs}
+        modifier = self.modifier()
+        for key, (source, target) in existing.items():
+            if key not in kept and source.om_node() is not target.om_node():
+                modifier.disconnect(
+                    source.maya_attribute_getter(), target.maya_attribute_getter()
+                )
+
+        for om_connection, pairs in maya_pairs:
+            if any(pair not in existing for pair in pairs):
+                om_connection.build()
+
+    def resync(self, dry_run: bool = False) -> ResyncPlan:
+        """Bring the OM objects and the maya scene back in sync with the state.
+
+        Use it once the two have diverged, e.g. after manual maya edits or when
+        the orodruin events weren't handled. Pending events are flushed first,
+        then the edit plan is computed in a single pass and only its edits are
+        applied, unless dry_run is True.
+        Return the plan, its length is its number of edits.
+        """
+        self.flush()
+        plan = plan_resync(self)
+        logger.debug("Resync plan: %s.", plan.summary())
+        if dry_run or not plan:
+            return plan
+
+        # The plan is applied right away, even by deferred OMStates.
+        scheduler, self._scheduler = self._scheduler, None
+        try:
+            apply_resync(self, plan)
+        finally:
+            self._scheduler = scheduler
+        return plan
 
     def state(self) -> State:
         return self._state
 
+    def om_graphs(self) -> Dict[UUID, OMGraph]:
+        """Return the OMGraphs by UUID, the mapping must not be modified."""
+        return self._om_graphs
+
+    def om_nodes(self) -> Dict[UUID, OMNode]:
+        """Return the OMNodes by UUID, the mapping must not be modified."""
+        return self._om_nodes
+
+    def om_ports(self) -> Dict[UUID, OMPort]:
+        """Return the OMPorts by UUID, the mapping must not be modified."""
+        return self._om_ports
+
+    def om_connections(self) -> Dict[UUID, OMConnection]:
+        """Return the OMConnections by UUID, the mapping must not be modified."""
+        return self._om_connections
+
+    def shadow_values(self) -> bool:
+        """Return True if the ports keep the last known value of their attribute."""
+        return self._shadow_values
+
+    def lazy_attributes(self) -> bool:
+        """Return True if maya attributes are only created when needed."""
+        return self._lazy_attributes
+
+    def serializer(self) -> MayaSerializer:
+        """Return the serializer reading the port values from maya."""
+        return self._serializer
+
+    def scheduler(self) -> Optional[OMScheduler]:
+        """Return the scheduler applying the events of a deferred OMState."""
+        return self._scheduler
+
+    def pending_edits(self) -> int:
+        """Return the number of maya edits waiting for the modifier to be applied."""
+        edits = len(self._modifier) if self._modifier is not None else 0
+        return (
+            edits
+            + len(self._pending_writes)
+            + len(self._dirty_tags)
+            + len(self._templated_nodes)
+        )
+
+    def has_pending_attributes(self, maya_node: cmdx.Node, node_id: UUID) -> bool:
+        """Return True if attributes of a maya node wait for the modifier.
+
+        The maya node is one of the nodes of the OMNode of the given id.
+        """
+        return node_id in self._templated_nodes or (
+            self._modifier is not None and self._modifier.edits_node(maya_node)
+        )
+
+    def subscription_count(self) -> int:
+        """Return how many orodruin signals the OMNodes and OMPorts handle."""
+        return sum(
+            om_node.subscription_count() for om_node in self._om_nodes.values()
+        ) + sum(om_port.subscription_count() for om_port in self._om_ports.values())
+
+    def profiler(self) -> Optional[OMProfiler]:
+        """Return the profiler recording the handlers, if profiling is enabled."""
+        return self._profiler
+
+    def enable_profiling(self) -> OMProfiler:
+        """Start recording the calls of the handlers and return the profiler.
+
+        Profiling is opt-in as it adds overhead to every handler.
+        """
+        if self._profiler is None:
+            self._profiler = OMProfiler()
+        return self._profiler
+
+    def disable_profiling(self) -> Optional[OMProfiler]:
+        """Stop recording the handlers and return the profiler with its records."""
+        profiler, self._profiler = self._profiler, None
+        return profiler
+
+    def measure(self, handler: str, node_type: str = "") -> ContextManager[None]:
+        """Return a context recording its code under the given handler name."""
+        if self._profiler is None:
+            return nullcontext()
+        return self._profiler.measure(handler, node_type)
+
+    def modifier(self) -> OMModifier:
+        """Return the modifier collecting the maya edits of the current burst.
+
+        Outside of a batch, the modifier is applied once maya is idle.
+        Maya has no idle queue in batch mode so `flush` has to be called instead.
+        """
+        if self._modifier is None:
+            self._modifier = OMModifier(self._profiler)
+        if not self._batch_depth:
+            self._schedule_flush()
+        if self._recorder is not None:
+            return self._recorder  # type: ignore
+        return self._modifier
+
+    @contextmanager
+    def batch(self, deferred: bool = False) -> Iterator[OMModifier]:
+        """Collect every maya edit made within the context in a single modifier.
+
+        The OMState is flushed when the outermost batch exits.
+        Deferred batches keep the modifier open until maya is idle instead so a
+        whole burst of orodruin events end up in the same modifier. In batch
+        mode, where maya has no idle queue, the modifier stays open until
+        `flush` is called or an outermost batch that isn't deferred exits.
+        """
+        self._batch_depth += 1
+        try:
+            yield self.modifier()
+        finally:
+            self._batch_depth -= 1
+            if not self._batch_depth:
+                if not deferred:
+                    self.flush()
+                else:
+                    self._schedule_flush()
+
+    def queue_write(self, port: OMPortLike, value: Any) -> None:
+        """Queue a value to write to the maya attribute of a port.
+
+        Only the last value queued for each port is written, once the
+        pending writes are flushed along with the modifier. A maya edit of the
+        attribute not received yet is dropped, the queued value being newer.
+        """
+        port_id = self.get_om_port(port).uuid()
+        self._pending_writes[port_id] = value
+        self._maya_edit_receiver.discard(port_id)
+        self._serializer.forget(port_id)
+        if not self._batch_depth:
+            self._schedule_flush()
+
+    def discard_write(self, port_id: UUID) -> None:
+        """Drop the value queued for a port, e.g. once its attribute is edited."""
+        self._pending_writes.pop(port_id, None)
+
+    def is_applying(self) -> bool:
+        """Return True while the modifier is applied, see `apply_modifier`."""
+        return self._applying
+
+    def invalidate_templated_attributes(self, node_id: UUID) -> None:
+        """Queue the creation of the attributes a node claimed from its template.
+
+        The attributes are created at once, when the modifier is applied.
+        """
+        self._templated_nodes.add(node_id)
+        if not self._batch_depth:
+            self._schedule_flush()
+
+    def invalidate_port_tags(self, node_id: UUID) -> None:
+        """Queue the rewrite of the port tags of a node, e.g. when a port is added.
+
+        The tags are written once, when the modifier is applied.
+        """
+        if not self._tag_scene:
+            return
+        self._dirty_tags.add(node_id)
+        if not self._batch_depth:
+            self._schedule_flush()
+
+    def flush(self) -> Optional[OMModifier]:
+        """Apply every pending event, edit and write right away.
+
+        This is a barrier for deferred OMStates: the queued events are applied
+        whatever the time budget of their scheduler.
+        Return the applied modifier so it can be undone.
+        """
+        if self._scheduler is not None:
+            self._scheduler.flush()
+        return self.apply_modifier()
+
+    @profiled
+    def apply_modifier(self) -> Optional[OMModifier]:
+        """Apply the pending modifier and writes, return the modifier to undo them.
+
+        Unlike `flush`, events still queued on the scheduler are left untouched.
+        """
+        self._flush_scheduled = False
+        modifier, self._modifier = self._modifier, None
+        writes: Dict[UUID, Any] = {}
+
+        if self._pending_writes:
+            modifier = modifier or OMModifier(self._profiler)
+            writes, self._pending_writes = self._pending_writes, {}
+            # Values are converted to maya data in one batch per port type.
+            typed_writes: Dict[PortType, List[Tuple[OMPort, Any]]] = {}
+            for uuid, value in writes.items():
+                om_port = self._om_ports.get(uuid)
+                if om_port is not None:
+                    typed_writes.setdefault(om_port.type(), []).append((om_port, value))
+            for port_type, port_writes in typed_writes.items():
+                maya_values = values_to_maya(
+                    port_type, [value for _, value in port_writes]
+                )
+                for (om_port, _), maya_value in zip(port_writes, maya_values):
+                    if om_port.is_array():
+                        modifier.set_array(
+                            om_port.writable_maya_attribute,
+                            maya_value,
+                            om_port.known_value(),
+                        )
+                    else:
+                        modifier.set_attr(om_port.writable_maya_attribute, maya_value)
+
+        if self._templated_nodes:
+            modifier = modifier or OMModifier(self._profiler)
+            templated_nodes, self._templated_nodes = self._templated_nodes, set()
+            for node_id in templated_nodes:
+                om_node = self._om_nodes.get(node_id)
+                if om_node is not None:
+                    om_node.queue_templated_attributes(modifier)
+
+        if self._dirty_tags:
+            modifier = modifier or OMModifier(self._profiler)
+            dirty_tags, self._dirty_tags = self._dirty_tags, set()
+            for node_id in dirty_tags:
+                om_node = self._om_nodes.get(node_id)
+                if om_node is not None:
+                    om_node.queue_port_tags(modifier)
+
+        if modifier is not None:
+            # The attributes set by the modifier aren't maya edits to receive.
+            self._applying = True
+            try:
+                modifier.doIt()
+            finally:
+                self._applying = False
+            self._serializer.clear()
+            # Written after doIt, the attribute changed callbacks of the writes
+            # have already marked the ports dirty.
+            for uuid, value in writes.items():
+                om_port = self._om_ports.get(uuid)
+                if om_port is not None:
+                    om_port.record_written(value)
+
+        if self._unwatched:
+            unwatched, self._unwatched = self._unwatched, set()
+            for node_id in unwatched:
+                om_node = self._om_nodes.get(node_id)
+                if om_node is not None:
+                    om_node.watch_maya_nodes(
+                        self._maya_edit_receiver.on_attribute_changed
+                    )
+        return modifier
+
+    def _schedule_flush(self) -> None:
+        """Apply the pending modifier the next time maya is idle."""
+        if not self._interactive:
+            # executeDeferred runs its callable right away in batch mode,
+            # only batches or calls to flush apply the modifier.
+            return
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            utils.executeDeferred(self.apply_modifier)
+
     def get_om_graph(self, graph: OMGraphLike) -> OMGraph:
         """Return a OMGraph from a OMGraphLike object.
 
@@ -132,64 +650,311 @@ class OMState:
 
         return om_connection
 
+    def register_maya_node(self, maya_node: cmdx.Node, node_id: UUID) -> None:
+        """Record the OMNode owning a maya node, see `om_node_from_maya`."""
+        self._maya_node_index[maya_node.hashCode] = node_id
+
+    def unregister_maya_node(self, maya_node: cmdx.Node) -> None:
+        """Forget the OMNode owning a maya node."""
+        self._maya_node_index.pop(maya_node.hashCode, None)
+
+    def register_maya_attribute(
+        self, maya_node: cmdx.Node, attribute_name: str, port_id: UUID
+    ) -> None:
+        """Record the OMPort owning a maya attribute, see `om_port_from_maya`."""
+        key = (maya_node.hashCode, leaf_attribute_name(attribute_name))
+        self._maya_attribute_index[key] = port_id
+
+    def unregister_maya_attribute(
+        self, maya_node: cmdx.Node, attribute_name: str
+    ) -> None:
+        """Forget the OMPort owning a maya attribute."""
+        key = (maya_node.hashCode, leaf_attribute_name(attribute_name))
+        self._maya_attribute_index.pop(key, None)
+
+    def resolve_source(self, port_id: UUID) -> OMPort:
+        """Return the port whose maya attribute drives the given port.
+
+        Ports of virtual nodes are followed upstream, the returned port is
+        virtual when no port with an attribute drives the given one.
+        """
+        om_port = self._om_ports[port_id]
+        if not self._flatten_groups:
+            return om_port
+        while om_port.is_virtual():
+            source_id = self._virtual_upstream.get(om_port.uuid())
+            if source_id is None:
+                break
+            om_port = self._om_ports[source_id]
+        return om_port
+
+    def resolve_targets(self, port_id: UUID) -> List[OMPort]:
+        """Return the ports with an attribute the given port drives.
+
+        Ports of virtual nodes are followed downstream.
+        """
+        om_port = self._om_ports[port_id]
+        if not self._flatten_groups:
+            return [om_port]
+        targets = []
+        stack = [om_port]
+        while stack:
+            om_port = stack.pop()
+            if not om_port.is_virtual():
+                targets.append(om_port)
+                continue
+            for target_id in self._virtual_downstream.get(om_port.uuid(), ()):
+                stack.append(self._om_ports[target_id])
+        return targets
+
+    def set_virtual_value(self, port_id: UUID, value: Any) -> None:
+        """Record the value of a port of a virtual node and write it downstream.
+
+        The value is only written if no port with an attribute drives the port.
+        """
+        self._virtual_values[port_id] = value
+        if self.resolve_source(port_id).uuid() == port_id:
+            self.write_virtual_value(port_id, self.resolve_targets(port_id))
+
+    def write_virtual_value(self, port_id: UUID, targets: List[OMPort]) -> None:
+        """Write the value of a port of a virtual node to the given ports.
+
+        Nothing is written until the virtual port gets a value.
+        """
+        if port_id not in self._virtual_values:
+            return
+        value = self._virtual_values[port_id]
+        with self.batch(deferred=True):
+            for target in targets:
+                target.materialize()
+                self.queue_write(target.uuid(), value)
+
+    def om_node_from_maya(self, maya_node: cmdx.Node) -> Optional[OMNode]:
+        """Return the OMNode owning a maya node, if any."""
+        node_id = self._maya_node_index.get(maya_node.hashCode)
+        if node_id is None:
+            return None
+        return self._om_nodes.get(node_id)
+
+    def om_port_from_attribute(
+        self, hash_code: int, attribute_name: str
+    ) -> Optional[OMPort]:
+        """Return the OMPort owning an attribute of a maya node, if any.
+
+        The attribute name is the leaf name of the attribute, see
+        `register_maya_attribute`.
+        """
+        port_id = self._maya_attribute_index.get((hash_code, attribute_name))
+        if port_id is None:
+            return None
+        return self._om_ports.get(port_id)
+
+    def om_port_from_maya(self, plug: cmdx.Plug) -> Optional[OMPort]:
+        """Return the OMPort owning a maya plug, if any."""
+        port_id = self._maya_attribute_index.get(
+            (plug.node().hashCode, plug.name(long=True))
+        )
+        if port_id is None:
+            return None
+        return self._om_ports.get(port_id)
+
+    @profiled
     def create_om_graph(self, graph: Graph) -> None:
         om_graph = OMGraph.from_graph(self, graph)
         self._om_graphs[graph.uuid()] = om_graph
         logger.debug("Created OM graph %s.", graph.uuid())
 
+    @batched
+    @profiled
     def delete_om_graph(self, graph: Graph) -> None:
         del self._om_graphs[graph.uuid()]
         logger.debug("Deleted OM graph %s.", graph.uuid())
 
+    @batched
+    @profiled
     def create_om_node(self, node: Node) -> None:
 
-        om_node_class = OMGroupNode
+        om_node_class = OMFlatGroupNode if self._flatten_groups else OMGroupNode
         if node.library():
-            python_node_path = LibraryManager.find_node(
-                node_name=node.type(),
-                library_name=node.library().name(),
-                target_name="maya",
-                extension="py",
-            )
-            if python_node_path:
-                spec = spec_from_file_location(python_node_path.stem, python_node_path)
-                mod = module_from_spec(spec)
-                spec.loader.exec_module(mod)
-                _class = getattr(mod, python_node_path.stem)
-                if _class:
-                    om_node_class = _class
+            with self.measure("find_om_node_class", node_type_of(node)):
+                _class = find_om_node_class(node.library().name(), node.type())
+            if _class:
+                om_node_class = _class
 
         om_node = om_node_class.from_node(self, node)
+        if node.library() and self._attribute_templates and not self._lazy_attributes:
+            self._apply_attribute_template(
+                om_node, (node.library().name(), node.type())
+            )
 
         self._om_nodes[node.uuid()] = om_node
         logger.debug("Created OM node %s.", node.path())
 
+    def build_om_node(self, om_node: OMNode) -> None:
+        """Build the maya nodes of an OMNode and tag them.
+
+        When attaching, the tagged nodes of the same class are adopted instead.
+        The nodes are watched for attribute changes once the modifier is applied.
+        """
+        watched = self._shadow_values or self._receive_maya_edits
+        if watched and not om_node.VIRTUAL:
+            self._unwatched.add(om_node.uuid())
+
+        tagged = self._adopted.get(om_node.uuid())
+        if tagged is not None and tagged.om_node_class == type(om_node).__name__:
+            del self._adopted[om_node.uuid()]
+            om_node.adopt(
+                tagged.maya_nodes(), tagged.input_node(), tagged.output_node()
+            )
+            return
+
+        self._build_om_node(om_node)
+        if self._tag_scene:
+            om_node.tag_maya_nodes()
+
+    def _build_om_node(self, om_node: OMNode) -> None:
+        """Build the maya nodes of an OMNode, cloning the prototype of its class.
+
+        The first build of a clonable class is recorded as its prototype.
+        """
+        om_node_class = type(om_node)
+        if not self._prototypes:
+            om_node.build()
+            return
+
+        if om_node_class in self._node_prototypes:
+            prototype = self._node_prototypes[om_node_class]
+            if prototype is None:
+                om_node.build()
+            else:
+                prototype.instantiate(om_node)
+            return
+
+        if not is_clonable(om_node_class):
+            self._node_prototypes[om_node_class] = None
+            om_node.build()
+            return
+
+        with self.batch(deferred=True) as modifier:
+            self._recorder = PrototypeRecorder(modifier, om_node)
+            try:
+                om_node.build()
+            finally:
+                recorder, self._recorder = self._recorder, None
+        self._node_prototypes[om_node_class] = recorder.prototype()
+
+    def _apply_attribute_template(self, om_node: OMNode, key: TemplateKey) -> None:
+        """Create the attributes of a library node from the template of its type.
+
+        The template is recorded from the first instance of the type once a
+        second one is created. Only the attributes of the ports the instance
+        actually gets are created, see `OMNode.claim_templated_attribute`.
+        """
+        template = self._templates.get(key)
+        if template is None:
+            source = self._om_nodes.get(self._template_sources.get(key))
+            if source is None:
+                self._template_sources[key] = om_node.uuid()
+                return
+            template = AttributeTemplate.from_om_node(key, source)
+            self._templates[key] = template
+            del self._template_sources[key]
+            logger.debug("Recorded the attribute template of %s.", key)
+
+        om_node.set_attribute_template(template)
+
+    def discard_attribute_template(self, template: AttributeTemplate) -> None:
+        """Stop applying a template whose ports differ from a new instance's.
+
+        The next instance of the type becomes the source of a new template.
+        """
+        if self._templates.get(template.key) is template:
+            del self._templates[template.key]
+            logger.debug("Discarded the attribute template of %s.", template.key)
+
+    @batched
+    @profiled
     def delete_om_node(self, node: Node) -> None:
         om_node = self._om_nodes.pop(node.uuid())
+        om_node.unsubscribe()
         om_node.delete()
         logger.debug("Deleted OM node %s.", node.uuid())
 
+    @batched
+    @profiled
     def create_om_port(self, port: Port) -> None:
         om_port = OMPort.from_port(self, port)
         self._om_ports[port.uuid()] = om_port
+        if self._scheduler is not None:
+            # The value may have been set before the queued event got applied.
+            om_port.sync_value(port)
         logger.debug("Created OM port %s.", port.path())
 
+    @batched
+    @profiled
     def delete_om_port(self, port: Port) -> None:
-        del self._om_ports[port.uuid()]
+        om_port = self._om_ports.pop(port.uuid())
+        om_port.unsubscribe()
+        om_port.om_node().unregister_port(om_port.uuid())
+        if om_port.is_materialized():
+            self.invalidate_port_tags(om_port.om_node().uuid())
+            self.unregister_maya_attribute(
+                om_port.maya_node(), om_port.maya_attribute_name()
+            )
+        om_port.clear_maya_attribute()
+        self._virtual_values.pop(port.uuid(), None)
         logger.debug("Deleted OM port %s.", port.uuid())
 
+    @batched
+    @profiled
     def create_om_connection(self, connection: Connection) -> None:
-        om_connection = OMConnection.from_connection(self, connection)
+        om_connection = self._register_om_connection(connection)
         om_connection.build()
-        self._om_connections[connection.uuid()] = om_connection
 
         logger.debug("Created OM connection %s.", connection.uuid())
 
+    def _register_om_connection(self, connection: Connection) -> OMConnection:
+        """Create the OMConnection of a connection without building it."""
+        om_connection = OMConnection.from_connection(self, connection)
+        self._om_connections[connection.uuid()] = om_connection
+
+        if self._flatten_groups:
+            source_id = om_connection.source_id()
+            target_id = om_connection.target_id()
+            if om_connection.source().is_virtual():
+                self._virtual_downstream.setdefault(source_id, set()).add(target_id)
+            if om_connection.target().is_virtual():
+                self._virtual_upstream[target_id] = source_id
+        return om_connection
+
+    def unregister_om_connection(self, connection_id: UUID) -> OMConnection:
+        """Forget an OMConnection, leaving its maya connection untouched."""
+        om_connection = self._om_connections.pop(connection_id)
+
+        source_id = om_connection.source_id()
+        target_id = om_connection.target_id()
+        targets = self._virtual_downstream.get(source_id)
+        if targets is not None:
+            targets.discard(target_id)
+            if not targets:
+                del self._virtual_downstream[source_id]
+        if self._virtual_upstream.get(target_id) == source_id:
+            del self._virtual_upstream[target_id]
+        return om_connection
+
+    @batched
+    @profiled
     def delete_om_connection(self, connection: Connection) -> None:
-        om_connection = self._om_connections.pop(connection.uuid())
+        om_connection = self._om_connections[connection.uuid()]
         om_connection.delete()
+        self.unregister_om_connection(connection.uuid())
         logger.debug("Deleted OM connection %s.", connection.uuid())
 
     def select_nodes(self, uuids: List[UUID]) -> None:
-        nodes = [self.get_om_node(uuid).input_node().path() for uuid in uuids]
+        self.flush()
+        nodes = [
+            om_node.input_node().path()
+            for om_node in map(self.get_om_node, uuids)
+            if not om_node.VIRTUAL
+        ]
         cmds.select(nodes)
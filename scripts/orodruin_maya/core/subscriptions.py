@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import logging
+from typing import Any, Callable, List, Tuple
+
+import attr
+from maya.api import OpenMaya as om
+from orodruin.core.signal import Signal
+
+logger = logging.getLogger(__name__)
+
+
+@attr.s(slots=True)
+class Subscriptions:
+    """Track the orodruin signals an OM object subscribes to, to release them."""
+
+    _subscriptions: List[Tuple[Signal, Callable[..., Any]]] = attr.ib(
+        init=False, factory=list
+    )
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self, signal: Signal, callback: Callable[..., Any]) -> None:
+        """Subscribe a callback to a signal and track the subscription."""
+        signal.subscribe(callback)
+        self._subscriptions.append((signal, callback))
+
+    def release(self) -> None:
+        """Unsubscribe every tracked callback from its signal."""
+        for signal, callback in self._subscriptions:
+            try:
+                signal.unsubscribe(callback)
+            except ValueError:
+                logger.debug("%s was already unsubscribed.", callback)
+        self._subscriptions.clear()
+
+
+@attr.s(slots=True)
+class MayaCallbacks:
+    """Track the maya callbacks an OM object adds, to remove them."""
+
+    _callback_ids: List[int] = attr.ib(init=False, factory=list)
+
+    def __len__(self) -> int:
+        return len(self._callback_ids)
+
+    def add_attribute_changed(
+        self, maya_node: Any, callback: Callable[..., Any]
+    ) -> None:
+        """Call the callback whenever an attribute of the maya node changes."""
+        self._callback_ids.append(
+            om.MNodeMessage.addAttributeChangedCallback(maya_node.object(), callback)
+        )
+
+    def release(self) -> None:
+        """Remove every tracked callback."""
+        if self._callback_ids:
+            om.MMessage.removeCallbacks(self._callback_ids)
+            self._callback_ids.clear()
+
+
+__all__ = ["MayaCallbacks", "Subscriptions"]
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any, Collection, Dict, List, Optional, Set
+from uuid import UUID
+
+import attr
+import cmdx
+from maya import cmds
+
+logger = logging.getLogger(__name__)
+
+NODE_TAG = "orodruinNode"
+"""The attribute tagging a maya node with the OMNode that built it."""
+
+PORTS_TAG = "orodruinPorts"
+"""The attribute tagging an input or output maya node with the port UUIDs of its
+attributes, as a JSON object mapping the attribute names to the UUIDs."""
+
+INPUT_ROLE = "in"
+OUTPUT_ROLE = "out"
+
+
+def tag_attribute_kwargs(name: str) -> Dict[str, Any]:
+    """Return the addAttr kwargs of a tag attribute."""
+    return {"longName": name, "attributeType": cmdx.String}
+
+
+def node_role(
+    maya_node: cmdx.Node, input_node: cmdx.Node, output_node: cmdx.Node
+) -> str:
+    """Return the role of a maya node within the nodes built for an OMNode."""
+    role = ""
+    if maya_node.hashCode == input_node.hashCode:
+        role += INPUT_ROLE
+    if maya_node.hashCode == output_node.hashCode:
+        role += OUTPUT_ROLE
+    return role
+
+
+def format_node_tag(node_id: UUID, index: int, role: str, om_node_class: str) -> str:
+    """Return the tag of the maya node created at the given index by an OMNode."""
+    return f"{node_id}:{index}:{role}:{om_node_class}"
+
+
+@attr.s(slots=True)
+class TaggedNodes:
+    """The maya nodes a previous OMNode built, as found in the scene."""
+
+    om_node_class: str = attr.ib()
+
+    _nodes: Dict[int, cmdx.Node] = attr.ib(init=False, factory=dict)
+    _input_index: Optional[int] = attr.ib(init=False, default=None)
+    _output_index: Optional[int] = attr.ib(init=False, default=None)
+    _consistent: bool = attr.ib(init=False, default=True)
+
+    def add(
+        self, index: int, role: str, om_node_class: str, maya_node: cmdx.Node
+    ) -> None:
+        if index in self._nodes or om_node_class != self.om_node_class:
+            self._consistent = False
+        self._nodes[index] = maya_node
+        if INPUT_ROLE in role:
+            self._input_index = index
+        if OUTPUT_ROLE in role:
+            self._output_index = index
+
+    def is_complete(self) -> bool:
+        """Return True if every node of the build and both io nodes were found."""
+        return (
+            self._consistent
+            and self._input_index is not None
+            and self._output_index is not None
+            and sorted(self._nodes) == list(range(len(self._nodes)))
+        )
+
+    def maya_nodes(self) -> List[cmdx.Node]:
+        """Return the maya nodes in the order the OMNode created them."""
+        return [self._nodes[index] for index in sorted(self._nodes)]
+
+    def input_node(self) -> cmdx.Node:
+        return self._nodes[self._input_index]  # type: ignore
+
+    def output_node(self) -> cmdx.Node:
+        return self._nodes[self._output_index]  # type: ignore
+
+
+@attr.s(slots=True)
+class SceneTags:
+    """The tags found on the maya nodes of a scene, see `OMState.attach`."""
+
+    _nodes: Dict[UUID, TaggedNodes] = attr.ib(factory=dict)
+    _ports: Dict[int, Dict[str, str]] = attr.ib(factory=dict)
+    _port_ids: Set[str] = attr.ib(factory=set)
+    _invalid_nodes: List[cmdx.Node] = attr.ib(factory=list)
+
+    @classmethod
+    def scan(cls) -> SceneTags:
+        """Read the tags of every tagged maya node, reading each tag once."""
+        scene_tags = cls()
+        paths = cmds.ls(f"*.{NODE_TAG}", objectsOnly=True, recursive=True, long=True)
+        for path in paths or []:
+            scene_tags._read(cmdx.encode(path))
+        logger.debug("Found %s tagged OM nodes.", len(scene_tags._nodes))
+        return scene_tags
+
+    def _read(self, maya_node: cmdx.Node) -> None:
+        try:
+            tag = maya_node[NODE_TAG].read()
+            node_id, index, role, om_node_class = tag.split(":", 3)
+            tagged = self._nodes.get(UUID(node_id))
+            if tagged is None:
+                tagged = self._nodes[UUID(node_id)] = TaggedNodes(om_node_class)
+            tagged.add(int(index), role, om_node_class, maya_node)
+        except (AttributeError, ValueError):
+            logger.warning("Ignored the invalid OM tag of %s.", maya_node)
+            self._invalid_nodes.append(maya_node)
+            return
+
+        if role and maya_node.has_attr(PORTS_TAG):
+            try:
+                ports = json.loads(maya_node[PORTS_TAG].read() or "{}")
+            except ValueError:
+                ports = {}
+            self._ports[maya_node.hashCode] = ports
+            self._port_ids.update(ports.values())
+
+    def adoptable(self, node_ids: Collection[UUID]) -> Dict[UUID, TaggedNodes]:
+        """Return the complete tagged builds of the given nodes, by node UUID."""
+        return {
+            node_id: tagged
+            for node_id, tagged in self._nodes.items()
+            if node_id in node_ids and tagged.is_complete()
+        }
+
+    def orphan_nodes(self, node_ids: Collection[UUID]) -> List[cmdx.Node]:
+        """Return the tagged maya nodes that can't be adopted by the given nodes."""
+        orphans = list(self._invalid_nodes)
+        for node_id, tagged in self._nodes.items():
+            if node_id not in node_ids or not tagged.is_complete():
+                orphans.extend(tagged.maya_nodes())
+        return orphans
+
+    def port_tags(self, maya_node: cmdx.Node) -> Dict[str, str]:
+        """Return the port UUIDs of the attributes of a maya node, by attribute."""
+        return self._ports.get(maya_node.hashCode, {})
+
+    def has_port_attribute(self, port_id: UUID) -> bool:
+        """Return True if a maya attribute was tagged with the given port."""
+        return str(port_id) in self._port_ids
+
+
+__all__ = [
+    "NODE_TAG",
+    "PORTS_TAG",
+    "SceneTags",
+    "TaggedNodes",
+    "format_node_tag",
+    "node_role",
+    "tag_attribute_kwargs",
+]
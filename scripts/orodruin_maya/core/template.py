@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING, Any, Dict, Optional, Sequence, Tuple
+
+import attr
+from orodruin.core.port.port import PortDirection, PortType
+
+if TYPE_CHECKING:
+    from .modifier import OMModifier
+    from .node import OMNode
+
+logger = logging.getLogger(__name__)
+
+TemplateKey = Tuple[str, str]
+"""The library name and node type an attribute template applies to."""
+
+
+@attr.s(frozen=True, slots=True)
+class AttributeSpec:
+    """An immutable description of a maya attribute created for a port."""
+
+    name: str = attr.ib()
+    direction: PortDirection = attr.ib()
+    port_type: PortType = attr.ib()
+    kwargs: Tuple[Tuple[str, Any], ...] = attr.ib()
+
+    def add_attr_kwargs(self) -> Dict[str, Any]:
+        """Return a new dict of the addAttr kwargs describing the attribute."""
+        return dict(self.kwargs)
+
+
+@attr.s(frozen=True, slots=True)
+class AttributeTemplate:
+    """The maya attributes of the ports of a library node type.
+
+    A template only describes attributes, the instances it is applied to only
+    get the attributes of the ports they actually have, see
+    `OMNode.claim_templated_attribute`. Specs are ordered as the ports were created.
+    """
+
+    key: TemplateKey = attr.ib()
+    specs: Tuple[AttributeSpec, ...] = attr.ib()
+    _specs_by_port: Dict[Tuple[PortDirection, str], AttributeSpec] = attr.ib(init=False)
+
+    @_specs_by_port.default
+    def _default_specs_by_port(self) -> Dict[Tuple[PortDirection, str], AttributeSpec]:
+        return {(spec.direction, spec.name): spec for spec in self.specs}
+
+    @classmethod
+    def from_om_node(cls, key: TemplateKey, om_node: OMNode) -> AttributeTemplate:
+        """Record the attributes created for the ports of an existing OMNode."""
+        attribute_map = om_node.maya_attribute_map()
+        specs = tuple(
+            AttributeSpec(
+                om_port.name(),
+                om_port.direction(),
+                om_port.type(),
+                tuple(om_port.add_attr_kwargs(attribute_map).items()),
+            )
+            for om_port in om_node.om_ports()
+            if om_port.name() not in attribute_map
+        )
+        return cls(key, specs)
+
+    def find_spec(
+        self, name: str, direction: PortDirection, port_type: PortType
+    ) -> Optional[AttributeSpec]:
+        """Return the spec of a port, None if the template doesn't have it."""
+        spec = self._specs_by_port.get((direction, name))
+        if spec is None or spec.port_type is not port_type:
+            return None
+        return spec
+
+    def apply(
+        self, modifier: OMModifier, om_node: OMNode, specs: Sequence[AttributeSpec]
+    ) -> None:
+        """Queue the creation of the attributes of some specs on an OMNode.
+
+        The attributes of each maya node are queued at once, those already
+        created are skipped.
+        """
+        for direction in (PortDirection.input, PortDirection.output):
+            maya_node = (
+                om_node.input_node()
+                if direction is PortDirection.input
+                else om_node.output_node()
+            )
+            kwargs = [
+                spec.add_attr_kwargs()
+                for spec in specs
+                if spec.direction is direction
+                and not modifier.has_attr(maya_node, spec.name)
+            ]
+            if kwargs:
+                modifier.add_attributes(maya_node, kwargs)
+
+
+__all__ = ["AttributeSpec", "AttributeTemplate", "TemplateKey"]
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from orodruin_maya.core.profiler import OMProfiler
+from PySide2 import QtCore, QtWidgets
+
+from .dockable_widget import DockableWidget
+
+COLUMNS = ("Handler", "Node Type", "Calls", "Total ms", "p50 ms", "p90 ms", "p99 ms")
+REFRESH_INTERVAL = 1000
+
+
+class OMStatsPanel(DockableWidget):
+    """Show the handler stats recorded by an OMProfiler, refreshed every second."""
+
+    WINDOW_TITLE = "Orodruin Stats"
+
+    ui_instance: Optional[OMStatsPanel] = None
+
+    @classmethod
+    def open_profiler(cls, profiler: OMProfiler) -> OMStatsPanel:
+        """Create or show the panel and display the given profiler's stats."""
+        panel = cls.open()
+        panel.set_profiler(profiler)
+        return panel
+
+    def __init__(self):
+        super().__init__()
+        self._profiler: Optional[OMProfiler] = None
+
+        self.table = QtWidgets.QTableWidget(0, len(COLUMNS) + 1)
+        self.table.setHorizontalHeaderLabels([*COLUMNS, "Maya Commands"])
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.table.setSortingEnabled(True)
+
+        reset_button = QtWidgets.QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+
+        layout = QtWidgets.QVBoxLayout()
+        layout.addWidget(self.table)
+        layout.addWidget(reset_button)
+        self.setLayout(layout)
+
+        self._timer = QtCore.QTimer(self)
+        self._timer.timeout.connect(self.refresh)
+        self._timer.start(REFRESH_INTERVAL)
+
+    def set_profiler(self, profiler: Optional[OMProfiler]) -> None:
+        self._profiler = profiler
+        self.refresh()
+
+    def reset(self) -> None:
+        if self._profiler is not None:
+            self._profiler.reset()
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Fill the table with the profiler's current stats."""
+        if not self.isVisible():
+            return
+
+        stats = self._profiler.stats() if self._profiler is not None else {}
+
+        self.table.setSortingEnabled(False)
+        self.table.setRowCount(len(stats))
+        for row, ((handler, node_type), handler_stats) in enumerate(
+            sorted(stats.items())
+        ):
+            commands = ", ".join(
+                f"{command}: {count}"
+                for command, count in sorted(handler_stats.commands().items())
+            )
+            values = (
+                handler,
+                node_type,
+                handler_stats.count(),
+                handler_stats.total() * 1000,
+                handler_stats.percentile(50) * 1000,
+                handler_stats.percentile(90) * 1000,
+                handler_stats.percentile(99) * 1000,
+                commands,
+            )
+            for column, value in enumerate(values):
+                item = QtWidgets.QTableWidgetItem()
+                if isinstance(value, float):
+                    value = round(value, 3)
+                item.setData(QtCore.Qt.DisplayRole, value)
+                self.table.setItem(row, column, item)
+        self.table.setSortingEnabled(True)
@@ -13,6 +13,12 @@ def reload_orodruin():
     logger = globals()["logger"]  # pylint: disable = redefined-outer-name
     sys = globals()["sys"]  # pylint: disable = redefined-outer-name
 
+    # Drop the cached node implementations explicitly, in case the library
+    # module is still referenced somewhere after being removed.
+    library = sys.modules.get("orodruin_maya.core.library")
+    if library:
+        library.clear_node_class_cache()
+
     target_modules = []
     for module in sys.modules:
         for term in search:
@@ -1,14 +1,177 @@
+import importlib
+import importlib.abc
 import logging
 import site
+import sys
+import time
 from pathlib import Path
+from typing import Any, List, NamedTuple, Sequence, Tuple
 
 logger = logging.getLogger(__name__)
 
+VENV_PACKAGES = ("orodruin_maya", "orodruin", "orodruin_editor", "cmdx", "attr")
+"""Top level packages whose first import activates the virtual env."""
+
+PROFILED_MODULES = ("orodruin_maya.core", "orodruin_maya.ui.editor_window")
+
+
+class _VenvActivator(importlib.abc.MetaPathFinder):
+    """Activate the virtual env the first time one of its packages is imported.
+
+    The finder stays in sys.meta_path as a no-op once the venv is active, the
+    import system may be iterating over sys.meta_path when it activates it.
+    """
+
+    def __init__(self) -> None:
+        self.active = False
+
+    def find_spec(self, fullname: str, path: Any = None, target: Any = None) -> None:
+        if not self.active and fullname.partition(".")[0] in VENV_PACKAGES:
+            activate_venv()
+        # Let the regular finders import the module from the activated venv.
+        return None
+
+
+_VENV_ACTIVATOR = _VenvActivator()
+
 
 def init_module() -> None:
-    """Init the orodruin maya module."""
+    """Init the orodruin maya module.
+
+    The virtual env is only activated once orodruin is used, to keep it out of
+    Maya's boot time.
+    """
+    if _VENV_ACTIVATOR not in sys.meta_path:
+        sys.meta_path.insert(0, _VENV_ACTIVATOR)
+
+
+def activate_venv() -> None:
+    """Add the virtual env of the module to the python path, once."""
+    if _VENV_ACTIVATOR.active:
+        return
+    _VENV_ACTIVATOR.active = True
+
     venv_path = Path(__file__).parent.parent / ".venv" / "Lib" / "site-packages"
     if venv_path.exists():
         site.addsitedir(venv_path)
     else:
         logger.error(f"Virtual env path does not exist: {venv_path}")
+
+
+class ImportRecord(NamedTuple):
+    """Time spent importing a module, in microseconds."""
+
+    name: str
+    self_time: int
+    cumulative_time: int
+    depth: int
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Loader wrapper reporting the time spent executing a module."""
+
+    def __init__(self, loader: importlib.abc.Loader, timer: "_ImportTimer") -> None:
+        self._loader = loader
+        self._timer = timer
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._loader, name)
+
+    def create_module(self, spec: Any) -> Any:
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module: Any) -> None:
+        self._timer.start()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._timer.stop(module.__name__)
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """Finder recording import times the same way `python -X importtime` does."""
+
+    def __init__(self) -> None:
+        self.records: List[ImportRecord] = []
+        self._stack: List[List[float]] = []
+
+    def find_spec(self, fullname: str, path: Any = None, target: Any = None) -> Any:
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    def start(self) -> None:
+        self._stack.append([time.perf_counter(), 0.0])
+
+    def stop(self, name: str) -> None:
+        start, children = self._stack.pop()
+        cumulative = time.perf_counter() - start
+        if self._stack:
+            self._stack[-1][1] += cumulative
+        self.records.append(
+            ImportRecord(
+                name,
+                int((cumulative - children) * 1e6),
+                int(cumulative * 1e6),
+                len(self._stack),
+            )
+        )
+
+
+def startup_profile(
+    modules: Sequence[str] = PROFILED_MODULES,
+    verbose: bool = False,
+) -> List[ImportRecord]:
+    """Report the time orodruin adds to Maya's boot, like `python -X importtime`.
+
+    The virtual env activation and the import of the given modules are timed,
+    modules already imported in the session cost nothing and are not reported,
+    run this in a fresh Maya session for meaningful numbers.
+    Print a summary per top level package, or every module if verbose.
+    """
+    timer = _ImportTimer()
+
+    start = time.perf_counter()
+    activate_venv()
+    venv_time = int((time.perf_counter() - start) * 1e6)
+    timer.records.append(ImportRecord("<venv activation>", venv_time, venv_time, 0))
+
+    sys.meta_path.insert(0, timer)
+    try:
+        for module in modules:
+            importlib.import_module(module)
+    finally:
+        sys.meta_path.remove(timer)
+
+    print("import time: self [us] | cumulative | imported package")
+    if verbose:
+        for record in timer.records:
+            print(
+                f"import time: {record.self_time:>9} | {record.cumulative_time:>10} | "
+                f"{'  ' * record.depth}{record.name}"
+            )
+
+    for package, package_time in _package_times(timer.records):
+        print(f"import time: {'':>9} | {package_time:>10} | {package}")
+    total = sum(record.self_time for record in timer.records)
+    print(f"import time: {'':>9} | {total:>10} | <total>")
+
+    return timer.records
+
+
+def _package_times(records: List[ImportRecord]) -> List[Tuple[str, int]]:
+    """Return the time spent in each top level package, slowest first."""
+    packages: dict = {}
+    for record in records:
+        package = record.name.partition(".")[0]
+        packages[package] = packages.get(package, 0) + record.self_time
+    return sorted(packages.items(), key=lambda item: -item[1])